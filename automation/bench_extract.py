@@ -0,0 +1,72 @@
+# bench_extract.py
+# Cost of pulling the title and poster out of the captured pages: the regex
+# passes of the previous parsers (decode the whole page, then one search per
+# pattern) against extract_engine, on the whole page and streamed in chunks as
+# HttpCache.scan feeds it. The last line is a page of unclosed dvd-containers,
+# where the previous DOTALL .*? backtracks quadratically.
+#
+# Usage: python automation/bench_extract.py [--repeat 5] [--chunk 16384]
+
+import argparse
+import gzip
+import os
+import re
+import sys
+import time
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+import fsmirror
+import netflix_parse
+
+# Recorded pages of test/fixtures/pages
+PAGES = ["netflix_title.html.gz", "netflix_lxml_dump.html.gz"]
+
+def previous_netflix(data):
+    text = data.decode("utf-8", "replace")
+    return re.search(r'<img alt="" src=(["\'])(.*?)\1', text)
+
+def previous_fsmirror(data):
+    html = data.decode("utf-8", "replace")
+    re.search(r'<title>(.*?)</title>', html, re.IGNORECASE | re.DOTALL)
+    match = re.search(r'<div class="dvd-container"[^>]*onclick="showDvdPoster\(\)"[^>]*>.*?<img[^>]*src=["\']([^"\']+)["\']',
+                      html, re.DOTALL)
+    if not match:
+        re.search(r'background-image:\s*url\(["\']([^"\']+)["\']\)', html)
+
+def streamed(extractor, data, chunk):
+    """Bytes read until the scan is done."""
+    scan = extractor.scan()
+    for offset in range(0, len(data), chunk):
+        if scan.feed(data[offset:offset + chunk]):
+            return offset + chunk
+    return len(data)
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the site extraction rules on captured pages")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--chunk", type=int, default=16384)
+    args = parser.parse_args()
+    pathological = (b'<div class="dvd-container" onclick="showDvdPoster()">' + b'<p>x</p>' * 20) * 1000
+    cases = [(name, gzip.open(os.path.join(ROOT, 'test', 'fixtures', 'pages', name)).read()) for name in PAGES]
+    cases.append(("unclosed dvd-containers", pathological))
+    print(f"{'page':<26} {'KB':>6} {'parser':<9} {'previous ms':>12} {'engine ms':>10} {'streamed ms':>12} {'read KB':>8}")
+    for name, data in cases:
+        for site, previous, extractor in (("netflix", previous_netflix, netflix_parse.EXTRACTOR),
+                                          ("fsmirror", previous_fsmirror, fsmirror.EXTRACTOR)):
+            previous_ms = best_of(args.repeat, lambda: previous(data))
+            engine_ms = best_of(args.repeat, lambda: extractor.extract(data))
+            streamed_ms = best_of(args.repeat, lambda: streamed(extractor, data, args.chunk))
+            read_kb = streamed(extractor, data, args.chunk) / 1024
+            print(f"{name:<26} {len(data) / 1024:6.0f} {site:<9} {previous_ms:12.1f} {engine_ms:10.1f} "
+                  f"{streamed_ms:12.1f} {read_kb:8.0f}")
+
+if __name__ == "__main__":
+    main()
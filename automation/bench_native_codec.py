@@ -0,0 +1,74 @@
+# bench_native_codec.py
+# Throughput of the native messaging codec (messages/s and MB/s) for small and
+# large frames, compared with the blocking per-message reads it replaces.
+#
+# Usage: python automation/bench_native_codec.py
+
+import asyncio
+import io
+import json
+import os
+import struct
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from native_codec import READ_CHUNK_SIZE, MessageProtocol, encode_message, read_messages
+
+CASES = [
+    ("small (120 B)", {"text": "x" * 100, "url": "https://a"}, 50000),
+    ("large (512 KB)", {"text": "x" * (512 * 1024)}, 200),
+]
+
+def blocking_read_all(stream):
+    """The previous read_native_message() loop over a binary stream."""
+    messages = 0
+    while True:
+        raw_length = stream.read(4)
+        if len(raw_length) < 4:
+            return messages
+        message_length = struct.unpack('=I', raw_length)[0]
+        json.loads(stream.read(message_length).decode('utf-8'))
+        messages += 1
+
+async def async_read_all(reader):
+    messages = 0
+    async for _ in read_messages(reader):
+        messages += 1
+    return messages
+
+def report(label, count, size, seconds):
+    print(f"  {label:10s} {count / seconds:12,.0f} msg/s  {size / seconds / 1e6:10.1f} MB/s")
+
+def main():
+    for name, message, count in CASES:
+        data = encode_message(message, max_size=len(json.dumps(message)) + 1) * count
+        print(f"{name}: {count} messages, {len(data) / 1e6:.1f} MB")
+        start = time.perf_counter()
+        assert blocking_read_all(io.BytesIO(data)) == count
+        report("blocking", count, len(data), time.perf_counter() - start)
+        asyncio.run(time_async_read(data, count))
+        time_protocol(data, count)
+
+async def time_async_read(data, count):
+    # Preload the reader outside the timing, like BytesIO does for the blocking loop
+    reader = asyncio.StreamReader(limit=len(data) + 1)
+    reader.feed_data(data)
+    reader.feed_eof()
+    start = time.perf_counter()
+    assert await async_read_all(reader) == count
+    report("asyncio", count, len(data), time.perf_counter() - start)
+
+def time_protocol(data, count):
+    """MessageProtocol fed pipe-sized chunks, as a read-pipe transport would."""
+    chunks = [data[i:i + READ_CHUNK_SIZE] for i in range(0, len(data), READ_CHUNK_SIZE)]
+    received = []
+    protocol = MessageProtocol(lambda message: received.append(None))
+    protocol.closed = asyncio.new_event_loop().create_future()
+    start = time.perf_counter()
+    for chunk in chunks:
+        protocol.data_received(chunk)
+    assert len(received) == count
+    report("protocol", count, len(data), time.perf_counter() - start)
+
+if __name__ == "__main__":
+    main()
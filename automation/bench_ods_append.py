@@ -0,0 +1,57 @@
+# bench_ods_append.py
+# Cost of appending one row to sheets of growing size: the streaming splice in
+# ods_append against the previous pyexcel_ods3 get_data()/save_data() rewrite.
+#
+# Usage: python automation/bench_ods_append.py [--sizes 0 1000 10000 50000] [--pyexcel-max 10000]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import ods_append
+from Functions import SHEET_NAME, get_data, make_row, save_data
+
+def history(count):
+    return [make_row(f"Series {n % 400}", str(n % 24 + 1), "01.01.2025",
+                     f"https://www.netflix.com/watch/{81000000 + n}", n % 3 == 0,
+                     "https://occ-0-430-1490.1.nflxso.net/dnm/api/v6/boxshot.jpg") for n in range(count)]
+
+def pyexcel_append(path, row):
+    """The previous Functions.append_row_to_ods()."""
+    sheet = get_data(path).get(SHEET_NAME, [])
+    sheet.append(row)
+    save_data(path, {SHEET_NAME: sheet})
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark appending one row to an ODS sheet")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 1000, 10000, 50000])
+    parser.add_argument("--pyexcel-max", type=int, default=10000,
+                        help="skip the pyexcel rewrite above this many rows (it gets slow)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    row = make_row("Dark", "7", "02.01.2025", "https://www.netflix.com/watch/80100172", False, "")
+    print(f"{'rows':>8} {'file KB':>8} {'splice ms':>10} {'pyexcel ms':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"bench_{size}.ods")
+            ods_append.create_ods(path, SHEET_NAME, history(size))
+            kb = os.path.getsize(path) / 1024
+            splice_ms = best_of(args.repeat, lambda: ods_append.append_rows(path, SHEET_NAME, [row]))
+            if size <= args.pyexcel_max:
+                pyexcel_ms = f"{best_of(args.repeat, lambda: pyexcel_append(path, row)):11.1f}"
+            else:
+                pyexcel_ms = f"{'skipped':>11}"
+            print(f"{size:8d} {kb:8.0f} {splice_ms:10.1f} {pyexcel_ms}")
+
+if __name__ == "__main__":
+    main()
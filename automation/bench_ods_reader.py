@@ -0,0 +1,72 @@
+# bench_ods_reader.py
+# Peak memory of reading the whole history sheet: the streaming ods_reader
+# against pyexcel_ods3.get_data(). Every measurement runs in a fresh process so
+# peak RSS is not carried over from the previous one.
+#
+# Usage: python automation/bench_ods_reader.py [--sizes 1000 10000 100000] [--pyexcel-max 10000]
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB."""
+    try:
+        import resource
+    except ImportError:
+        import psutil  # Windows has no resource module
+        return psutil.Process().memory_info().peak_wset // 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def measure(reader, path):
+    """Child process: read every row with reader, print rows, ms and peak RSS (imports included)."""
+    from Functions import SHEET_NAME, get_data
+    from ods_reader import iter_rows
+    start = time.perf_counter()
+    if reader == "stream":
+        count = sum(1 for _ in iter_rows(path, SHEET_NAME))
+    else:
+        count = len(get_data(path)[SHEET_NAME])
+    ms = (time.perf_counter() - start) * 1000
+    print(count, f"{ms:.0f}", peak_rss_kb())
+
+def run(reader, path):
+    out = subprocess.run([sys.executable, __file__, "--child", reader, path],
+                         check=True, capture_output=True, text=True).stdout.split()
+    return int(out[0]), out[1], int(out[2])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of reading an ODS sheet")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--pyexcel-max", type=int, default=10000,
+                        help="skip pyexcel above this many rows (it gets slow)")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure(*args.child)
+        return
+    import ods_append
+    from Functions import SHEET_NAME, make_row
+    print(f"{'rows':>8} {'file KB':>8} {'stream ms':>10} {'stream peak KB':>15} {'pyexcel ms':>11} {'pyexcel peak KB':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"bench_{size}.ods")
+            ods_append.create_ods(path, SHEET_NAME, (
+                make_row(f"Series {n % 400}", str(n % 24 + 1), "01.01.2025",
+                         f"https://www.netflix.com/watch/{81000000 + n}", n % 3 == 0, "") for n in range(size)))
+            kb = os.path.getsize(path) / 1024
+            count, stream_ms, stream_kb = run("stream", path)
+            assert count == size, count
+            line = f"{size:8d} {kb:8.0f} {stream_ms:>10} {stream_kb:15d}"
+            if size <= args.pyexcel_max:
+                _, pyexcel_ms, pyexcel_kb = run("pyexcel", path)
+                line += f" {pyexcel_ms:>11} {pyexcel_kb:16d}"
+            print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# replay_captures.py
+# Runs the current site parsers over every stored page capture (capture_store.py)
+# offline and prints what they extract. Each capture is served under its URL by
+# a replay session (ReplayAdapter, also used by the tests' page corpus), through
+# an empty page cache, so the parser code paths are the same as for a click.
+# --save keeps the results; --compare lists the captures whose result differs
+# from a saved run, to check an extraction change against real traffic before
+# it ships (exit status 1 if any changed).
+#
+# Capturing is off by default: set CAPTURE_SAMPLE_RATE in src/capture_store.py.
+#
+# Usage: python automation/replay_captures.py [--dir DIR] [--site netflix] [--save FILE] [--compare FILE]
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3 import HTTPResponse
+import capture_store
+import http_cache
+import http_client
+from capture_store import CaptureStore
+from site_registry import get_site
+
+class ReplayAdapter(BaseAdapter):
+    """
+    requests adapter answering GETs from recorded bodies (url -> bytes);
+    anything else is a 404. Mount it on an http_client.Session to run the
+    parsers offline.
+    """
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+        self.requested = []
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requested.append(request.url)
+        body = self.pages.get(request.url)
+        raw = HTTPResponse(body=io.BytesIO(body or b""), status=200 if body is not None else 404,
+                           headers={"Content-Type": "text/html; charset=utf-8",
+                                    "Content-Length": str(len(body or b""))},
+                           preload_content=False)
+        response = HTTPAdapter().build_response(request, raw)
+        if not stream:
+            response.content
+        return response
+
+    def close(self):
+        pass
+
+def replay_session(pages):
+    """An http_client.Session that answers from pages (url -> bytes) only."""
+    session = http_client.Session()
+    adapter = ReplayAdapter(pages)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def replay(store, site_key=None):
+    """{capture name: result} for every capture (of site_key), printed as they run."""
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        http_cache._cache = http_cache.HttpCache(cache_dir)
+        for path, meta, body in store.captures():
+            site = get_site(meta.get("site"))
+            if site is None or (site_key and site.key != site_key):
+                continue
+            http_cache._cache.clear()
+            start = time.perf_counter()
+            titel, image_url = site.parse(meta["url"], session=replay_session({meta["url"]: body}))
+            ms = (time.perf_counter() - start) * 1000
+            name = os.path.basename(path)[:16]
+            results[name] = {"site": site.key, "url": meta["url"], "titel": titel, "image_url": image_url}
+            prefix = "" if meta.get("complete", True) else " (prefix)"
+            print(f"{name} {site.key:<9} {len(body) / 1024:7.0f} KB{prefix:<9} {ms:7.1f} ms  "
+                  f"{titel!r}  {image_url or '-'}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Rerun the site parsers over the stored page captures")
+    parser.add_argument("--dir", default=capture_store.CAPTURE_DIR, help="capture directory")
+    parser.add_argument("--site", help="only captures of this site (netflix, fsmirror)")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier --save to compare against")
+    args = parser.parse_args()
+    # Replayed pages are not captured again
+    capture_store.CAPTURE_SAMPLE_RATE = 0.0
+    results = replay(CaptureStore(args.dir), args.site)
+    missing = sum(1 for result in results.values() if not result["titel"] or not result["image_url"])
+    print(f"{len(results)} captures, {missing} without title or image")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            before = json.load(f)
+        changed = [name for name in results if name in before and before[name] != results[name]]
+        for name in changed:
+            print(f"changed {name}: {before[name]['titel']!r} {before[name]['image_url']}\n"
+                  f"     -> {results[name]['titel']!r} {results[name]['image_url']}")
+        print(f"{len(changed)} of {sum(1 for name in results if name in before)} compared captures changed")
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    return 1 if args.compare and changed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# startup_budget.py
+# Measures the cold-start import cost of the native host with `python -X importtime`
+# and fails when it exceeds the budget.
+#
+# Usage: python automation/startup_budget.py [--budget-ms 40] [--module main]
+
+import argparse
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# Cold-start budget for `import main` (milliseconds, cumulative import time)
+IMPORT_BUDGET_MS = 40
+
+# Modules the host must not load before a handler asks for them
+DEFERRED_MODULES = ("PyQt6", "requests", "pyexcel_ods3", "form_widget", "netflix_parse", "fsmirror")
+
+def measure_imports(module="main"):
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+    Returns (total_ms, {module_name: cumulative_us}).
+    """
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    imports = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        imports[name.strip()] = int(cumulative)
+    return imports.get(module, 0) / 1000, imports
+
+def deferred_imports(imports):
+    """Return the DEFERRED_MODULES (or their submodules) that were imported."""
+    return sorted(name for name in imports
+                  if name.split(".")[0] in DEFERRED_MODULES)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the native host cold-start import budget")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--module", default="main")
+    args = parser.parse_args()
+    total_ms, imports = measure_imports(args.module)
+    print(f"import {args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.1f} ms)")
+    for name, us in sorted(imports.items(), key=lambda item: item[1], reverse=True)[:10]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+    eager = deferred_imports(imports)
+    if eager:
+        print(f"Loaded at startup but should be deferred: {', '.join(eager)}")
+    if eager or total_ms > args.budget_ms:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,53 @@ chrome.runtime.onInstalled.addListener(() => {
   });
 });
 
+// Native Messaging: one long-lived port to the host, so Python, Qt and the
+// workbook stay warm between clicks. Responses are matched by request id.
+const NATIVE_HOST = "com.example.browsertocalc";
+let nativePort = null;
+let nextRequestId = 1;
+const pendingRequests = new Map();
+
+function getNativePort() {
+  if (nativePort) {
+    return nativePort;
+  }
+  nativePort = chrome.runtime.connectNative(NATIVE_HOST);
+  nativePort.onMessage.addListener((response) => {
+    const callback = response ? pendingRequests.get(response.id) : undefined;
+    if (callback) {
+      pendingRequests.delete(response.id);
+      callback(response, null);
+    } else {
+      console.warn("Unmatched native response:", response);
+    }
+  });
+  nativePort.onDisconnect.addListener(() => {
+    const errorMessage = chrome.runtime.lastError
+      ? chrome.runtime.lastError.message
+      : "Native host disconnected";
+    console.warn("Native host port closed:", errorMessage);
+    nativePort = null;
+    for (const callback of pendingRequests.values()) {
+      callback(undefined, errorMessage);
+    }
+    pendingRequests.clear();
+  });
+  return nativePort;
+}
+
+// Send a message over the shared port; callback receives (response, errorMessage)
+function postNativeMessage(message, callback) {
+  const id = nextRequestId++;
+  pendingRequests.set(id, callback);
+  try {
+    getNativePort().postMessage({ ...message, id: id });
+  } catch (e) {
+    pendingRequests.delete(id);
+    callback(undefined, e.message);
+  }
+}
+
 // Native Messaging: send selected text and URL to native host
 function sendToNativeHost(selectedText, pageUrl, imageSrc = null) {
   const messageData = { 
@@ -18,22 +65,19 @@ function sendToNativeHost(selectedText, pageUrl, imageSrc = null) {
     messageData.imageSrc = imageSrc;
   }
   
-  chrome.runtime.sendNativeMessage(
-    "com.example.browsertocalc",
+  postNativeMessage(
     messageData,
-    (response) => {
-      if (chrome.runtime.lastError) {
-        let errorMessage = chrome.runtime.lastError.message;
+    (response, errorMessage) => {
+      if (errorMessage) {
         if (errorMessage.includes("host not found")) {
           console.error("Native host not found. Please check if Python script is properly registered.");
-        } else if (errorMessage.includes("Native host has exited")) {
-          // This is normal when the script completes successfully
-          console.log("Native host completed successfully");
         } else {
           console.error("Native Messaging Error:", errorMessage);
         }
       } else if (response && response.result === "OK") {
         console.log("Successfully saved to LibreOffice Calc");
+      } else if (response && response.result === "DUPLICATE") {
+        console.log("Already saved on", response.seen_on);
       } else if (response && response.result === "ERROR") {
         console.error("Error saving to Calc:", response.error || "Unknown error");
       } else {
@@ -43,71 +87,90 @@ function sendToNativeHost(selectedText, pageUrl, imageSrc = null) {
   );
 }
 
-function handleNetflixTab(tabInfo) {
-  // Inject content script to get Netflix page title from the tab
+// Runs inside the Netflix tab: read the video title from the player UI
+function netflixPageTitle() {
+  let title = null;
+  const titleElem = document.querySelector('[data-uia="video-title"]');
+  if (titleElem) {
+    title = titleElem.textContent;
+    // Trim the title to keep only the text before "Flg"
+    if (title && title.includes("Flg")) {
+      title = title.split("Flg")[0].trim();
+    }
+  }
+  // Fallback to document.title if not found
+  return title || document.title || '';
+}
+
+// Sites with a native parser, keyed like src/site_registry.py (host label
+// without mirror number). pageTitle is injected into the tab when present.
+const SITE_HANDLERS = {
+  netflix: { label: "Netflix", pageTitle: netflixPageTitle },
+  fsmirror: { label: "FSMirror" }
+};
+
+function siteKeyForUrl(url) {
+  let host;
+  try {
+    host = new URL(url).hostname;
+  } catch (e) {
+    return null;
+  }
+  for (const label of host.split(".")) {
+    const key = label.replace(/\d+$/, "");
+    if (Object.prototype.hasOwnProperty.call(SITE_HANDLERS, key)) {
+      return key;
+    }
+  }
+  return null;
+}
+
+function sendSiteMessage(siteKey, tabInfo, title) {
+  const site = SITE_HANDLERS[siteKey];
+  const message = { site: siteKey, url: tabInfo.url };
+  if (title) {
+    message.title = title;
+  }
+  // Let Python handle all parsing of the page
+  postNativeMessage(message, (response, errorMessage) => {
+    if (errorMessage) {
+      console.error(`Native Messaging Error (${site.label}):`, errorMessage);
+    } else {
+      console.log(`${site.label} native message sent, response:`, response);
+    }
+  });
+}
+
+function handleSiteTab(siteKey, tabInfo) {
+  const site = SITE_HANDLERS[siteKey];
+  if (!site.pageTitle) {
+    sendSiteMessage(siteKey, tabInfo, null);
+    return;
+  }
   chrome.scripting.executeScript({
     target: {tabId: tabInfo.id},
-    func: () => {
-      // Try to get the Netflix video title from the player UI
-      let title = null;
-      const titleElem = document.querySelector('[data-uia="video-title"]');
-      if (titleElem) {
-        title = titleElem.textContent;
-        // Trim the title to keep only the text before "Flg"
-        if (title && title.includes("Flg")) {
-          title = title.split("Flg")[0].trim();
-        }
-      }
-      // Fallback to document.title if not found
-      return title || document.title || '';
-    }
+    func: site.pageTitle
   }, (results) => {
     let title = '';
     if (chrome.runtime.lastError) {
-      console.error('Script injection error (Netflix):', chrome.runtime.lastError.message);
+      console.error(`Script injection error (${site.label}):`, chrome.runtime.lastError.message);
     } else if (results && results[0]) {
       title = results[0].result;
     }
-    chrome.runtime.sendNativeMessage(
-      "com.example.browsertocalc",
-      { netflix: true, url: tabInfo.url, title: title },
-      (response) => {
-        if (chrome.runtime.lastError) {
-          console.error("Native Messaging Error (Netflix):", chrome.runtime.lastError.message);
-        } else {
-          console.log("Netflix native message sent, response:", response);
-        }
-      }
-    );
+    sendSiteMessage(siteKey, tabInfo, title);
   });
 }
 
-function handleFSMirrorTab(tabInfo) {
-  // Send only the URL to the native host, let Python handle all parsing
-  chrome.runtime.sendNativeMessage(
-    "com.example.browsertocalc",
-    { fsmirror: true, url: tabInfo.url },
-    (response) => {
-      if (chrome.runtime.lastError) {
-        console.error("Native Messaging Error (FSMirror):", chrome.runtime.lastError.message);
-      } else {
-        console.log("FSMirror native message sent, response:", response);
-      }
-    }
-  );
-}
-
 chrome.contextMenus.onClicked.addListener((info, tab) => {
   console.log('Context menu clicked:', info.menuItemId, info, tab);
   if (info.menuItemId === "sendToCalc") {
     chrome.tabs.get(tab.id, (tabInfo) => {
       console.log('sendToCalc triggered');
-      if (tabInfo.url && tabInfo.url.includes('netflix')) {
-        handleNetflixTab(tabInfo);
-      } else if (tabInfo.url && tabInfo.url.includes('fsmirror')) {
-        handleFSMirrorTab(tabInfo);
+      const siteKey = tabInfo.url ? siteKeyForUrl(tabInfo.url) : null;
+      if (siteKey) {
+        handleSiteTab(siteKey, tabInfo);
       } else {
-        // Regular functionality for non-FSMirror/non-Netflix pages
+        // Regular functionality for pages without a site parser
         sendToNativeHost(info.selectionText, tabInfo.url || "");
       }
     });
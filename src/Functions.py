@@ -1,29 +1,164 @@
 import os
 import datetime
 import sys
-import json
 import struct
-from pyexcel_ods3 import get_data, save_data
-from collections import OrderedDict
+from native_codec import MAX_MESSAGE_SIZE, FrameTooLarge, decode_frame, encode_message
 
 # --- Config ---
 ODS_PATH = "C:\\Users\\olivi\\Documents\\MeineAblage.ods"
 SHEET_NAME = "Sheet1"
+# "ods": entries go straight into ODS_PATH, through Calc while it has the file
+# open (uno_storage.py). "sqlite": entries go to DB_PATH and
+# ODS_PATH is regenerated from it (export_ods), so edits made in Calc are overwritten.
+STORAGE_BACKEND = "ods"
+DB_PATH = os.path.splitext(ODS_PATH)[0] + ".sqlite3"
+
+def get_data(path):
+    """pyexcel_ods3.get_data, imported on first use to keep host startup light."""
+    from pyexcel_ods3 import get_data as _get_data
+    return _get_data(path)
+
+def save_data(path, data):
+    """pyexcel_ods3.save_data, imported on first use to keep host startup light."""
+    from pyexcel_ods3 import save_data as _save_data
+    _save_data(path, data)
+
+def make_row(titel, episode, seen_on, url, more=False, cover=""):
+    """Build a sheet row. Columns: titel, episode, seen_on, url, more, cover"""
+    return [titel, episode, seen_on, url, "1" if more else "0", cover]
+
+def append_rows_to_ods(rows):
+    """
+    Append several rows (see make_row) to SHEET_NAME in one write.
+    The rows are spliced into the file (ods_append), other sheets are kept.
+    """
+    from ods_append import append_rows
+    with get_write_lock():
+        append_rows(ODS_PATH, SHEET_NAME, rows)
 
 def append_row_to_ods(titel, episode, seen_on, url, more=False, cover=""):
     """
     Append a row to the ODS spreadsheet with the given values.
     Columns: titel, episode, seen_on, url, more, cover
     """
-    if os.path.exists(ODS_PATH):
-        data = get_data(ODS_PATH)
-        sheet = data.get(SHEET_NAME, [])
-    else:
-        sheet = []
-    sheet.append([titel, episode, seen_on, url, "1" if more else "0", cover])
-    data = OrderedDict()
-    data[SHEET_NAME] = sheet
-    save_data(ODS_PATH, data)
+    append_rows_to_ods([make_row(titel, episode, seen_on, url, more, cover)])
+
+_storage = None
+_journal = None
+_history = None
+
+def get_write_lock():
+    """Lock held by any process writing ODS_PATH or the storage behind it (see write_lock.py)."""
+    from write_lock import LOCK_SUFFIX, FileLock
+    return FileLock(ODS_PATH + LOCK_SUFFIX)
+
+def get_storage():
+    """The STORAGE_BACKEND the journal is compacted into (see storage.py)."""
+    global _storage
+    if _storage is None:
+        from storage import OdsStorage, SqliteStorage
+        _storage = OdsStorage(ODS_PATH, SHEET_NAME)
+        if STORAGE_BACKEND == "ods":
+            # Through Calc while the spreadsheet is open there
+            from uno_storage import CalcStorage
+            _storage = CalcStorage(_storage)
+        elif STORAGE_BACKEND == "sqlite":
+            # The first run imports the rows already in the spreadsheet
+            _storage = SqliteStorage(DB_PATH, import_from=_storage)
+    return _storage
+
+def get_journal():
+    """The write-ahead journal in front of the storage backend (see journal.py)."""
+    global _journal
+    if _journal is None:
+        from journal import JOURNAL_SUFFIX, Journal
+        _journal = Journal(ODS_PATH + JOURNAL_SUFFIX, get_storage(), get_write_lock())
+    return _journal
+
+def get_history():
+    """The duplicate index over storage and journal (see history_index.py)."""
+    global _history
+    if _history is None:
+        from archive import read_summary
+        from history_index import INDEX_SUFFIX, HistoryIndex
+        _history = HistoryIndex(ODS_PATH + INDEX_SUFFIX, get_storage(), get_journal(),
+                                base=lambda: read_summary(ODS_PATH))
+    return _history
+
+def seen_before(row):
+    """seen_on of a stored row with the same title, episode and URL, or None."""
+    return get_history().seen_on(row)
+
+def history_ready():
+    """True if the duplicate index answers without rescanning the sheet (see HistoryIndex.ready)."""
+    return get_history().ready()
+
+def refresh_history():
+    """Bring the duplicate index up to date with storage, rebuilding it if needed."""
+    get_history().refresh()
+
+def suggest_episode(titel):
+    """The episode after the last one logged for titel ("" if none), from the in-memory index."""
+    from history_index import next_episode
+    return next_episode(get_history().last_episode(titel))
+
+def record_rows(rows):
+    """
+    Durably save rows (see make_row) to the journal; compact_journal() moves
+    them into the ODS file later.
+    """
+    get_journal().append(rows)
+    get_history().add(rows)
+
+def record_row(titel, episode, seen_on, url, more=False, cover=""):
+    """Journal one row. Columns: titel, episode, seen_on, url, more, cover"""
+    record_rows([make_row(titel, episode, seen_on, url, more, cover)])
+
+def _after_compaction(rows, stamp):
+    export_ods()
+    # The rows may come from other hosts' journal lines: merged, or the index reloaded
+    get_history().compacted(rows, stamp)
+
+def compact_journal(blocking=True, export=False):
+    """
+    Write the journaled rows of all host processes to storage; returns how
+    many there were, or None if not blocking and another process is already
+    writing (it takes these rows along). With the sqlite backend the
+    spreadsheet is then exported again; export=True exports even without rows.
+    """
+    journal = get_journal()
+    count = journal.compact(blocking, _after_compaction)
+    if export and not count:
+        with journal.write_lock:
+            export_ods()
+    return count
+
+def export_ods():
+    """
+    Regenerate ODS_PATH from the sqlite backend in one streaming pass.
+    With the ods backend the spreadsheet is the storage, there is nothing to do.
+    """
+    if STORAGE_BACKEND == "sqlite":
+        from storage import export_ods as _export_ods
+        _export_ods(get_storage(), ODS_PATH, SHEET_NAME)
+
+def archive_due():
+    """True unless today's archive run already found nothing to move (ods backend only)."""
+    if STORAGE_BACKEND != "ods":
+        return False
+    from uno_storage import open_in_calc
+    if open_in_calc(ODS_PATH):
+        return False  # rewrites the file, wait until Calc closed it
+    from archive import last_checked
+    return last_checked(ODS_PATH) != datetime.date.today().isoformat()
+
+def archive_old_rows(max_batches=None):
+    """Move rows of earlier years out of ODS_PATH into per-year archive files (see archive.py)."""
+    if STORAGE_BACKEND != "ods":
+        return 0
+    from archive import archive_old_rows as _archive_old_rows
+    return _archive_old_rows(ODS_PATH, SHEET_NAME, get_write_lock(), max_batches=max_batches,
+                             index=get_history())
 
 def read_native_message():
     """Read a message from Chrome native messaging (raw binary)."""
@@ -31,15 +166,25 @@ def read_native_message():
     if len(raw_length) < 4:
         return None
     message_length = struct.unpack('=I', raw_length)[0]
-    message = sys.stdin.buffer.read(message_length)
-    return json.loads(message.decode('utf-8'))
-
-def send_native_message(obj):
-    """Send a message to Chrome native messaging (raw binary)."""
-    response_bytes = json.dumps(obj).encode('utf-8')
-    sys.stdout.buffer.write(struct.pack('=I', len(response_bytes)))
-    sys.stdout.buffer.write(response_bytes)
-    sys.stdout.buffer.flush()
+    if message_length > MAX_MESSAGE_SIZE:
+        raise FrameTooLarge(f"frame of {message_length} bytes exceeds limit of {MAX_MESSAGE_SIZE}")
+    return decode_frame(sys.stdin.buffer.read(message_length))
+
+def send_native_message(obj, out=None):
+    """Send a message to Chrome native messaging (raw binary) on out, by default stdout."""
+    out = out or sys.stdout.buffer
+    out.write(encode_message(obj))
+    out.flush()
+
+def claim_stdout():
+    """
+    Keep stdout for native-messaging frames only: returns its binary stream
+    for send_native_message and points sys.stdout at stderr, so a stray
+    print() in a dialog or parser cannot corrupt the length-prefixed stream.
+    """
+    frames = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    return frames
 
 def log_debug(message):
     with open("debug.log", "a", encoding="utf-8") as f:
@@ -0,0 +1,162 @@
+# archive.py
+# Moves rows from earlier years out of the active sheet into one archive file per year.
+#
+# The file written on every click then only holds the recent history. The job
+# works in batches of ARCHIVE_BATCH_ROWS under the write lock; each batch is
+#   1. appended to the archive file of each year it covers, tagged with the
+#      batch id (a hash of its rows) so a rerun does not append it twice,
+#   2. added to the summary index (seen dates and last episodes of archived rows),
+#   3. removed from the active sheet in one atomic replace.
+# A job interrupted anywhere simply continues with the same batch on the next
+# run, so it can run a batch at a time whenever the host is idle. The summary
+# index lets duplicate and last-episode checks (history_index.py) see archived
+# rows without opening the archives.
+#
+#   python archive.py [--before-year 2025] [--batches N]
+
+import datetime
+import hashlib
+import json
+import os
+from history_index import normalize_text, row_key
+from ods_append import append_rows, read_user_property, remove_rows
+from ods_reader import iter_rows
+
+ARCHIVE_BATCH_ROWS = 500
+# Rows from before the current year minus ARCHIVE_KEEP_YEARS go to the archive
+ARCHIVE_KEEP_YEARS = 0
+SUMMARY_SUFFIX = ".archive-index.json"
+BATCH_PROPERTY = "BrowserToCalc archive batch"
+
+def archive_path(ods_path, year):
+    return f"{os.path.splitext(ods_path)[0]}.archive-{year}.ods"
+
+def row_year(row):
+    """Year of the seen_on column, or None if it is not a date."""
+    seen_on = row[2] if len(row) > 2 else None
+    if isinstance(seen_on, (datetime.date, datetime.datetime)):
+        return seen_on.year
+    try:
+        return datetime.datetime.strptime(str(seen_on).strip(), '%d.%m.%Y').year
+    except ValueError:
+        return None
+
+def default_cutoff():
+    return datetime.date.today().year - ARCHIVE_KEEP_YEARS
+
+def read_summary(ods_path):
+    """(seen, last) maps of the archived rows, like HistoryIndex keeps them."""
+    try:
+        with open(ods_path + SUMMARY_SUFFIX, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}, {}
+    return data.get("seen", {}), data.get("last", {})
+
+def _write_summary(ods_path, seen, last, checked):
+    tmp_path = ods_path + SUMMARY_SUFFIX + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"seen": seen, "last": last, "checked": checked}, f, ensure_ascii=False)
+    os.replace(tmp_path, ods_path + SUMMARY_SUFFIX)
+
+def last_checked(ods_path):
+    """ISO date of the last run that found nothing more to archive, or None."""
+    try:
+        with open(ods_path + SUMMARY_SUFFIX, encoding='utf-8') as f:
+            return json.load(f).get("checked")
+    except (OSError, ValueError):
+        return None
+
+def _batch_id(rows):
+    data = json.dumps(rows, default=str, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()[:16]
+
+def archive_batch(ods_path, sheet_name, cutoff_year=None, batch_rows=ARCHIVE_BATCH_ROWS, index=None):
+    """
+    Move the next batch of rows seen before cutoff_year to the archive files.
+    Call with the write lock held. Returns the number of rows moved (0: done).
+    index (a HistoryIndex over the sheet) takes on the new stamp of the sheet,
+    so the next lookup does not rebuild it.
+    If the sheet kept some of the archived rows (rows remove_rows cannot
+    parse), the run counts as done for today, so they are not archived again
+    on every idle period.
+    """
+    cutoff_year = cutoff_year or default_cutoff()
+
+    def old(row):
+        year = row_year(row)
+        return year is not None and year < cutoff_year
+
+    if not os.path.exists(ods_path):
+        return 0
+    batch = []
+    for row in iter_rows(ods_path, sheet_name):
+        if row and old(row):
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                break
+    seen, last = read_summary(ods_path)
+    if not batch:
+        _write_summary(ods_path, seen, last, datetime.date.today().isoformat())
+        return 0
+    batch_id = _batch_id(batch)
+    by_year = {}
+    for row in batch:
+        by_year.setdefault(row_year(row), []).append(row)
+    for year, rows in sorted(by_year.items()):
+        path = archive_path(ods_path, year)
+        # Already there if an earlier run stopped before removing the batch
+        if read_user_property(path, BATCH_PROPERTY) != batch_id:
+            append_rows(path, sheet_name, rows, {BATCH_PROPERTY: batch_id})
+    for row in batch:
+        seen[row_key(row)] = str(row[2])
+        episode = str(row[1]).strip() if len(row) > 1 else ""
+        if episode:
+            last[normalize_text(row[0])] = episode
+    _write_summary(ods_path, seen, last, None)
+    # Remove exactly the archived rows, whatever else matches
+    pending = {}
+    for row in batch:
+        pending[_batch_id(row)] = pending.get(_batch_id(row), 0) + 1
+
+    def archived(row):
+        key = _batch_id(row)
+        if pending.get(key):
+            pending[key] -= 1
+            return True
+        return False
+
+    stamp = index.storage.stamp() if index is not None else None
+    moved = len(remove_rows(ods_path, sheet_name, archived, limit=len(batch)))
+    if index is not None and moved:
+        index.moved_out(stamp)
+    if moved < len(batch):
+        _write_summary(ods_path, seen, last, datetime.date.today().isoformat())
+    return moved
+
+def archive_old_rows(ods_path, sheet_name, write_lock, cutoff_year=None, max_batches=None, index=None):
+    """Run batches until nothing is left (or max_batches); returns the rows moved."""
+    moved = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with write_lock:
+            count = archive_batch(ods_path, sheet_name, cutoff_year, index=index)
+        moved += count
+        batches += 1
+        if not count or last_checked(ods_path):
+            break
+    return moved
+
+def main(argv=None):
+    import argparse
+    from Functions import ODS_PATH, SHEET_NAME, get_write_lock
+    parser = argparse.ArgumentParser(description="Move rows of earlier years to per-year archive files")
+    parser.add_argument("--before-year", type=int, default=None,
+                        help=f"archive rows seen before this year (default: {default_cutoff()})")
+    parser.add_argument("--batches", type=int, default=None, help="stop after this many batches")
+    args = parser.parse_args(argv)
+    moved = archive_old_rows(ODS_PATH, SHEET_NAME, get_write_lock(), args.before_year, args.batches)
+    print(f"{moved} rows archived")
+
+if __name__ == "__main__":
+    main()
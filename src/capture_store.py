@@ -0,0 +1,134 @@
+# capture_store.py
+# Opt-in store of the pages the site parsers fetched, for offline replay.
+#
+# Off by default. With CAPTURE_SAMPLE_RATE above 0, that share of parsed pages
+# is kept: the body as read (a prefix when the scan stopped early) and a JSON
+# header with site, URL and time, gzipped in one file named after the SHA-256
+# of the body, so the same page is only stored once. The click only hands the
+# body to a queue; a background thread compresses and writes it, and drops the
+# oldest captures past CAPTURE_MAX_BYTES. When the queue is full the capture
+# is dropped rather than waited for.
+#
+# automation/replay_captures.py runs the current parsers over every capture
+# through a session that answers from the store.
+
+import gzip
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+from disk_cache import cache_dir, evict_lru
+
+CAPTURE_DIR = cache_dir("captures")
+# Share of parsed pages to keep: 0 disables capturing, 1.0 keeps every page
+CAPTURE_SAMPLE_RATE = 0.0
+CAPTURE_MAX_BYTES = 32 * 1024 * 1024
+# Captures waiting for the writer before new ones are dropped
+CAPTURE_QUEUE_SIZE = 8
+
+_SUFFIX = ".capture.gz"
+
+class CaptureStore:
+    """Sampled, size-bounded capture directory with a background writer."""
+    def __init__(self, directory=None, sample_rate=None, max_bytes=None):
+        self.directory = directory or CAPTURE_DIR
+        self.sample_rate = CAPTURE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.max_bytes = max_bytes or CAPTURE_MAX_BYTES
+        self.stats = {"offered": 0, "queued": 0, "dropped": 0, "stored": 0, "duplicates": 0, "evictions": 0}
+        self._queue = queue.Queue(CAPTURE_QUEUE_SIZE)
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def offer(self, site, url, body, complete=True):
+        """Queue body for storing if it is sampled; returns whether it was queued."""
+        self.stats["offered"] += 1
+        if not body or random.random() >= self.sample_rate:
+            return False
+        meta = {"site": site, "url": url, "captured": time.time(), "complete": complete}
+        try:
+            self._queue.put_nowait((meta, bytes(body)))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["queued"] += 1
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="capture-writer", daemon=True)
+                self._writer.start()
+        return True
+
+    def flush(self):
+        """Wait until every queued capture is written."""
+        self._queue.join()
+
+    def _write_loop(self):
+        while True:
+            meta, body = self._queue.get()
+            try:
+                self.store(meta, body)
+            except OSError:
+                self.stats["dropped"] += 1
+            finally:
+                self._queue.task_done()
+
+    def store(self, meta, body):
+        """Write one capture now; returns its path."""
+        path = os.path.join(self.directory, hashlib.sha256(body).hexdigest() + _SUFFIX)
+        if os.path.exists(path):
+            os.utime(path)
+            self.stats["duplicates"] += 1
+            return path
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f, gzip.GzipFile(filename="", mode="wb", fileobj=f, mtime=0) as out:
+            out.write(json.dumps(meta).encode("utf-8") + b"\n")
+            out.write(body)
+        os.replace(tmp_path, path)
+        self.stats["stored"] += 1
+        self._evict()
+        return path
+
+    def captures(self):
+        """(path, meta, body) of every stored capture, oldest first."""
+        for path in sorted(self._paths(), key=lambda path: os.stat(path).st_mtime):
+            capture = load_capture(path)
+            if capture is not None:
+                yield (path,) + capture
+
+    def _paths(self):
+        try:
+            return [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                    if name.endswith(_SUFFIX)]
+        except FileNotFoundError:
+            return []
+
+    def _evict(self):
+        """Remove the oldest captures until the directory fits max_bytes."""
+        self.stats["evictions"] += evict_lru(self.directory, _SUFFIX, self.max_bytes)
+
+def load_capture(path):
+    """(meta, body) of a capture file, or None if it cannot be read."""
+    try:
+        with gzip.open(path, "rb") as f:
+            meta = json.loads(f.readline())
+            return meta, f.read()
+    except (OSError, EOFError, ValueError):
+        return None
+
+_store = None
+
+def get_store():
+    """The host's CaptureStore, created on first use."""
+    global _store
+    if _store is None:
+        _store = CaptureStore()
+    return _store
+
+def capture(site, url, body, complete=True):
+    """Offer a parsed page to the shared store; costs nothing while capturing is off."""
+    if CAPTURE_SAMPLE_RATE <= 0 and _store is None:
+        return False
+    return get_store().offer(site, url, body, complete)
@@ -0,0 +1,71 @@
+# deadline.py
+# Time budget of one entry across page fetch, extraction and poster download.
+#
+# main.py starts a Deadline per message and passes it down (site parser ->
+# http_cache -> http_client, and the dialog's poster worker). Every network wait
+# is capped by what is left of the request budget and of the current stage's
+# budget, and the streaming loops check it between chunks, so a hung mirror
+# costs at most the budget. Running out raises DeadlineExceeded, which the
+# parsers and the poster loader already treat like any failed fetch: the entry
+# goes on with the icon.png / empty-title fallback. The deadline keeps the time
+# spent per stage and the stage that ran out, for the debug log.
+
+import time
+from contextlib import contextmanager
+
+REQUEST_BUDGET_SECONDS = 6.0
+# Per-stage caps within the request budget
+STAGE_BUDGET_SECONDS = {"page": 4.0, "extract": 1.0, "poster": 3.0}
+
+class DeadlineExceeded(TimeoutError):
+    """The budget of the request or of a stage ran out; stage names which."""
+    def __init__(self, stage):
+        super().__init__(f"time budget used up in stage {stage!r}")
+        self.stage = stage
+
+class Deadline:
+    """
+    Request budget of seconds (None: unlimited) with per-stage budgets.
+    Use one per entry, from one thread at a time.
+    """
+    def __init__(self, seconds=None, budgets=None):
+        self.end = None if seconds is None else time.monotonic() + seconds
+        self.budgets = STAGE_BUDGET_SECONDS if budgets is None else budgets
+        self.spent = {}
+        self.exceeded = None
+        self._stage = None
+        self._stage_end = None
+
+    @contextmanager
+    def stage(self, name):
+        """Account the time of the block to stage name and cap it by its budget."""
+        outer = self._stage, self._stage_end
+        budget = self.budgets.get(name)
+        started = time.monotonic()
+        self._stage = name
+        self._stage_end = None if budget is None else started + budget - self.spent.get(name, 0.0)
+        try:
+            yield self
+        finally:
+            self.spent[name] = self.spent.get(name, 0.0) + time.monotonic() - started
+            self._stage, self._stage_end = outer
+
+    def remaining(self):
+        """Seconds left for the current stage, None if unlimited."""
+        ends = [end for end in (self.end, self._stage_end) if end is not None]
+        if not ends:
+            return None
+        return max(0.0, min(ends) - time.monotonic())
+
+    def check(self):
+        """Raise DeadlineExceeded if no time is left."""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            self.exceeded = self._stage or "request"
+            raise DeadlineExceeded(self.exceeded)
+        return remaining
+
+    def report(self):
+        """One line for the debug log: ms per stage and the stage that ran out."""
+        spent = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.spent.items())
+        return f"{spent or 'nothing spent'}" + (f"; budget used up in {self.exceeded}" if self.exceeded else "")
@@ -0,0 +1,47 @@
+# disk_cache.py
+# Shared pieces of the on-disk caches (http_cache, thumb_cache, capture_store).
+#
+# Each cache is a directory under one per-user base directory (%LOCALAPPDATA%
+# on Windows, ~/.cache elsewhere) holding one file per entry. Reading an entry
+# touches its file, so the modification time is the last use, and past a size
+# limit the least recently used files are removed.
+
+import os
+
+BASE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", ".cache")),
+                        "BrowserToCalc")
+
+def cache_dir(name):
+    """Directory of the cache called name under the per-user base directory."""
+    return os.path.join(BASE_DIR, name)
+
+def evict_lru(directory, suffix, max_bytes):
+    """
+    Remove the least recently used files ending in suffix until they fit
+    max_bytes; returns how many were removed.
+    """
+    entries = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        if not name.endswith(suffix):
+            continue
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,81 @@
+# extract_engine.py
+# Extraction of named values from a page in one pass, fed as it downloads.
+#
+# A site's rules (name -> bytes pattern with one group "value") are compiled
+# once. A Scan is fed the body chunk by chunk (see HttpCache.scan), searches
+# each chunk for the rules still open, keeps the first match of each rule and
+# says when it has what it needs, so the rest of the page is never downloaded
+# or decoded. Only the last OVERLAP bytes are searched again with the next
+# chunk: a match may span chunks, and scanning stays linear in the bytes read.
+# Values are matched as bytes and decoded only when asked for, with the page's
+# charset where the fetcher knows it (Scan.encoding), else as UTF-8.
+#
+# The rules are searched one by one rather than as one alternation: every rule
+# starts with a literal, which CPython's regex engine skips to at memchr speed,
+# while an alternation of them is tried at every byte (100x slower on the
+# captured Netflix page, see automation/bench_extract.py). Rules must keep
+# their quantifiers bounded ({0,n}, negated classes): no match is then longer
+# than OVERLAP, and no rule backtracks across the whole page.
+
+import re
+
+# Longest match a rule may produce; bounds what is searched twice
+OVERLAP = 12 * 1024
+
+class Extractor:
+    """
+    Compiled rules of one site. done(found) tells a Scan when to stop, by
+    default once every rule matched.
+    """
+    def __init__(self, rules, done=None):
+        self.rules = {}
+        for name, pattern in rules.items():
+            compiled = re.compile(pattern)
+            if compiled.groups != 1 or "value" not in compiled.groupindex:
+                raise ValueError(f"rule {name!r} needs exactly one group, named 'value'")
+            self.rules[name] = compiled
+        self.done = done or (lambda found: len(found) == len(self.rules))
+
+    def scan(self, encoding=None):
+        return Scan(self, encoding)
+
+    def extract(self, data, encoding=None):
+        """Values found in data (a whole page), as text."""
+        scan = self.scan(encoding)
+        scan.feed(data)
+        return {name: scan.value(name) for name in scan.found}
+
+class Scan:
+    """
+    Incremental scan of one page with an Extractor. encoding is the page's
+    charset, for value(); HttpCache.scan sets it from the Content-Type.
+    """
+    def __init__(self, extractor, encoding=None):
+        self.extractor = extractor
+        self.encoding = encoding
+        self.reset()
+
+    def reset(self):
+        self.found = {}
+        self._buffer = b""
+
+    def feed(self, chunk):
+        """Scan the next chunk of the body; True once the rest is not needed."""
+        self._buffer = self._buffer[-OVERLAP:] + chunk
+        for name, pattern in self.extractor.rules.items():
+            if name not in self.found:
+                match = pattern.search(self._buffer)
+                if match:
+                    self.found[name] = match.group("value")
+        return self.extractor.done(self.found)
+
+    def value(self, name):
+        """The value found for name as text, or None."""
+        value = self.found.get(name)
+        if value is None:
+            return None
+        try:
+            return value.decode(self.encoding or "utf-8", "replace")
+        except LookupError:
+            # A charset Python does not know
+            return value.decode("utf-8", "replace")
@@ -1,9 +1,18 @@
 from PyQt6.QtWidgets import (
     QApplication, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QFrame
 )
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QFont, QColor, QPainter, QBrush, QPixmap
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QFont, QColor, QPainter, QBrush, QImage, QPixmap
 import os
+import threading
+import time
+import urllib.parse
+from deadline import REQUEST_BUDGET_SECONDS, Deadline
+from Functions import log_debug
+from thumb_cache import THUMB_HEIGHT, cached_thumbnail, store_thumbnail
+
+# Shown until the poster is loaded
+PLACEHOLDER_IMAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'icon.png')
 
 class ToggleImageWidget(QLabel):    
     def __init__(self, parent=None):
@@ -11,19 +20,16 @@ class ToggleImageWidget(QLabel):
         # Fix path to point to the correct assets directory
         assets_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets')
         
-        # Debug: print the assets directory path
-        print(f"Assets directory: {assets_dir}")
+        log_debug(f"Assets directory: {assets_dir}")
         
         unchecked_path = os.path.join(assets_dir, 'checkbox_unchecked.png')
         unchecked_hover_path = os.path.join(assets_dir, 'checkbox_unchecked_hover.png')
         checked_path = os.path.join(assets_dir, 'checkbox_checked.png')
         checked_hover_path = os.path.join(assets_dir, 'checkbox_checked_hover.png')
         
-        # Debug: Check if files exist
-        print(f"Unchecked exists: {os.path.exists(unchecked_path)}")
-        print(f"Unchecked hover exists: {os.path.exists(unchecked_hover_path)}")
-        print(f"Checked exists: {os.path.exists(checked_path)}")
-        print(f"Checked hover exists: {os.path.exists(checked_hover_path)}")
+        for path in (unchecked_path, unchecked_hover_path, checked_path, checked_hover_path):
+            if not os.path.exists(path):
+                log_debug(f"Checkbox icon missing: {path}")
         
         self.icon_unchecked = QPixmap(unchecked_path)
         self.icon_unchecked_hover = QPixmap(unchecked_hover_path)
@@ -82,57 +88,70 @@ class ToggleImageWidget(QLabel):
             super().keyPressEvent(event)
 
 
-def inputbox(prompt, title="Eingabe", default_long_text="", image_url=None):
+class RoundedDialog(QDialog):
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        rect = self.rect()
+        color = QColor("#192a56")
+        painter.setBrush(QBrush(color))
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.drawRoundedRect(rect, 24, 24)
+        super().paintEvent(event)
+
+
+class EntryDialog(RoundedDialog):
     """
-    Show a custom PyQt6 dialog for user input with a text field, a 5-char field, and a custom toggle widget.
-    Returns: (titel, episode, more)
+    Entry form built once and reused for every inputbox() call.
+    reset() only refreshes the per-entry state; show_ms holds the time from
+    the last reset() until the dialog was on screen. Slow parts (page parse,
+    poster download) run in a worker thread, see load_async().
     """
-    app = QApplication.instance()
-    app_created = False
-    if not app:
-        app = QApplication([])
-        app_created = True
+    # (reset generation, updates) from the worker thread
+    loaded = pyqtSignal(int, dict)
 
-    class RoundedDialog(QDialog):
-        def paintEvent(self, event):
-            painter = QPainter(self)
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-            rect = self.rect()
-            color = QColor("#192a56")
-            painter.setBrush(QBrush(color))
-            painter.setPen(Qt.PenStyle.NoPen)
-            painter.drawRoundedRect(rect, 24, 24)
-            super().paintEvent(event)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.show_ms = None
+        self._reset_started = None
+        self._generation = 0
+        self._defaults = ("", "")
+        self._suggest = None
+        self.loading = None
+        self.loaded.connect(self._apply_loaded)
+        # Use .ui file if it exists, otherwise use hardcoded layout
+        ui_path = os.path.join(os.path.dirname(__file__), 'form_dialog.ui')
+        if os.path.exists(ui_path):
+            self._build_from_ui(ui_path)
+        else:
+            self._build()
 
-    # Use .ui file if it exists, otherwise use hardcoded layout
-    import os
-    ui_path = os.path.join(os.path.dirname(__file__), 'form_dialog.ui')
-    if os.path.exists(ui_path):
+    def _build_from_ui(self, ui_path):
         from PyQt6 import uic
-        dialog = QDialog()
-        uic.loadUi(ui_path, dialog)
+        uic.loadUi(ui_path, self)
+        self.rounded = False
         # Get widgets by name for later use
-        title_label = dialog.findChild(QLabel, 'title_label')
-        image_label = dialog.findChild(QLabel, 'image_label')
-        titel_edit = dialog.findChild(QLineEdit, 'titel_edit')
-        episode_edit = dialog.findChild(QLineEdit, 'episode_edit')
-        ok_button = dialog.findChild(QPushButton, 'ok_button')
+        self.title_label = self.findChild(QLabel, 'title_label')
+        self.image_label = self.findChild(QLabel, 'image_label')
+        self.titel_edit = self.findChild(QLineEdit, 'titel_edit')
+        self.episode_edit = self.findChild(QLineEdit, 'episode_edit')
+        self.ok_button = self.findChild(QPushButton, 'ok_button')
         # Replace more_toggle QLabel with ToggleImageWidget
-        from PyQt6.QtWidgets import QLayout
-        more_toggle_label = dialog.findChild(QLabel, 'more_toggle')
+        more_toggle_label = self.findChild(QLabel, 'more_toggle')
+        self.more_toggle = ToggleImageWidget()
+        self.more_toggle.setFixedSize(64, 64)
         if more_toggle_label:
             parent_layout = more_toggle_label.parentWidget().layout()
             idx = parent_layout.indexOf(more_toggle_label)
             parent_layout.removeWidget(more_toggle_label)
             more_toggle_label.deleteLater()
-            more_toggle = ToggleImageWidget()
-            more_toggle.setFixedSize(64, 64)
-            parent_layout.insertWidget(idx, more_toggle)
-    else:
-        dialog = RoundedDialog()
-        dialog.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint)
-        dialog.setFixedSize(400,525)
-        dialog.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+            parent_layout.insertWidget(idx, self.more_toggle)
+
+    def _build(self):
+        self.rounded = True
+        self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint)
+        self.setFixedSize(400,525)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
 
         darkblue = "#192a56"
         accent = "#233e70"
@@ -151,35 +170,32 @@ def inputbox(prompt, title="Eingabe", default_long_text="", image_url=None):
             QPushButton {{ background: {accent}; border: 2px solid {bordercolor}; border-radius: 8px; padding: 8px 24px; font-weight: bold; }}
             QPushButton:hover {{ background: {bordercolor}; color: {darkblue}; }}
         """
-        dialog.setStyleSheet(style)
+        self.setStyleSheet(style)
 
         font = QFont('Segoe UI', 24)
-        dialog.setFont(font)
-        for widget in dialog.findChildren((QLabel, QLineEdit, QPushButton)):
-            widget.setFont(font)
+        self.setFont(font)
 
         layout = QVBoxLayout()
         layout.setSpacing(20)
         layout.setContentsMargins(10, 15, 10, 15)
-        dialog.setLayout(layout)
-
-        title_label = QLabel(prompt)
-        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        title_label.setFont(font)
-        layout.addWidget(title_label)
-        image_label = QLabel()
-        image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        image_label.setFixedSize(160, 160)
-        image_label.hide()
-        layout.addWidget(image_label, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self.setLayout(layout)
+
+        self.title_label = QLabel()
+        self.title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.title_label.setFont(font)
+        layout.addWidget(self.title_label)
+        self.image_label = QLabel()
+        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.image_label.setFixedSize(160, 160)
+        self.image_label.hide()
+        layout.addWidget(self.image_label, alignment=Qt.AlignmentFlag.AlignHCenter)
         layout.addSpacing(25)  # 25px vertical space after image
 
-        titel_edit = QLineEdit()
-        titel_edit.setPlaceholderText("Titel...")
-        titel_edit.setFont(font)
-        titel_edit.setFixedHeight(64)
-        titel_edit.setText(default_long_text)
-        layout.addWidget(titel_edit)
+        self.titel_edit = QLineEdit()
+        self.titel_edit.setPlaceholderText("Titel...")
+        self.titel_edit.setFont(font)
+        self.titel_edit.setFixedHeight(64)
+        layout.addWidget(self.titel_edit)
 
         layout.addStretch()
 
@@ -193,17 +209,17 @@ def inputbox(prompt, title="Eingabe", default_long_text="", image_url=None):
         input_layout = QHBoxLayout()
         input_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         input_layout.addStretch(1)
-        episode_edit = QLineEdit()
-        episode_edit.setMaxLength(5)
-        episode_edit.setFixedWidth(120)
-        episode_edit.setFixedHeight(64)
-        episode_edit.setFont(font)
-        episode_edit.setPlaceholderText("Episode...")
-        input_layout.addWidget(episode_edit)
+        self.episode_edit = QLineEdit()
+        self.episode_edit.setMaxLength(5)
+        self.episode_edit.setFixedWidth(120)
+        self.episode_edit.setFixedHeight(64)
+        self.episode_edit.setFont(font)
+        self.episode_edit.setPlaceholderText("Episode...")
+        input_layout.addWidget(self.episode_edit)
         input_layout.addSpacing(32)
-        more_toggle = ToggleImageWidget()
-        more_toggle.setFixedSize(64, 64)
-        input_layout.addWidget(more_toggle)
+        self.more_toggle = ToggleImageWidget()
+        self.more_toggle.setFixedSize(64, 64)
+        input_layout.addWidget(self.more_toggle)
         input_layout.addStretch(1)
 
         form_layout.addLayout(input_layout)
@@ -212,60 +228,206 @@ def inputbox(prompt, title="Eingabe", default_long_text="", image_url=None):
 
         button_layout = QHBoxLayout()
         button_layout.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        ok_button = QPushButton("OK")
-        ok_button.setFont(font)
-        ok_button.setFixedHeight(72)
-        ok_button.setFixedWidth(220)
-        button_layout.addWidget(ok_button)
+        self.ok_button = QPushButton("OK")
+        self.ok_button.setFont(font)
+        self.ok_button.setFixedHeight(72)
+        self.ok_button.setFixedWidth(220)
+        button_layout.addWidget(self.ok_button)
         layout.addLayout(button_layout)
-        ok_button.clicked.connect(dialog.accept)
+        self.ok_button.clicked.connect(self.accept)
 
-    # Show image if image_url is provided (for fsmirror/netflix or local fallback)
-    from PyQt6.QtGui import QPixmap
-    import urllib.parse
-    if image_url:
+    def paintEvent(self, event):
+        if self.rounded:
+            super().paintEvent(event)
+        else:
+            QDialog.paintEvent(self, event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._reset_started is not None:
+            self.show_ms = (time.perf_counter() - self._reset_started) * 1000
+            self._reset_started = None
+
+    def reset(self, prompt, default_long_text="", image_url=None, default_episode="", load=None, deadline=None,
+              suggest=None):
+        """
+        Prepare the dialog for a new entry without rebuilding any widgets.
+        A remote image_url not yet in the thumbnail cache, and load (see
+        load_async), are fetched while the dialog shows PLACEHOLDER_IMAGE.
+        suggest(titel) gives the episode for a title load() found (None: no
+        suggestion); it runs on the GUI thread, as it reads the history.
+        """
+        self._reset_started = time.perf_counter()
+        self.show_ms = None
+        if self.title_label:
+            self.title_label.setText(prompt)
+        self.titel_edit.setText(default_long_text)
+        self.episode_edit.setText(default_episode)
+        # A suggested episode is selected, typing replaces it
+        self.episode_edit.selectAll()
+        self.more_toggle.checked = False
+        self.more_toggle.update_pixmap()
+        self._defaults = (default_long_text, default_episode)
+        self._suggest = suggest
+        remote = bool(image_url) and urllib.parse.urlparse(image_url).scheme in ("http", "https")
+        if remote:
+            # Read the cached thumbnail now: it may be evicted before set_image,
+            # which must not download on the GUI thread
+            path = cached_thumbnail(image_url)
+            thumbnail = QImage(path) if path else None
+            if thumbnail is not None and not thumbnail.isNull():
+                image_url, remote = thumbnail, False
+        if remote or load is not None:
+            self.set_image(PLACEHOLDER_IMAGE if remote else image_url or PLACEHOLDER_IMAGE)
+            self.load_async(load, image_url if remote else None, deadline)
+        else:
+            self._generation += 1
+            self.set_image(image_url)
+        if default_long_text == "Fill":
+            self.titel_edit.setFocus()
+        else:
+            self.episode_edit.setFocus()
+
+    def set_image(self, image_url):
+        """
+        Show image_url (a loaded QImage, local file or http/https) scaled to
+        160px, or hide the image. Remote posters are kept pre-scaled in the
+        thumbnail cache (thumb_cache.py).
+        """
+        self.image_label.clear()
+        self.image_label.hide()
+        if not image_url:
+            return
         try:
             pixmap = None
+            if isinstance(image_url, QImage):
+                pixmap = QPixmap.fromImage(image_url)
             # Check if image_url is a local file and exists
-            if os.path.isfile(image_url):
+            elif os.path.isfile(image_url):
                 pixmap = QPixmap(image_url)
-                # Always scale to 160px height for all local images
-                if pixmap and not pixmap.isNull():
-                    image_label.setPixmap(pixmap.scaledToHeight(160, Qt.TransformationMode.SmoothTransformation))
-                    image_label.show()
-                else:
-                    image_label.hide()
             # If not a local file, try to load from URL
             elif urllib.parse.urlparse(image_url).scheme in ("http", "https"):
-                from urllib.request import urlopen
-                img_data = urlopen(image_url).read()
-                pixmap = QPixmap()
-                pixmap.loadFromData(img_data)
-                # Always scale to 160px height for all remote images
-                if pixmap and not pixmap.isNull():
-                    image_label.setPixmap(pixmap.scaledToHeight(160, Qt.TransformationMode.SmoothTransformation))
-                    image_label.show()
+                path = fetch_thumbnail(image_url)
+                pixmap = QPixmap(path) if path else None
+            # Always scale to 160px height for all images (cached thumbnails already are)
+            if pixmap and not pixmap.isNull():
+                if pixmap.height() != THUMB_HEIGHT:
+                    pixmap = pixmap.scaledToHeight(THUMB_HEIGHT, Qt.TransformationMode.SmoothTransformation)
+                self.image_label.setPixmap(pixmap)
+                self.image_label.show()
         except Exception as e:
-            print(f"Could not load image: {e}")
+            log_debug(f"Could not load image: {e}")
+
+    def load_async(self, load=None, image_url=None, deadline=None):
+        """
+        Run load() (returns a dict with any of "titel", "episode", "image_url")
+        and download the poster in a worker thread while the dialog is shown.
+        The results replace the title and episode only if the user has not
+        edited them yet. The poster download is stage "poster" of deadline
+        (see deadline.py); without a poster in time the placeholder stays.
+        """
+        self._generation += 1
+        generation = self._generation
+        deadline = deadline or Deadline(REQUEST_BUDGET_SECONDS)
+
+        def work():
+            updates = {"image_url": image_url} if image_url else {}
+            if load is not None:
+                try:
+                    updates.update(load() or {})
+                except Exception as e:
+                    log_debug(f"Could not load page: {e}")
+            remote = updates.get("image_url")
+            if remote and urllib.parse.urlparse(remote).scheme in ("http", "https"):
+                try:
+                    with deadline.stage("poster"):
+                        updates["image_url"] = fetch_thumbnail(remote, deadline)
+                except Exception as e:
+                    log_debug(f"Could not load image: {e}")
+                    del updates["image_url"]
+            self.loaded.emit(generation, updates)
+
+        self.loading = threading.Thread(target=work, daemon=True)
+        self.loading.start()
+
+    def _apply_loaded(self, generation, updates):
+        if generation != self._generation:
+            return  # for an earlier entry
+        if updates.get("titel") and self.titel_edit.text() == self._defaults[0]:
+            self.titel_edit.setText(updates["titel"])
+            if "episode" not in updates and self._suggest is not None:
+                episode = self._suggest(updates["titel"])
+                if episode is not None:
+                    updates["episode"] = episode
+        if "episode" in updates and self.episode_edit.text() == self._defaults[1]:
+            self.episode_edit.setText(updates["episode"])
+            self.episode_edit.selectAll()
+        if updates.get("image_url"):
+            self.set_image(updates["image_url"])
+
+
+def fetch_thumbnail(image_url, deadline=None):
+    """
+    Path of the 160px thumbnail of image_url, downloaded into the thumbnail
+    cache first if needed; None if it is not an image. Uses QImage, so it
+    also runs outside the GUI thread.
+    """
+    path = cached_thumbnail(image_url)
+    if path:
+        return path
+    # Same pooled connections as the page parsers
+    from http_client import fetch_bytes
+    image = QImage.fromData(fetch_bytes(image_url, deadline=deadline))
+    if image.isNull():
+        return None
+    return store_thumbnail(image_url, image.scaledToHeight(THUMB_HEIGHT, Qt.TransformationMode.SmoothTransformation))
+
+
+_entry_dialog = None
+
+def get_entry_dialog():
+    """Return the shared EntryDialog, building it on first use."""
+    global _entry_dialog
+    if _entry_dialog is None:
+        _entry_dialog = EntryDialog()
+    return _entry_dialog
+
+
+def inputbox(prompt, title="Eingabe", default_long_text="", image_url=None, default_episode="", load=None,
+             deadline=None, suggest=None):
+    """
+    Show a custom PyQt6 dialog for user input with a text field, a 5-char field, and a custom toggle widget.
+    default_episode pre-fills the 5-char field. load() runs in a worker thread while
+    the dialog is shown, within deadline, see EntryDialog.load_async(); suggest fills
+    in the episode for the title it finds, see EntryDialog.reset().
+    The dialog is built once and reused; see get_entry_dialog().show_ms for the time to show it.
+    Returns: (titel, episode, more)
+    """
+    app = QApplication.instance()
+    app_created = False
+    if not app:
+        app = QApplication([])
+        app_created = True
+
+    dialog = get_entry_dialog()
+    dialog.reset(prompt, default_long_text, image_url, default_episode, load, deadline, suggest)
 
     screen = app.primaryScreen().geometry()
     dialog.move((screen.width() - dialog.width()) // 2, (screen.height() - dialog.height()) // 2)
 
-    if default_long_text == "Fill":
-        titel_edit.setFocus()
-    else:
-        episode_edit.setFocus()
-
     titel_result = ""
     episode_result = ""
     more_result = False
     if dialog.exec() == QDialog.DialogCode.Accepted:
-        episode_result = episode_edit.text().strip()
-        more_result = more_toggle.checked
-        titel_result = titel_edit.text().strip()
+        episode_result = dialog.episode_edit.text().strip()
+        more_result = dialog.more_toggle.checked
+        titel_result = dialog.titel_edit.text().strip()
 
-    dialog.deleteLater()
     if app_created:
+        # The dialog belongs to this temporary app, drop it with the app
+        global _entry_dialog
+        _entry_dialog = None
+        dialog.deleteLater()
         QTimer.singleShot(0, app.quit)
     return titel_result, episode_result, more_result
 if __name__ == "__main__":
@@ -1,31 +1,50 @@
 # fsmirror.py
 # Extracts DVD poster image and title from FSMirror page URL
 
-import requests
-import re
 import sys
+from capture_store import capture
+from deadline import DeadlineExceeded
+from extract_engine import Extractor
+from Functions import log_debug
+from http_cache import cached_scan
 
-def parse_fsmirror_url(url):
+def _found_enough(found):
+    return "title" in found and "poster" in found
+
+# One scan while the page downloads (extract_engine.py); reading stops once the
+# title and the DVD poster are found. The background image is only a fallback.
+EXTRACTOR = Extractor({
+    "title": rb'(?i:<title>)(?P<value>[^<]{0,1000})(?i:</title>)',
+    # The first <img> within the dvd-container's next 4000 bytes
+    "poster": rb'<div class="dvd-container"[^>]{0,1000}onclick="showDvdPoster\(\)"[^>]{0,1000}>'
+              rb'(?:[^<]|<(?!img\b)){0,4000}<img[^>]{0,1000}src=["\'](?P<value>[^"\']{1,2000})["\']',
+    "background": rb'background-image:\s{0,20}url\(["\'](?P<value>[^"\']{1,2000})["\']\)',
+}, _found_enough)
+
+def parse_fsmirror_url(url, session=None, deadline=None):
     """
     Fetch the FSMirror page and extract the DVD poster image URL and title.
+    Goes through the page cache (http_cache) and the shared pooled session
+    (http_client) unless session is given, and stops reading once both are found.
+    Gives up with what it has when deadline (deadline.py) runs out.
     Returns (title, image_url) or (None, None) on failure.
     """
     try:
-        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'})
-        html = response.text
-        # Try to extract the title (from <title> or a specific element if needed)
-        title_match = re.search(r'<title>(.*?)</title>', html, re.IGNORECASE | re.DOTALL)
-        title = title_match.group(1).strip() if title_match else ''
-        # Try to extract the DVD poster image from the dvd-container
-        img_match = re.search(r'<div class="dvd-container"[^>]*onclick="showDvdPoster\(\)"[^>]*>.*?<img[^>]*src=["\']([^"\']+)["\']', html, re.DOTALL)
-        image_url = img_match.group(1) if img_match else None
-        # Fallback: try to extract from background-image CSS
-        if not image_url:
-            bg_match = re.search(r'background-image:\s*url\(["\']([^"\']+)["\']\)', html)
-            image_url = bg_match.group(1) if bg_match else None
+        scanner = EXTRACTOR.scan()
+        try:
+            response = cached_scan(url, scanner, session=session, deadline=deadline,
+                                   headers={'User-Agent': 'Mozilla/5.0'})
+            # Opt-in sample of the page as read, for offline replay (capture_store.py)
+            capture("fsmirror", url, response.content, complete=not EXTRACTOR.done(scanner.found))
+        except DeadlineExceeded as e:
+            # Out of time: go on with whatever the scan found so far
+            log_debug(f"Stopped fetching FSMirror URL: {e}")
+        title = (scanner.value("title") or '').strip()
+        # The DVD poster from the dvd-container, else the background-image CSS
+        image_url = scanner.value("poster") or scanner.value("background")
         return title, image_url
     except Exception as e:
-        print(f"Error parsing FSMirror URL: {e}")
+        log_debug(f"Error parsing FSMirror URL: {e}")
         return None, None
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+# history_index.py
+# Which entries are already stored, for duplicate detection without scanning the sheet.
+#
+# Rows are keyed on their normalized title, episode and URL (tracking parameters
+# removed), mapped to the date they were seen; a second map holds the last
+# episode logged per title to pre-fill the next one. The index is kept in memory and
+# saved as a JSON sidecar next to the spreadsheet together with the storage
+# stamp (the ODS file's mtime and size). A sidecar whose stamp no longer matches,
+# because Calc or another program changed the file, is rebuilt from storage.
+# Rows still in the journal are added on load, so the sidecar only needs saving
+# after a compaction, not on every entry.
+#
+# A resident host compares the stamp on every lookup: when another host compacted
+# or the sheet was edited in Calc, the maps are loaded again (from that host's
+# sidecar, else rebuilt). After its own compaction a host merges the written rows
+# only if the storage was unchanged since its maps were loaded, and otherwise
+# reloads, so the sidecar never pairs a current stamp with stale maps. Archiving
+# (archive.py) moves rows from storage into the base maps: that changes the
+# stamp but not what the maps hold, so the index only takes on the new stamp.
+# A rebuild from the whole sheet takes seconds on a long history; ready() says
+# whether one is due, so the host can skip the pre-fill and rebuild when idle.
+
+import json
+import os
+import re
+import urllib.parse
+
+INDEX_SUFFIX = ".index.json"
+INDEX_VERSION = 2
+
+# Query parameters that change per click but not per page
+TRACKING_PARAMS = {"trackId", "tctx", "t", "fbclid", "gclid"}
+
+def normalize_url(url):
+    """Canonical form of url: lowercase host, no fragment, no tracking parameters."""
+    if not url:
+        return ""
+    parts = urllib.parse.urlsplit(url.strip())
+    query = sorted((key, value) for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+                   if key not in TRACKING_PARAMS and not key.startswith("utm_"))
+    path = parts.path.rstrip('/') or '/'
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path,
+                                    urllib.parse.urlencode(query), ''))
+
+def normalize_text(text):
+    return re.sub(r'\s+', ' ', str(text)).strip().casefold()
+
+def next_episode(episode):
+    """The episode after episode: its last number counted up ("S1E9" -> "S1E10"), or ""."""
+    episode = str(episode or "")
+    matches = list(re.finditer(r'\d+', episode))
+    if not matches:
+        return ""
+    last = matches[-1]
+    number = str(int(last.group()) + 1).zfill(len(last.group()))
+    return episode[:last.start()] + number + episode[last.end():]
+
+def row_key(row):
+    """Index key of a sheet row (see Functions.make_row)."""
+    row = list(row) + [""] * 4
+    return "\x1f".join((normalize_text(row[0]), normalize_text(row[1]), normalize_url(str(row[3]))))
+
+class HistoryIndex:
+    """
+    Duplicate and last-episode index over storage (see storage.py) plus the
+    rows pending in journal. Loaded on first use and again whenever the storage
+    stamp changed, otherwise lookups are dict gets. base() returns (seen, last)
+    maps of older rows kept elsewhere (the archive summary, see archive.py); a
+    rebuild starts from them.
+    """
+    def __init__(self, path, storage, journal=None, base=None):
+        self.path = path
+        self.storage = storage
+        self.journal = journal
+        self.base = base
+        self._seen = None
+        self._last = None
+        # Storage stamp the maps were loaded for
+        self._stamp = None
+
+    def seen_on(self, row):
+        """The seen_on of an earlier row with the same key, or None."""
+        return self._load().get(row_key(row))
+
+    def last_episode(self, titel):
+        """
+        Episode of the last row logged for titel, or None. Like seen_on, this
+        loads the maps again when the storage stamp changed since they were loaded.
+        """
+        self._load()
+        return self._last.get(normalize_text(titel))
+
+    def add(self, rows):
+        seen = self._load()
+        for row in rows:
+            seen[row_key(row)] = str(row[2]) if len(row) > 2 else ""
+            episode = str(row[1]).strip() if len(row) > 1 else ""
+            if episode:
+                self._last[normalize_text(row[0])] = episode
+
+    def refresh(self):
+        """Load the maps again now if the storage stamp changed."""
+        self._load()
+
+    def ready(self):
+        """True if lookups are answered without reading the whole storage first."""
+        stamp = self.storage.stamp()
+        if self._seen is not None and stamp == self._stamp:
+            return True
+        if self._read_sidecar(stamp) is None:
+            return False
+        self._load()
+        return True
+
+    def moved_out(self, stamp):
+        """
+        Rows were moved from storage to the base maps (archive.py), whose stamp
+        was stamp before. The maps already hold them, so only the stamp changes
+        and the sidecar is saved; if the maps were not for stamp they are loaded
+        again now. Call with the write lock held.
+        """
+        if self._seen is not None and stamp == self._stamp:
+            self._stamp = self.storage.stamp()
+            self.save()
+        else:
+            self._seen = None
+            self._load()
+
+    def compacted(self, rows, stamp):
+        """
+        rows were just written to storage, whose stamp was stamp before; merge
+        them and save the sidecar. Call with the write lock held.
+        """
+        if self._seen is not None and stamp == self._stamp:
+            self._stamp = self.storage.stamp()
+            self.add(rows)
+        else:
+            # Changed by another host or program since loaded: what is stored now
+            self._seen = None
+            self._load()
+        self.save()
+
+    def save(self):
+        """Write the sidecar for the storage state the maps were loaded for."""
+        data = {"version": INDEX_VERSION, "stamp": self._stamp, "seen": self._load(), "last": self._last}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        stamp = self.storage.stamp()
+        if self._seen is None or stamp != self._stamp:
+            data = self._read_sidecar(stamp)
+            self._stamp = stamp
+            if data:
+                self._seen, self._last = data["seen"], data["last"]
+            else:
+                self._seen, self._last = ({}, {}) if self.base is None else (dict(m) for m in self.base())
+                self.add(row for row in self.storage.rows() if row)
+                self.save()
+            if self.journal is not None:
+                for entry in self.journal.pending_entries():
+                    self.add(entry["rows"])
+        return self._seen
+
+    def _read_sidecar(self, stamp):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != INDEX_VERSION or data.get("stamp") != stamp:
+            return None
+        return data
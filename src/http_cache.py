@@ -0,0 +1,244 @@
+# http_cache.py
+# Disk cache for the pages the site parsers fetch.
+#
+# Logging several episodes of one series fetches the same page again and again.
+# Responses are stored under their canonical URL (history_index.normalize_url:
+# no fragment, no trackId and other tracking parameters), one file per URL: a
+# JSON header line followed by the body. Within its TTL (Cache-Control max-age,
+# else CACHE_TTL_SECONDS) an entry is returned without a request; after that it
+# is revalidated with If-None-Match / If-Modified-Since, and a 304 costs no body.
+# Every hit touches the file, and when the directory grows past CACHE_MAX_BYTES
+# the least recently used files are removed. stats counts hits, revalidations,
+# misses, early stops, stores and evictions for tuning.
+#
+# scan() streams the body into an extract_engine.Scan and stops downloading as
+# soon as it has found what it needs; the prefix read so far is what is cached
+# (marked incomplete, so get() does not take it for the whole page).
+
+import hashlib
+import json
+import os
+import re
+import time
+from requests import RequestException, Response
+from requests.structures import CaseInsensitiveDict
+from deadline import Deadline
+from disk_cache import cache_dir, evict_lru
+
+CACHE_DIR = cache_dir("http")
+CACHE_TTL_SECONDS = 15 * 60
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Bytes read per step while scanning a page
+SCAN_CHUNK_SIZE = 16 * 1024
+
+_SUFFIX = ".page"
+_KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+_CHARSET = re.compile(r'charset\s*=\s*["\']?([^"\';\s]+)', re.IGNORECASE)
+
+def cache_key(url):
+    from history_index import normalize_url
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+def _charset(headers):
+    """The charset named in the Content-Type of headers, or None."""
+    match = _CHARSET.search(headers.get("Content-Type", ""))
+    return match.group(1) if match else None
+
+def _max_age(headers):
+    """
+    Seconds a response may be used without revalidation: None to use the
+    cache's TTL, False if it must not be stored at all.
+    """
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control:
+        return False
+    if "no-cache" in cache_control:
+        return 0
+    max_age = re.search(r"max-age=(\d+)", cache_control)
+    return int(max_age.group(1)) if max_age else None
+
+def _response(url, meta, body):
+    response = Response()
+    response.url = url
+    response.status_code = meta["status"]
+    response.headers = CaseInsensitiveDict(meta["headers"])
+    response.encoding = meta["encoding"]
+    response._content = body
+    return response
+
+def _request(session, url, headers, deadline, stream=False):
+    """session.get within the "page" stage of deadline."""
+    from http_client import request_timeout
+    with deadline.stage("page"):
+        try:
+            return session.get(url, headers=headers, stream=stream, timeout=request_timeout(deadline))
+        except RequestException:
+            deadline.check()  # a timeout cut short by the deadline
+            raise
+
+def _read_until(response, scanner, deadline):
+    """
+    Read response until scanner is done; returns (bytes read, whether that is
+    the whole body). Stopping early closes the connection instead of draining it.
+    Reading counts as stage "page" of deadline, scanning as "extract".
+    """
+    from http_client import iter_body
+    scanner.encoding = _charset(response.headers)
+    chunks = []
+    complete = True
+    body = iter_body(response, SCAN_CHUNK_SIZE, deadline)
+    try:
+        while True:
+            with deadline.stage("page"):
+                deadline.check()
+                try:
+                    chunk = next(body, None)
+                except RequestException:
+                    deadline.check()
+                    raise
+            if chunk is None:
+                break
+            chunks.append(chunk)
+            with deadline.stage("extract"):
+                if scanner.feed(chunk):
+                    complete = False
+                    break
+                deadline.check()
+    finally:
+        response.close()
+    response._content = b"".join(chunks)
+    response._content_consumed = True
+    return response._content, complete
+
+class HttpCache:
+    """Revalidating, size-bounded cache of GET responses in directory."""
+    def __init__(self, directory=None, ttl=None, max_bytes=None):
+        self.directory = directory or CACHE_DIR
+        self.ttl = CACHE_TTL_SECONDS if ttl is None else ttl
+        self.max_bytes = max_bytes or CACHE_MAX_BYTES
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stopped_early": 0, "stores": 0, "evictions": 0}
+
+    def get(self, url, session, headers=None, deadline=None):
+        """GET url through session (see http_client), answered from the cache when possible."""
+        return self._fetch(url, session, headers, None, deadline)
+
+    def scan(self, url, session, scanner, headers=None, deadline=None):
+        """
+        Feed the body of url to scanner (see extract_engine.py) and stop reading once
+        it has what it needs. Only that prefix is cached, and answers later scans.
+        Returns the response, its content being the bytes read. Raises
+        deadline.DeadlineExceeded when deadline runs out first.
+        """
+        return self._fetch(url, session, headers, scanner, deadline)
+
+    def _fetch(self, url, session, headers, scanner=None, deadline=None):
+        deadline = deadline or Deadline()
+        path = os.path.join(self.directory, cache_key(url) + _SUFFIX)
+        meta, body = self._load(path)
+        if meta is not None and not meta.get("complete", True) and scanner is None:
+            meta = None  # a prefix cached by scan()
+        request_headers = dict(headers or {})
+        if meta is not None:
+            ttl = self.ttl if meta["max_age"] is None else meta["max_age"]
+            if time.time() < meta["stored"] + ttl:
+                if self._answers(meta, body, scanner):
+                    self.stats["hits"] += 1
+                    os.utime(path)
+                    return _response(url, meta, body)
+                meta = None
+            else:
+                if meta["headers"].get("ETag"):
+                    request_headers["If-None-Match"] = meta["headers"]["ETag"]
+                if meta["headers"].get("Last-Modified"):
+                    request_headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+        response = _request(session, url, request_headers, deadline, stream=scanner is not None)
+        if response.status_code == 304 and meta is not None:
+            response.close()
+            self.stats["revalidated"] += 1
+            meta["headers"].update((name, response.headers[name]) for name in _KEPT_HEADERS
+                                   if name in response.headers)
+            max_age = _max_age(response.headers)
+            meta["max_age"] = 0 if max_age is False else max_age
+            meta["stored"] = time.time()
+            self._store(path, meta, body)
+            if self._answers(meta, body, scanner):
+                return _response(url, meta, body)
+            # The cached prefix ends before what this scanner looks for
+            response = _request(session, url, headers, deadline, stream=True)
+        self.stats["misses"] += 1
+        complete = True
+        if scanner is not None:
+            body, complete = _read_until(response, scanner, deadline)
+            if not complete:
+                self.stats["stopped_early"] += 1
+        max_age = _max_age(response.headers)
+        if response.status_code == 200 and max_age is not False:
+            meta = {"url": url, "status": 200, "encoding": response.encoding, "complete": complete,
+                    "headers": {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers},
+                    "stored": time.time(), "max_age": max_age}
+            self._store(path, meta, response.content)
+            self.stats["stores"] += 1
+            self._evict()
+        return response
+
+    @staticmethod
+    def _answers(meta, body, scanner):
+        """True if the cached body serves this request (a scan may need more than a cached prefix)."""
+        if scanner is None:
+            return True
+        scanner.encoding = _charset(meta["headers"])
+        scanner.reset()
+        if scanner.feed(body) or meta.get("complete", True):
+            return True
+        scanner.reset()
+        return False
+
+    def clear(self):
+        for name in self._files():
+            os.remove(os.path.join(self.directory, name))
+
+    def _files(self):
+        try:
+            return [name for name in os.listdir(self.directory) if name.endswith(_SUFFIX)]
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def _store(self, path, meta, body):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(meta).encode("utf-8") + b"\n")
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def _evict(self):
+        """Remove the least recently used files until the directory fits max_bytes."""
+        self.stats["evictions"] += evict_lru(self.directory, _SUFFIX, self.max_bytes)
+
+_cache = None
+
+def get_cache():
+    """The host's HttpCache, created on first use."""
+    global _cache
+    if _cache is None:
+        _cache = HttpCache()
+    return _cache
+
+def cached_get(url, headers=None, session=None, deadline=None):
+    """GET url through the shared session and cache."""
+    from http_client import get_session
+    return get_cache().get(url, session or get_session(), headers, deadline)
+
+def cached_scan(url, scanner, headers=None, session=None, deadline=None):
+    """Scan url through the shared session and cache, reading only as much as scanner needs."""
+    from http_client import get_session
+    return get_cache().scan(url, session or get_session(), scanner, headers, deadline)
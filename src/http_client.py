@@ -0,0 +1,96 @@
+# http_client.py
+# One HTTP session for the whole host: page parsers and poster downloads.
+#
+# A resident host (see main.py) handles many clicks, so keeping connections
+# alive saves a DNS lookup, TCP connect and TLS handshake per request to the
+# Netflix, FSMirror and image hosts. Connections are pooled per host, and every
+# request gets a connect and read timeout unless the caller passes its own, so a
+# slow site can not hang the dialog. With a deadline (deadline.py) the timeouts
+# shrink to what is left of it.
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) seconds
+TIMEOUT = (3.05, 10)
+# Hosts kept in the pool at once, and connections kept per host
+POOL_HOSTS = 8
+POOL_PER_HOST = 4
+USER_AGENT = "Mozilla/5.0"
+# Bytes read per step when downloading with a deadline
+CHUNK_SIZE = 64 * 1024
+
+class Session(requests.Session):
+    """requests.Session with pooled keep-alive connections and default timeouts."""
+    def __init__(self):
+        super().__init__()
+        self.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST, max_retries=1)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = TIMEOUT
+        return super().request(method, url, **kwargs)
+
+_session = None
+
+def get_session():
+    """The shared Session, created on first use."""
+    global _session
+    if _session is None:
+        _session = Session()
+    return _session
+
+def request_timeout(deadline=None):
+    """(connect, read) timeout, capped by what is left of deadline; raises if nothing is."""
+    remaining = deadline.check() if deadline is not None else None
+    if remaining is None:
+        return TIMEOUT
+    return tuple(min(limit, remaining) for limit in TIMEOUT)
+
+def iter_body(response, chunk_size, deadline=None):
+    """
+    Body of a streamed response in chunks of up to chunk_size bytes. With a
+    deadline every socket read is checked against it and waits at most what is
+    left, so a server sending a few bytes at a time cannot hold the reader
+    past it (iter_content waits until a whole chunk is in).
+    """
+    raw = response.raw
+    if deadline is None or not hasattr(raw, "read1"):
+        yield from response.iter_content(chunk_size)
+        return
+    from urllib3.exceptions import HTTPError
+    sock = getattr(getattr(raw, "connection", None), "sock", None)
+    chunk = b""
+    while True:
+        remaining = deadline.check()
+        if sock is not None and remaining is not None:
+            sock.settimeout(max(remaining, 0.001))
+        try:
+            data = raw.read1(chunk_size - len(chunk), decode_content=True)
+        except HTTPError as e:
+            raise requests.ConnectionError(e) from e
+        if data:
+            chunk += data
+        if chunk and (not data or len(chunk) >= chunk_size):
+            yield chunk
+            chunk = b""
+        if not data:
+            return
+
+def fetch_bytes(url, session=None, deadline=None):
+    """
+    Body of url; raises requests.RequestException on errors and HTTP error
+    statuses, deadline.DeadlineExceeded when deadline runs out first.
+    """
+    try:
+        response = (session or get_session()).get(url, timeout=request_timeout(deadline), stream=True)
+        with response:
+            response.raise_for_status()
+            return b"".join(iter_body(response, CHUNK_SIZE, deadline))
+    except requests.RequestException:
+        if deadline is not None:
+            deadline.check()  # a timeout cut short by the deadline
+        raise
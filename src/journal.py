@@ -0,0 +1,177 @@
+# journal.py
+# Write-ahead journal for sheet rows.
+#
+# Saving an entry appends one JSON line ({"seq": n, "rows": [...]}) to the journal
+# file and fsyncs it, so the answer to Chrome only waits for a line append.
+# compact() later folds all pending lines into the storage backend (storage.py)
+# in one write. The backend stores the seq of the last folded line atomically
+# with the rows (in the ODS file: a custom document property), so a crash between
+# storing and emptying the journal just replays lines that are then skipped:
+# compaction is idempotent.
+#
+# Several host processes share one journal. Appends hold a short lock on the
+# journal file, so lines never interleave and seqs increase in file order.
+# Storage writes hold the write lock; a process that finds it taken leaves its
+# rows in the journal for the holder, which keeps draining until the journal is
+# empty and checks once more after releasing the lock, so a burst of clicks
+# becomes a single storage write.
+
+import json
+import os
+import time
+from write_lock import LOCK_SUFFIX, FileLock
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+# Compact when this many rows are pending, or after this long without messages
+COMPACT_THRESHOLD = 20
+COMPACT_IDLE_SECONDS = 5.0
+
+# How far from the end append() looks for the last seq
+_TAIL_BYTES = 64 * 1024
+
+class Journal:
+    """
+    Append-only journal in front of a storage backend (see storage.py).
+    write_lock guards the storage; by default a lock file next to the journal.
+    """
+    def __init__(self, path, storage, write_lock=None):
+        self.path = path
+        self.storage = storage
+        self.write_lock = write_lock or FileLock(path + ".write" + LOCK_SUFFIX)
+        self._append_lock = FileLock(path + LOCK_SUFFIX)
+        self._file = None
+        self._last_seq = 0
+
+    def append(self, rows):
+        """Durably record rows; returns the seq of the journal line."""
+        with self._append_lock:
+            f = self._open()
+            # Increasing in file order, across processes and compactions, even if the clock goes back
+            seq = max(time.time_ns(), self._last_seq + 1, self._tail_seq() + 1)
+            f.write(_line(seq, rows))
+            f.flush()
+            os.fsync(f.fileno())
+        self._last_seq = seq
+        return seq
+
+    def pending_entries(self):
+        """The journal lines not yet in storage."""
+        with self._append_lock:
+            _, entries = self._read()
+        checkpoint = self.storage.checkpoint()
+        return [entry for entry in entries if entry["seq"] > checkpoint and entry["rows"]]
+
+    def pending(self):
+        """Number of journaled rows not yet in storage."""
+        return sum(len(entry["rows"]) for entry in self.pending_entries())
+
+    def due(self):
+        return self.pending() >= COMPACT_THRESHOLD
+
+    def compact(self, blocking=True, on_written=None):
+        """
+        Write the pending rows of all processes to storage, in one batch per
+        round; returns their number. Returns None without waiting when not
+        blocking and another process holds the write lock, which then takes
+        these rows along. on_written(rows, stamp) runs under the lock after
+        rows were written; stamp is the storage stamp from before the first.
+        """
+        if not self.write_lock.acquire(blocking):
+            return None
+        written = []
+        try:
+            stamp = self.storage.stamp()
+            while True:
+                rows = self._compact_once()
+                if not rows:
+                    break
+                written.extend(rows)
+            if written and on_written:
+                on_written(written, stamp)
+        finally:
+            self.write_lock.release()
+        count = len(written)
+        # Rows handed off after the last round but before the release
+        if self.pending_entries():
+            count += self.compact(False, on_written) or 0
+        return count
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _compact_once(self):
+        with self._append_lock:
+            size, entries = self._read()
+        checkpoint = self.storage.checkpoint()
+        pending = [entry for entry in entries if entry["seq"] > checkpoint]
+        rows = [row for entry in pending for row in entry["rows"]]
+        if rows:
+            self.storage.add_rows(rows, pending[-1]["seq"])
+        if len(entries) > 1 or rows:
+            with self._append_lock:
+                self._drop_prefix(size, entries[-1]["seq"])
+        return rows
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        return self._file
+
+    def _read(self):
+        """(size, entries) of the journal; call with the append lock held."""
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0, []
+        end = self._cut_torn_line(data)
+        return end, [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+
+    def _cut_torn_line(self, data, offset=0):
+        """
+        Truncate a torn last line (a crash during append, never acknowledged
+        to Chrome) so the next line starts clean. data is the file from offset.
+        Returns the new file size.
+        """
+        end = offset + data.rfind(b'\n') + 1
+        if end < offset + len(data):
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+                os.fsync(f.fileno())
+        return end
+
+    def _drop_prefix(self, size, last_seq):
+        """
+        Remove the first size bytes (stored lines), keeping lines appended
+        since. The file is rewritten in place, other processes keep appending
+        to it; an empty line with last_seq keeps seqs increasing.
+        """
+        with open(self.path, 'r+b') as f:
+            f.seek(size)
+            rest = f.read()
+            f.seek(0)
+            f.write(_line(last_seq, []) + rest)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _tail_seq(self):
+        """seq of the last line in the journal (0 if empty); call with the append lock held."""
+        with open(self.path, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            offset = max(0, size - _TAIL_BYTES)
+            f.seek(offset)
+            tail = f.read()
+            if offset and tail.count(b'\n') < 2:
+                offset = 0
+                f.seek(0)
+                tail = f.read()
+        end = self._cut_torn_line(tail, offset) - offset
+        lines = tail[:end].rstrip(b'\n').rsplit(b'\n', 1)
+        return json.loads(lines[-1])["seq"] if lines[-1] else 0
+
+def _line(seq, rows):
+    return json.dumps({"seq": seq, "rows": rows}, ensure_ascii=False).encode('utf-8') + b'\n'
@@ -1,15 +1,29 @@
 # main.py
 # Native messaging host and PyQt6 dialog for writing to ODS spreadsheet
+#
+# The host handles framed messages in a loop until Chrome closes stdin, so a
+# chrome.runtime.connectNative port keeps one warm process (Qt app, HTTP session)
+# for all clicks. A single sendNativeMessage call still works:
+# Chrome closes the pipe after the first response and the loop ends.
+#
+# Entries go to the write-ahead journal (journal.py) and are answered at once.
+# The journal is folded into the ODS file between messages: when enough rows are
+# pending, when no message came for a while, on {"compact": true} and at exit.
+# Idle periods also move rows of earlier years to archive files (archive.py).
 
-from Functions import append_row_to_ods, read_native_message, send_native_message
-from form_widget import inputbox
-from netflix_parse import parse_netflix_url
-from fsmirror import parse_fsmirror_url
+# Only the stdlib and the message codec are imported at startup. PyQt6, requests,
+# pyexcel_ods3 and the site parsers load inside the handler that needs them
+# (site parsers through site_registry, on the first message for that site).
+
+from Functions import (archive_due, archive_old_rows, claim_stdout, compact_journal, get_journal,
+                       history_ready, make_row, read_native_message, record_rows, refresh_history,
+                       seen_before, send_native_message, suggest_episode)
+from native_codec import FrameTooLarge, InvalidFrame, StdinReader
+from site_registry import route_message
 import os
 import datetime
+import queue
 import sys
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QTimer
 
 # --- Config ---
 ODS_PATH = "C:\\Users\\olivi\\Documents\\MeineAblage.ods"
@@ -18,66 +32,134 @@ SHEET_NAME = "Sheet1"
 # --- Logging Control ---
 ENABLE_DEBUG_LOG = True  # Set to False to disable debug logging
 
+# After the dialog, how long a still running page parse may take to fill in the row
+LOAD_WAIT_SECONDS = 2.0
+
+# Shared across messages while the host is resident
+_app = None
+_http_session = None
+
 def log_debug(message):
     if ENABLE_DEBUG_LOG:
         with open("debug.log", "a", encoding="utf-8") as f:
             f.write(f"DEBUG: {message}\n")
 
-# --- Main Execution ---
-if __name__ == "__main__":
-    log_debug("Script starting...")
-    msg = read_native_message()
-    log_debug(f"Received message: {msg}")
-    if msg and msg.get('netflix') and msg.get('url'):
-        url = msg['url']
-        titel = msg.get('title', '')  # Get title from message sent by background.js
-        log_debug(f"Calling parse_netflix_url with url: {url}")
-        image_url = parse_netflix_url(url)
-        log_debug(f"parse_netflix_url returned image_url={image_url}")
-        episode = ""
-        more = False
-        seen_on = datetime.datetime.now().strftime('%d.%m.%Y')
-        log_debug(f"Netflix: titel={titel}, image_url={image_url}, url={url}")
-        image_for_form = image_url if image_url else "icon.png"
-        titel, episode, more = inputbox(
-            "Folgen",  # Dialog window title
-            "Netflix-Eintrag",  # Static dialog title
-            default_long_text=titel if titel else "",
-            image_url=image_for_form
-        )
-        log_debug(f"Form result for Netflix: titel={titel}, episode={episode}, more={more}")
-        append_row_to_ods(titel or '', episode, seen_on, url, more, image_for_form)
-        log_debug("Successfully saved Netflix entry to ODS")
-        send_native_message({"result": "OK"})
-        log_debug("Response sent successfully")
-        app = QApplication.instance()
-        if app:
-            app.quit()
-        sys.exit(0)
-    if msg and msg.get('fsmirror') and msg.get('url'):
-        url = msg['url']
-        log_debug(f"Calling parse_fsmirror_url with url: {url}")
-        titel, image_url = parse_fsmirror_url(url)
-        log_debug(f"parse_fsmirror_url returned titel={titel}, image_url={image_url}")
-        episode = ""
-        more = False
-        seen_on = datetime.datetime.now().strftime('%d.%m.%Y')
-        image_for_form = image_url if image_url else "icon.png"
-        titel, episode, more = inputbox(
-            "FSMirror",  # Dialog window title
-            "FSMirror-Eintrag",  # Static dialog title
-            default_long_text=titel if titel else "",
-            image_url=image_for_form
-        )
-        log_debug(f"Form result for FSMirror: titel={titel}, episode={episode}, more={more}")
-        append_row_to_ods(titel or '', episode, seen_on, url, more, image_for_form)
-        log_debug("Successfully saved FSMirror entry to ODS")
-        send_native_message({"result": "OK"})
-        log_debug("Response sent successfully")
-        app = QApplication.instance()
-        if app:
-            app.quit()
-        sys.exit(0)
+def get_app():
+    """Return the QApplication, creating it once for the lifetime of the host."""
+    global _app
+    if _app is None:
+        from PyQt6.QtWidgets import QApplication
+        _app = QApplication.instance()
+        if not _app:
+            _app = QApplication(sys.argv)
+            # The host outlives every dialog, closing one must not end the event loop
+            _app.setQuitOnLastWindowClosed(False)
+    return _app
+
+def get_http_session():
+    """Return the HTTP session shared by the page parsers and the poster loader."""
+    global _http_session
+    if _http_session is None:
+        from http_client import get_session
+        _http_session = get_session()
+    return _http_session
+
+def episode_suggestion(titel):
+    """
+    suggest_episode(titel), or None if the history cannot be read or would first
+    have to be rebuilt from the whole sheet (done when idle, see
+    next_message_or_compact). GUI thread only.
+    """
+    try:
+        if not history_ready():
+            log_debug("History index out of date, no episode suggestion")
+            return None
+        return suggest_episode(titel)
+    except Exception as e:
+        log_debug(f"No episode suggestion: {e}")
+        return None
+
+def show_inputbox(prompt, title, default_long_text="", image_url=None, load=None, deadline=None):
+    """
+    Show the entry dialog (loading Qt on first use) and log how long it took to appear.
+    The episode field starts with the episode after the last one logged for the title,
+    also for a title load() finds. load() runs in a worker thread while the dialog is
+    shown (see form_widget.inputbox); after the dialog it gets up to LOAD_WAIT_SECONDS
+    more to finish, within deadline.
+    """
+    default_episode = ""
+    if default_long_text and default_long_text != "Fill":
+        default_episode = episode_suggestion(default_long_text) or ""
+    get_app()
+    from form_widget import inputbox, get_entry_dialog
+    result = inputbox(prompt, title, default_long_text=default_long_text, image_url=image_url,
+                      default_episode=default_episode, load=load, deadline=deadline,
+                      suggest=episode_suggestion)
+    dialog = get_entry_dialog()
+    show_ms = dialog.show_ms
+    if show_ms is not None:
+        log_debug(f"Dialog shown in {show_ms:.1f} ms")
+    if load is not None and dialog.loading is not None:
+        remaining = deadline.remaining() if deadline is not None else None
+        dialog.loading.join(LOAD_WAIT_SECONDS if remaining is None else min(LOAD_WAIT_SECONDS, remaining))
+    return result
+
+def save_entry(row):
+    """Journal row unless the same title, episode and URL was saved before."""
+    previous = seen_before(row)
+    if previous is not None:
+        log_debug(f"Not saved, seen before on {previous}: {row}")
+        return {"result": "DUPLICATE", "seen_on": previous}
+    record_rows([row])
+    log_debug("Successfully journaled entry")
+    return {"result": "OK"}
+
+def handle_site(msg, site):
+    """
+    Handle a page from a registered streaming site (see site_registry).
+    The dialog opens at once; the page is parsed while it is shown and fills
+    in the poster, and the title unless the browser sent one. Parse and poster
+    share one time budget (deadline.py); past it the entry keeps icon.png and
+    the browser's title.
+    """
+    from deadline import REQUEST_BUDGET_SECONDS, Deadline
+    deadline = Deadline(REQUEST_BUDGET_SECONDS)
+    url = msg['url']
+    # Prefer the title read from the page in the browser (sent by background.js)
+    browser_titel = msg.get('title')
+    parsed = {}
+
+    def load():
+        # Worker thread: the history index and its storage stay on the GUI thread,
+        # the dialog suggests the episode for the parsed title (show_inputbox)
+        log_debug(f"Calling {site.key} parser with url: {url}")
+        parsed_titel, image_url = site.parse(url, session=get_http_session(), deadline=deadline)
+        log_debug(f"{site.key} parser returned titel={parsed_titel}, image_url={image_url}")
+        from http_cache import get_cache
+        log_debug(f"Page cache: {get_cache().stats}")
+        parsed.update(titel=parsed_titel, image_url=image_url)
+        updates = {"image_url": image_url}
+        if parsed_titel and not browser_titel:
+            updates["titel"] = parsed_titel
+        return updates
+
+    seen_on = datetime.datetime.now().strftime('%d.%m.%Y')
+    titel, episode, more = show_inputbox(
+        site.prompt,  # Dialog window title
+        site.label,  # Static dialog title
+        default_long_text=browser_titel or "",
+        load=load,
+        deadline=deadline
+    )
+    log_debug(f"Form result for {site.key}: titel={titel}, episode={episode}, more={more}")
+    log_debug(f"Time budget: {deadline.report()}")
+    # Answered before the parse finished: the page title and poster are still used if known by now
+    titel = titel or parsed.get('titel') or ''
+    image_for_form = parsed.get('image_url') or "icon.png"
+    return save_entry(make_row(titel, episode, seen_on, url, more, image_for_form))
+
+def handle_entry(msg):
+    """Handle a plain page or selection entry (or manual input when msg is None)."""
     if msg and 'text' in msg:
         titel = msg['text'] if msg['text'] else "Fill"
         url = msg.get('url', '')
@@ -91,18 +173,211 @@ if __name__ == "__main__":
         cover = ""  # No cover for manual input
     log_debug("Showing inputbox for episode column")
     image_for_form = cover if cover else "icon.png"
-    titel, episode, more = inputbox("Folgen", "", default_long_text=titel, image_url=image_for_form)
+    titel, episode, more = show_inputbox("Folgen", "", default_long_text=titel, image_url=image_for_form)
     seen_on = datetime.datetime.now().strftime('%d.%m.%Y')
     log_debug(f"Saving to ODS: titel={titel}, episode={episode}, seen_on={seen_on}, url={url}, more={more}, cover={cover}")
-    append_row_to_ods(titel, episode, seen_on, url, more, cover)
-    log_debug("Successfully saved to ODS")
-    if msg:
+    return save_entry(make_row(titel, episode, seen_on, url, more, cover))
+
+def batch_entry_row(entry, seen_on):
+    """Validate one entry of a batch message and return its sheet row."""
+    if not isinstance(entry, dict):
+        raise ValueError("entry must be an object")
+    titel = entry.get('title', entry.get('titel', ''))
+    if not isinstance(titel, str) or not titel.strip():
+        raise ValueError("entry has no title")
+    return make_row(
+        titel.strip(),
+        str(entry.get('episode', '')).strip(),
+        entry.get('seen_on') or seen_on,
+        entry.get('url', ''),
+        bool(entry.get('more', False)),
+        entry.get('cover', entry.get('imageSrc', '')),
+    )
+
+def handle_batch(msg):
+    """
+    Store a list of entries (a whole season, several tabs) with one save.
+    Each entry: {title, episode, url, more, cover, seen_on}; only title is required.
+    The response reports every entry by its index in the batch; entries saved
+    before (or twice in the batch) are reported as DUPLICATE and skipped.
+    """
+    from history_index import row_key
+    entries = msg['batch']
+    if not isinstance(entries, list):
+        return {"result": "ERROR", "error": "batch must be a list"}
+    seen_on = datetime.datetime.now().strftime('%d.%m.%Y')
+    statuses = []
+    rows = []
+    batch_keys = {}
+    for index, entry in enumerate(entries):
+        try:
+            row = batch_entry_row(entry, seen_on)
+        except ValueError as e:
+            statuses.append({"index": index, "result": "ERROR", "error": str(e)})
+            continue
+        previous = seen_before(row)
+        if previous is None:
+            previous = batch_keys.get(row_key(row))
+        if previous is not None:
+            statuses.append({"index": index, "result": "DUPLICATE", "seen_on": previous})
+            continue
+        batch_keys[row_key(row)] = row[2]
+        rows.append(row)
+        statuses.append({"index": index, "result": "OK"})
+    if rows:
+        log_debug(f"Journaling batch of {len(rows)} rows")
+        try:
+            record_rows(rows)
+        except Exception as e:
+            log_debug(f"Batch save failed: {e}")
+            for status in statuses:
+                if status["result"] == "OK":
+                    status.update(result="ERROR", error=str(e))
+    saved = sum(1 for status in statuses if status["result"] == "OK")
+    duplicates = sum(1 for status in statuses if status["result"] == "DUPLICATE")
+    if saved + duplicates == len(statuses):
+        result = "OK"
+    elif saved:
+        result = "PARTIAL"
+    else:
+        result = "ERROR"
+    return {"result": result, "saved": saved, "rows": statuses}
+
+def compact(reason):
+    """Fold the journal into the ODS file; failures (file locked) leave it for the next try."""
+    try:
+        # Another host writing right now picks up our rows as well
+        count = compact_journal(blocking=False)
+    except Exception as e:
+        log_debug(f"Journal compaction ({reason}) failed: {e}")
+        return None
+    if count is None:
+        log_debug(f"Journal compaction ({reason}) left to the host holding the write lock")
+    elif count:
+        log_debug(f"Journal compaction ({reason}) wrote {count} rows to ODS")
+    return count
+
+def handle_compact(msg):
+    """{"compact": true}: write the journaled rows to the ODS file now."""
+    try:
+        count = compact_journal()
+    except Exception as e:
+        return {"result": "ERROR", "error": str(e)}
+    return {"result": "OK", "compacted": count}
+
+def handle_export(msg):
+    """{"export": true}: compact the journal and regenerate the spreadsheet from storage."""
+    try:
+        count = compact_journal(export=True)
+    except Exception as e:
+        return {"result": "ERROR", "error": str(e)}
+    return {"result": "OK", "compacted": count}
+
+def handle_message(msg):
+    """Route one native message to its handler and return the response for Chrome."""
+    if msg.get('compact') is True:
+        return handle_compact(msg)
+    if msg.get('export') is True:
+        return handle_export(msg)
+    if 'batch' in msg:
+        return handle_batch(msg)
+    site = route_message(msg)
+    if site:
+        return handle_site(msg, site)
+    return handle_entry(msg)
+
+def archive_step():
+    """Move one batch of old rows to the archive files (the rest on later idle periods)."""
+    try:
+        moved = archive_old_rows(max_batches=1)
+    except Exception as e:
+        log_debug(f"Archiving failed: {e}")
+        return
+    if moved:
+        log_debug(f"Archived {moved} rows")
+
+def next_message_or_compact(get, idle_seconds=None):
+    """
+    Wait for the next message with get(timeout), compacting the journal while
+    none is pending: right away when enough rows piled up, else once the host
+    has been idle for idle_seconds. An idle host also archives and brings the
+    history index up to date, so no click has to wait for a rebuild.
+    """
+    from journal import COMPACT_IDLE_SECONDS
+    if get_journal().due():
+        compact("threshold")
+    try:
+        return get(timeout=COMPACT_IDLE_SECONDS if idle_seconds is None else idle_seconds)
+    except queue.Empty:
+        if get_journal().pending():
+            compact("idle")
+        if archive_due():
+            archive_step()
+        try:
+            refresh_history()
+        except Exception as e:
+            log_debug(f"History index not refreshed: {e}")
+        return get()
+
+def short_response(response, error):
+    """The summary of a response too large to send (result, saved count, id) and why."""
+    short = {key: response[key] for key in ("result", "saved", "id") if key in response}
+    short["error"] = f"response too large: {error}"
+    return short
+
+def run_host(first_msg, next_message=read_native_message, out=None):
+    """
+    Handle messages until Chrome closes stdin. next_message() returns the next
+    message or None; with a StdinReader it is already read while this one runs.
+    Responses are written to out (see Functions.claim_stdout), by default stdout.
+    """
+    msg = first_msg
+    while msg is not None:
+        if isinstance(msg, InvalidFrame):
+            # Answered like a failed message; the stream itself is still in step
+            log_debug(f"Received {msg}")
+            response = {"result": "ERROR", "error": str(msg)}
+            request_id = msg.request_id
+        else:
+            log_debug(f"Received message: {msg}")
+            try:
+                response = handle_message(msg)
+            except Exception as e:
+                log_debug(f"Error handling message: {e}")
+                response = {"result": "ERROR", "error": str(e)}
+            request_id = msg.get('id')
+        # Echo the request id so a connectNative port can match responses
+        if request_id is not None:
+            response["id"] = request_id
         log_debug("Sending response to Chrome")
-        send_native_message({"result": "OK"})
+        try:
+            send_native_message(response, out)
+        except FrameTooLarge as e:
+            # Chrome takes at most 1 MiB back (a batch's per-row statuses can
+            # exceed it); the work is done, so report it without the details
+            log_debug(f"Response not sent: {e}")
+            send_native_message(short_response(response, str(e)), out)
         log_debug("Response sent successfully")
-    else:
+        msg = next_message()
+    log_debug("stdin closed, host exiting")
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    log_debug("Script starting...")
+    reader = StdinReader().start()
+    msg = reader.get()
+    if reader.error:
+        log_debug(f"Could not read native message: {reader.error}")
+    if msg is None:
+        # Started by hand without a Chrome message
+        handle_entry(None)
         print("Gespeichert!")
+    else:
+        run_host(msg, lambda: next_message_or_compact(reader.get), claim_stdout())
+        if reader.error:
+            log_debug(f"Native message stream broken: {reader.error}")
+    compact("exit")
     log_debug("Script completed successfully")
-    app = QApplication.instance()
-    if app:
-        app.quit()
\ No newline at end of file
+    if _app is not None:
+        _app.quit()
+    sys.exit(0)
@@ -0,0 +1,267 @@
+# native_codec.py
+# Chrome native messaging framing for asyncio streams.
+#
+# Each frame is a 32-bit native-endian length followed by that many bytes of
+# UTF-8 JSON. FrameDecoder parses frames straight out of its receive buffer
+# through a memoryview (no per-frame bytes copies) and rejects a frame over the
+# size limit as soon as its header arrives. A frame whose body is not valid
+# JSON is passed on as an InvalidFrame (carrying the request id, if one can be
+# read from it) so the host can answer it with an error; the length prefix
+# keeps the stream in step, so the frames after it are decoded as usual.
+# read_messages() serves asyncio
+# StreamReaders; MessageProtocol decodes straight from a read-pipe transport.
+# StdinReader runs the latter on a background thread so the host can receive the
+# next message while the current one is still being handled.
+
+import json
+import os
+import queue
+import re
+import stat
+import struct
+import sys
+import threading
+
+# Chrome sends at most 64 MiB to a host and accepts at most 1 MiB back
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+MAX_RESPONSE_SIZE = 1024 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+
+_HEADER = struct.Struct('=I')
+# The "id" member of a frame json.loads rejected, if its value is a number or string
+_REQUEST_ID = re.compile(rb'"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*")')
+
+class FrameTooLarge(ValueError):
+    """A frame length exceeds the configured limit."""
+
+class IncompleteFrame(EOFError):
+    """The stream ended in the middle of a frame."""
+
+class InvalidFrame(ValueError):
+    """
+    A complete frame whose body is not UTF-8 JSON. Handed out in place of the
+    message; request_id is its "id" if that could still be read, else None.
+    """
+    def __init__(self, message, request_id=None):
+        super().__init__(message)
+        self.request_id = request_id
+
+def decode_frame(payload):
+    """The message in a frame body, or an InvalidFrame if it does not decode."""
+    try:
+        return json.loads(str(payload, 'utf-8'))
+    except ValueError as e:
+        match = _REQUEST_ID.search(payload)
+        try:
+            request_id = json.loads(match.group(1)) if match else None
+        except ValueError:
+            request_id = None
+        return InvalidFrame(f"invalid message: {e}", request_id)
+
+class FrameDecoder:
+    """
+    Incremental decoder: feed() raw bytes as they arrive and get back every
+    message completed by them. Frames that arrive whole are decoded straight
+    from the incoming chunk. The chunks of a partial frame are only collected
+    and joined once, when the frame is complete. A frame that is not valid
+    JSON comes out as an InvalidFrame instead of stopping the decoder.
+    """
+    def __init__(self, max_size=MAX_MESSAGE_SIZE):
+        self.max_size = max_size
+        self._parts = []
+        self._pending = 0
+        self._frame_size = 0  # header + body of the partial frame, 0 until the header is in
+        self._error = None
+
+    def pending(self):
+        """Number of buffered bytes that do not form a complete frame yet."""
+        return self._pending
+
+    def needed(self):
+        """Bytes still missing from the buffered partial frame (0 if unknown)."""
+        return max(0, self._frame_size - self._pending)
+
+    def feed(self, data):
+        if self._error:
+            raise self._error
+        if self._parts:
+            self._parts.append(data)
+            self._pending += len(data)
+            if self._pending < max(self._frame_size, _HEADER.size):
+                return []
+            data = b''.join(self._parts)
+        messages = []
+        with memoryview(data) as view:
+            offset = self._decode_into(messages, data, view)
+        self._parts = [data[offset:]] if offset < len(data) else []
+        self._pending = len(data) - offset
+        self._frame_size = 0
+        if self._pending >= _HEADER.size:
+            (length,) = _HEADER.unpack_from(data, offset)
+            self._frame_size = _HEADER.size + length
+            if length > self.max_size:
+                # Hand out the good frames first, fail on the next call
+                self._error = FrameTooLarge(f"frame of {length} bytes exceeds limit of {self.max_size}")
+        return messages
+
+    def close(self):
+        """Call at end of stream: raises if it stopped inside a frame."""
+        if self._error:
+            raise self._error
+        if self._pending:
+            raise IncompleteFrame(f"stream closed with {self._pending} bytes of an unfinished frame")
+
+    def _decode_into(self, messages, data, view):
+        offset = 0
+        size = len(data)
+        while size - offset >= _HEADER.size:
+            (length,) = _HEADER.unpack_from(data, offset)
+            if length > self.max_size:
+                if messages:
+                    break
+                raise FrameTooLarge(f"frame of {length} bytes exceeds limit of {self.max_size}")
+            start = offset + _HEADER.size
+            end = start + length
+            if end > size:
+                break
+            messages.append(decode_frame(view[start:end]))
+            offset = end
+        return offset
+
+def encode_message(obj, max_size=MAX_RESPONSE_SIZE):
+    """Return the framed bytes for obj."""
+    payload = json.dumps(obj).encode('utf-8')
+    if len(payload) > max_size:
+        raise FrameTooLarge(f"message of {len(payload)} bytes exceeds limit of {max_size}")
+    return _HEADER.pack(len(payload)) + payload
+
+async def read_messages(reader, max_size=MAX_MESSAGE_SIZE, chunk_size=READ_CHUNK_SIZE):
+    """Async generator over the messages of an asyncio.StreamReader until EOF."""
+    decoder = FrameDecoder(max_size)
+    while True:
+        # Ask for the rest of a large frame in one read instead of chunk by chunk
+        data = await reader.read(max(chunk_size, decoder.needed()))
+        if not data:
+            decoder.close()
+            return
+        for message in decoder.feed(data):
+            yield message
+
+async def write_message(writer, obj, max_size=MAX_RESPONSE_SIZE):
+    """Write one framed message to an asyncio.StreamWriter."""
+    writer.write(encode_message(obj, max_size))
+    await writer.drain()
+
+class MessageProtocol:
+    """
+    asyncio read-pipe protocol that decodes frames straight from the chunks the
+    transport delivers (no StreamReader buffer in between). Each message goes
+    to on_message(msg); `closed` resolves with None at EOF or the decode error.
+    """
+    def __init__(self, on_message, max_size=MAX_MESSAGE_SIZE):
+        self.on_message = on_message
+        self.decoder = FrameDecoder(max_size)
+        self.transport = None
+        self.closed = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        if self.closed.done():
+            return
+        try:
+            for message in self.decoder.feed(data):
+                self.on_message(message)
+        except Exception as e:
+            self._finish(e)
+            if self.transport:
+                self.transport.close()
+
+    def eof_received(self):
+        try:
+            self.decoder.close()
+        except Exception as e:
+            self._finish(e)
+        self._finish(None)
+
+    def connection_lost(self, exc):
+        self._finish(exc)
+
+    def _finish(self, exc):
+        if not self.closed.done():
+            self.closed.set_result(exc)
+
+def _is_pipe(stream):
+    """Whether stream is a pipe, socket or terminal an event loop may be able to watch."""
+    try:
+        mode = os.fstat(stream.fileno()).st_mode
+    except (AttributeError, OSError, ValueError):
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode) or stat.S_ISCHR(mode)
+
+async def read_pipe(protocol, stream=None):
+    """
+    Feed stream (stdin by default) into protocol until it closes; raises the
+    decode error if there was one. Pipes that the event loop cannot watch (stdin
+    on the Windows proactor loop, in-memory streams) are read by a helper thread.
+    """
+    import asyncio
+    stream = stream or sys.stdin.buffer
+    loop = asyncio.get_running_loop()
+    protocol.closed = loop.create_future()
+    transport = None
+    if _is_pipe(stream):
+        try:
+            transport, _ = await loop.connect_read_pipe(lambda: protocol, stream)
+        except (NotImplementedError, OSError, ValueError):
+            pass
+    if transport is None:
+        def pump():
+            read = getattr(stream, 'read1', stream.read)
+            while not protocol.closed.done():
+                data = read(READ_CHUNK_SIZE)
+                if not data:
+                    loop.call_soon_threadsafe(protocol.eof_received)
+                    return
+                loop.call_soon_threadsafe(protocol.data_received, data)
+
+        threading.Thread(target=pump, name="stdin-pump", daemon=True).start()
+    try:
+        exc = await protocol.closed
+    finally:
+        if transport:
+            transport.close()
+    if exc:
+        raise exc
+
+class StdinReader:
+    """
+    Reads native messages from stdin on a background thread into a queue.
+    get() returns the next message, or None once stdin is closed or broken
+    (the cause is then in `error`).
+    """
+    def __init__(self, stream=None, max_size=MAX_MESSAGE_SIZE):
+        self.stream = stream
+        self.max_size = max_size
+        self.error = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="native-reader", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+    def _run(self):
+        # asyncio is imported here, overlapping its import with the wait for Chrome
+        import asyncio
+        try:
+            asyncio.run(read_pipe(MessageProtocol(self._queue.put, self.max_size), self.stream))
+        except Exception as e:
+            # A bad frame desynchronises the stream, nothing after it can be trusted
+            self.error = e
+        finally:
+            self._queue.put(None)
@@ -1,45 +1,72 @@
 # example.py
 # Simple script to prompt for a URL, fetch the content, and print the raw HTTP response or parsed content.
+#
+# The page is scanned while it downloads (extract_engine.py): the ld+json block
+# near the top has the title and poster, so the download usually stops after the
+# first chunk instead of reading the whole page of ~3 MB. When that block is
+# missing, the page is read to its end for the title model of the embedded React
+# state (netflix_state.py), and last the player's <img alt="" src=...>.
 
-import requests
-import re
+import json
+from capture_store import capture
+from deadline import DeadlineExceeded
+from extract_engine import Extractor
+from Functions import log_debug
+from http_cache import cached_scan
 
-def parse_netflix_url(url):
+def _found_enough(found):
+    return "title" in found and "image" in found
+
+EXTRACTOR = Extractor({
+    "title": rb'"@type":"(?:Movie|TVSeries)"[^<]{0,2000}?"name":"(?P<value>(?:[^"\\<]|\\.){1,500})"',
+    "image": rb'"@context":"http://schema.org"[^<]{0,4000}?"image":"(?P<value>(?:[^"\\<]|\\.){1,2000})"',
+    "img": rb'<img alt="" src=["\'](?P<value>[^"\'>]{1,2000})["\']',
+}, _found_enough)
+
+def _json_string(value):
+    """Text of a JSON string body as found in the page (escapes resolved)."""
+    try:
+        return json.loads(f'"{value}"')
+    except ValueError:
+        return value
+
+def parse_netflix_url(url, session=None, deadline=None):
     """
-    Fetch the given URL and return the image URL if found, else None.
+    Fetch the given URL and return (title, image URL); either may be None.
+    Goes through the page cache (http_cache) and the shared pooled session
+    (http_client) unless session is given, and stops reading once both are found.
+    Gives up with what it has when deadline (deadline.py) runs out.
     """
     try:
-        response = requests.get(url, headers={'User-Agent': 'Python Example Script'})
-        text = response.text
-        # Write the raw response to requests.txt for debugging
-        try:
-            with open("requests.txt", "w", encoding="utf-8") as f:
-                f.write(text)
-        except Exception as file_err:
-            print(f"Error writing requests.txt: {file_err}")
-        
-        search_text = text
-        image_value = None
-        image_match = re.search(r'<img alt="" src=(["\'])(.*?)\1', search_text)
-        if image_match:
-            image_value = image_match.group(2)
-        if image_value:
-            return image_value
-        # Fallback to JSON if present
+        scanner = EXTRACTOR.scan()
         try:
-            data = response.json()
-            image_value = data.get('image') if isinstance(data, dict) else None
-            if image_value:
-                return image_value
-        except Exception:
-            pass
-        return None
+            response = cached_scan(url, scanner, session=session, deadline=deadline,
+                                   headers={'User-Agent': 'Python Example Script'})
+        except DeadlineExceeded as e:
+            # Out of time: go on with whatever the scan found so far
+            log_debug(f"Stopped fetching URL: {e}")
+            response = None
+        if response is not None:
+            # Opt-in sample of the page as read, for offline replay (capture_store.py)
+            capture("netflix", url, response.content, complete=not EXTRACTOR.done(scanner.found))
+        title = scanner.value("title")
+        title = _json_string(title) if title else None
+        image_value = scanner.value("image")
+        image_value = _json_string(image_value) if image_value else None
+        if (not title or not image_value) and response is not None:
+            # No ld+json block: the title model of the embedded state
+            from netflix_state import title_info
+            info = title_info(response.content) or {}
+            title = title or info.get("title")
+            image_value = image_value or info.get("image_url")
+        return title, image_value or scanner.value("img")
     except Exception as e:
-        print("Error fetching URL:", e)
-        return None
+        log_debug(f"Error fetching URL: {e}")
+        return None, None
 
 if __name__ == "__main__":
     # For manual testing only: main.py provides the URL in production
     url = input("Enter a URL to fetch: ")
-    image = parse_netflix_url(url)
-    print("Image:", image)
\ No newline at end of file
+    titel, image = parse_netflix_url(url)
+    print("Title:", titel)
+    print("Image:", image)
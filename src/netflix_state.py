@@ -0,0 +1,102 @@
+# netflix_state.py
+# Title metadata from the state Netflix embeds in its pages.
+#
+# A title page assigns its whole React state to netflix.reactContext in a
+# <script>: some 250 KB of JavaScript object literal (JSON with \xNN escapes)
+# near the end of the page. Only models.nmTitleUI (a few KB) describes the
+# title: name, type, year, synopsis, genre, maturity rating and artwork.
+# It has no season or episode numbers, so the dialog's episode field keeps
+# coming from the history (history_index.next_episode).
+# Instead of decoding the whole literal, the model's object is located by its
+# key and its end found by a brace scan that skips string contents, and only
+# that slice is unescaped and handed to json.loads.
+#
+# A quoted key followed by a colon cannot occur inside a string of the literal
+# (quotes there are escaped), so the first "nmTitleUI": after the assignment is
+# the model itself.
+
+import json
+import re
+
+STATE_NAME = b"reactContext"
+TITLE_MODEL = b"nmTitleUI"
+
+# Strings (with their escapes) and brackets; everything else is skipped
+_TOKENS = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]]', re.DOTALL)
+# \xNN outside an escaped backslash; JSON only knows \u00NN
+_HEX_ESCAPE = re.compile(r'(?<!\\)((?:\\\\)*)\\x([0-9A-Fa-f]{2})')
+
+def value_end(data, start):
+    """End offset of the object or array starting at data[start], or None if it is cut off."""
+    depth = 0
+    for match in _TOKENS.finditer(data, start):
+        token = match.group()
+        if token in (b"{", b"["):
+            depth += 1
+        elif token in (b"}", b"]"):
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    return None
+
+def find_model(data, key=TITLE_MODEL, state=STATE_NAME):
+    """
+    The decoded object of models.<key> in the page's netflix.<state>, or None
+    if the page has no such state or model.
+    """
+    # bytes.find skips to the name far faster than a regex search would
+    marker = b"netflix." + state
+    pattern = re.compile(re.escape(marker) + rb"\s*=\s*\{")
+    position = data.find(marker)
+    while position != -1:
+        assignment = pattern.match(data, position)
+        if assignment:
+            break
+        position = data.find(marker, position + 1)
+    else:
+        return None
+    field = re.compile(rb'"' + re.escape(key) + rb'"\s*:\s*(?=\{)')
+    match = field.search(data, assignment.end())
+    if match is None:
+        return None
+    end = value_end(data, match.end())
+    if end is None:
+        return None
+    text = data[match.end():end].decode("utf-8", "replace")
+    try:
+        return json.loads(_HEX_ESCAPE.sub(r"\1\\u00\2", text))
+    except ValueError:
+        return None
+
+def _sections(model):
+    sections = (model.get("data") or {}).get("sectionData") or []
+    return {section.get("type"): section.get("data") or {} for section in sections if isinstance(section, dict)}
+
+def title_info(data):
+    """
+    Metadata of the title a page shows, from its nmTitleUI model: a dict with
+    video_id, title, type ("movie"/"show"), year, synopsis, genre, maturity,
+    image_url (the billboard artwork) and logo_url; missing values are None.
+    None if the page has no such model.
+    """
+    model = find_model(data)
+    if not isinstance(model, dict):
+        return None
+    sections = _sections(model)
+    hero = sections.get("hero", {})
+    metadata = next((detail.get("data") or {} for detail in hero.get("details") or []
+                     if isinstance(detail, dict) and detail.get("type") == "titleMetadata"), {})
+    details = sections.get("moreDetails", {})
+    artwork = hero.get("artwork") or {}
+    image = artwork.get("heroImage") or artwork.get("mobileHeroImage") or {}
+    return {
+        "video_id": (model.get("data") or {}).get("videoId"),
+        "title": metadata.get("title") or hero.get("title") or details.get("title"),
+        "type": details.get("type"),
+        "year": metadata.get("year"),
+        "synopsis": metadata.get("synopsis"),
+        "genre": (metadata.get("coreGenre") or {}).get("genreName"),
+        "maturity": (metadata.get("maturityDetails") or {}).get("value"),
+        "image_url": image.get("url"),
+        "logo_url": artwork.get("logo"),
+    }
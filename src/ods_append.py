@@ -0,0 +1,539 @@
+# ods_append.py
+# Appends rows to an ODS spreadsheet without parsing or rebuilding the workbook.
+#
+# content.xml is streamed and the new <table:table-row> elements are spliced in
+# before the end of the target sheet (ahead of any trailing empty rows Calc keeps
+# for formatting, which shrink by as many rows so the sheet does not outgrow
+# Calc's row limit when it is padded to the end). Every other part of the file is copied through as raw
+# compressed bytes, so other sheets, styles and settings survive untouched.
+#
+# To keep the cost flat as the sheet grows, content.xml is compressed with a
+# deflate full flush right after the appended rows, and the position of that
+# flush point is stored in a zip extra field. The next append copies the
+# compressed bytes before it verbatim and only inflates, splices and deflates the
+# short tail after it. Files saved by Calc have no such hint and take the full
+# streaming path once, which adds the hint.
+
+import itertools
+import os
+import re
+import struct
+import time
+import zipfile
+import zlib
+from xml.sax.saxutils import escape, quoteattr, unescape
+
+CHUNK_SIZE = 256 * 1024
+COMPRESS_LEVEL = 6
+
+_TABLE_START = re.compile(rb'<table:table[\s>]|</office:spreadsheet>')
+_TABLE_NAME = re.compile(rb'table:name="([^"]*)"')
+_ROW_OR_TABLE_END = re.compile(rb'</table:table-row>|</table:table>')
+_ROW_START = re.compile(rb'<table:table-row[\s>]')
+_ROW_CONTENT = re.compile(rb'<text:p|office:value=')
+_ROWS_REPEATED = re.compile(rb'\s+table:number-rows-repeated="(\d+)"')
+
+_ODS_MIMETYPE = b'application/vnd.oasis.opendocument.spreadsheet'
+
+# Zip extra field with the append hint of content.xml: entry crc and compressed
+# size (to detect other writers), crc of the sheet name, and the flush point as
+# compressed offset, uncompressed offset and crc of the bytes before it
+_HINT_ID = 0x4342
+_HINT = struct.Struct('<IQIQQI')
+
+_LOCAL_HEADER = struct.Struct('<4s5H3I2H')
+_MARK = object()  # splicer output marker: the new rows end here
+
+def cell_xml(value):
+    """One <table:table-cell> for value (numbers as float cells, everything else as text)."""
+    if value is None or value == "":
+        return b'<table:table-cell/>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (f'<table:table-cell office:value-type="float" office:value="{value}">'
+                f'<text:p>{value}</text:p></table:table-cell>').encode('utf-8')
+    text = escape(str(value)).replace('\n', '<text:line-break/>')
+    return f'<table:table-cell office:value-type="string"><text:p>{text}</text:p></table:table-cell>'.encode('utf-8')
+
+def rows_xml(rows):
+    return b''.join(b'<table:table-row>' + b''.join(cell_xml(v) for v in row) + b'</table:table-row>'
+                    for row in rows)
+
+class _ContentSplicer:
+    """
+    Streaming filter for content.xml: feed() chunks, the output goes to sink.
+    Inserts new_rows at the end of the sheet named sheet_name, or appends a new
+    sheet holding them if the workbook has no such sheet, and calls sink.mark()
+    right after them. With inside=True the input starts within the sheet.
+    Rows with content are passed through as whole byte ranges, only trailing
+    empty rows are held back until it is known whether content follows them;
+    those end up new_count rows shorter.
+    """
+    def __init__(self, sheet_name, new_rows, sink, inside=False, new_count=0):
+        self.sheet_attr = escape(sheet_name, {'"': '&quot;'}).encode('utf-8')
+        self.sheet_name = sheet_name
+        self.new_rows = new_rows
+        self.new_count = new_count
+        self.sink = sink
+        self.state = 'inside' if inside else 'before'
+        self.buffer = b''
+        self.pos = 0  # scan position in buffer
+        self.emit_start = 0  # start of the scanned bytes not yet emitted
+        self.held = []  # trailing empty rows seen since the last row with content
+        self.inserted = False
+
+    def feed(self, data):
+        self.buffer = self.buffer[self.pos:] + data if self.pos else self.buffer + data
+        self.pos = self.emit_start = 0
+        out = []
+        while getattr(self, '_' + self.state)(out):
+            pass
+        out.append(self.buffer[self.emit_start:self.pos])
+        self.emit_start = self.pos
+        for piece in out:
+            if piece is _MARK:
+                self.sink.mark()
+            elif piece:
+                self.sink.write(piece)
+
+    def finish(self):
+        self.feed(b'')
+        if not self.inserted:
+            raise ValueError(f"content.xml has no sheet {self.sheet_name!r} to append to")
+        self.sink.write(self.buffer[self.pos:])
+
+    def _before(self, out):
+        match = _TABLE_START.search(self.buffer, self.pos)
+        if not match:
+            # Keep enough bytes to recognise a tag split across chunks
+            self.pos = max(self.pos, len(self.buffer) - len(b'</office:spreadsheet>'))
+            return False
+        if match.group().startswith(b'</'):
+            # No sheet of that name: add one at the end of the spreadsheet
+            out.append(self.buffer[self.emit_start:match.start()])
+            out.append(b'<table:table table:name=' + quoteattr(self.sheet_name).encode('utf-8') + b'>'
+                       + self.new_rows)
+            out.append(_MARK)
+            out.append(b'</table:table>')
+            self.pos = self.emit_start = match.start()
+            self.inserted = True
+            self.state = 'after'
+            return True
+        tag_end = self.buffer.find(b'>', match.start())
+        if tag_end < 0:
+            self.pos = match.start()
+            return False
+        name = _TABLE_NAME.search(self.buffer, match.start(), tag_end)
+        self.pos = tag_end + 1
+        if name and name.group(1) == self.sheet_attr:
+            self.state = 'inside'
+        return True
+
+    def _inside(self, out):
+        match = _ROW_OR_TABLE_END.search(self.buffer, self.pos)
+        if not match:
+            return False
+        if match.group() == b'</table:table>':
+            self.held = _shrink_rows(self.held, self.new_count)
+            if self.buffer[self.pos:match.start()].strip():
+                # Structural markup (a closing row group) after the last row
+                out.extend(self.held)
+                out.append(self.buffer[self.emit_start:match.start()])
+                out.append(self.new_rows)
+                out.append(_MARK)
+            else:
+                out.append(self.buffer[self.emit_start:self.pos])
+                out.append(self.new_rows)
+                out.append(_MARK)
+                out.extend(self.held)
+                out.append(self.buffer[self.pos:match.start()])
+            self.held = []
+            self.pos = self.emit_start = match.start()
+            self.inserted = True
+            self.state = 'after'
+            return True
+        row_start = _ROW_START.search(self.buffer, self.pos, match.start())
+        row_start = row_start.start() if row_start else match.start()
+        if _ROW_CONTENT.search(self.buffer, row_start, match.end()):
+            # Empty rows followed by content are not trailing after all
+            out.extend(self.held)
+            self.held = []
+        else:
+            if row_start > self.pos and self.held:
+                out.extend(self.held)
+                self.held = []
+            out.append(self.buffer[self.emit_start:row_start])
+            self.held.append(self.buffer[row_start:match.end()])
+            self.emit_start = match.end()
+        self.pos = match.end()
+        return True
+
+    def _after(self, out):
+        self.pos = len(self.buffer)
+        return False
+
+def _shrink_rows(rows, count):
+    """Empty rows (XML of each) with count fewer rows, taken from the last ones."""
+    rows = list(rows)
+    while count > 0 and rows:
+        row = rows[-1]
+        repeated = _ROWS_REPEATED.search(row, 0, row.index(b'>'))
+        repeat = int(repeated.group(1)) if repeated else 1
+        if repeat > count:
+            left = b'' if repeat - count == 1 else b' table:number-rows-repeated="%d"' % (repeat - count)
+            rows[-1] = row[:repeated.start()] + left + row[repeated.end():]
+            return rows
+        rows.pop()
+        count -= repeat
+    return rows
+
+# Namespaces a single row is parsed with when rows are removed
+_ROW_DOCUMENT = (b'<r xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"'
+                 b' xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"'
+                 b' xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"'
+                 b' xmlns:style="urn:oasis:names:tc:opendocument:xmlns:style:1.0"'
+                 b' xmlns:fo="urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0"'
+                 b' xmlns:xlink="http://www.w3.org/1999/xlink"'
+                 b' xmlns:draw="urn:oasis:names:tc:opendocument:xmlns:drawing:1.0"'
+                 b' xmlns:svg="urn:oasis:names:tc:opendocument:xmlns:svg-compatible:1.0"'
+                 b' xmlns:dc="http://purl.org/dc/elements/1.1/"'
+                 b' xmlns:of="urn:oasis:names:tc:opendocument:xmlns:of:1.2"'
+                 b' xmlns:calcext="urn:org:documentfoundation:names:experimental:calc:xmlns:calcext:1.0"'
+                 b' xmlns:loext="urn:org:documentfoundation:names:experimental:office:xmlns:loext:1.0">%s</r>')
+
+class _RowFilter(_ContentSplicer):
+    """
+    Streaming filter for content.xml that drops the rows of sheet_name whose
+    values match predicate (at most limit of them) and collects those values in
+    `removed`. Calls sink.mark() at the end of the sheet like _ContentSplicer.
+    A row standing for repeated rows (number-rows-repeated, as Calc saves
+    identical consecutive rows) counts as that many rows: the matching copies
+    are removed by lowering its repeat count. Rows that do not parse are kept.
+    """
+    def __init__(self, sheet_name, predicate, sink, limit=None):
+        super().__init__(sheet_name, b'', sink)
+        self.predicate = predicate
+        self.limit = limit
+        self.removed = []
+
+    def _before(self, out):
+        match = _TABLE_START.search(self.buffer, self.pos)
+        if match and match.group().startswith(b'</'):
+            raise KeyError(f"no sheet named {self.sheet_name!r}")
+        return super()._before(out)
+
+    def _inside(self, out):
+        match = _ROW_OR_TABLE_END.search(self.buffer, self.pos)
+        if not match:
+            return False
+        if match.group() == b'</table:table>':
+            out.append(self.buffer[self.emit_start:match.start()])
+            out.append(_MARK)
+            self.pos = self.emit_start = match.start()
+            self.inserted = True
+            self.state = 'after'
+            return True
+        row_start = _ROW_START.search(self.buffer, self.pos, match.start())
+        if row_start:
+            kept = self._filter(self.buffer[row_start.start():match.end()])
+            if kept is not None:
+                out.append(self.buffer[self.emit_start:row_start.start()])
+                out.append(kept)
+                self.emit_start = match.end()
+        self.pos = match.end()
+        return True
+
+    def _filter(self, row_xml):
+        """What replaces row_xml: None to keep it, b'' to drop it, else the row with fewer repeats."""
+        if self.limit is not None and len(self.removed) >= self.limit:
+            return None
+        from xml.etree.ElementTree import ParseError, fromstring
+        from ods_reader import MAX_REPEAT, row_values
+        try:
+            values = row_values(fromstring(_ROW_DOCUMENT % row_xml)[0])
+        except ParseError:
+            return None
+        if not values:
+            return None
+        tag_end = row_xml.index(b'>')
+        repeated = _ROWS_REPEATED.search(row_xml, 0, tag_end)
+        # ods_reader reads at most MAX_REPEAT copies, the rest are never matched
+        repeat = int(repeated.group(1)) if repeated else 1
+        count = 0
+        while count < min(repeat, MAX_REPEAT) and (self.limit is None or len(self.removed) < self.limit):
+            if not self.predicate(values):
+                break
+            self.removed.append(list(values))
+            count += 1
+        if not count:
+            return None
+        if count == repeat:
+            return b''
+        left = b'' if repeat - count == 1 else b' table:number-rows-repeated="%d"' % (repeat - count)
+        return row_xml[:repeated.start()] + left + row_xml[repeated.end():]
+
+class _DeflateSink:
+    """
+    Raw deflate writer for content.xml that keeps the running CRC and sizes.
+    mark() makes a full flush, after which the stream can be continued from
+    scratch, and records that point as the next append hint.
+    """
+    def __init__(self, offset=0, size=0, crc=0):
+        self.compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+        self.chunks = []
+        self.offset = offset  # compressed bytes so far, including a copied prefix
+        self.size = size
+        self.crc = crc
+        self.flush_point = None
+
+    def write(self, data):
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        self._add(self.compressor.compress(data))
+
+    def mark(self):
+        self._add(self.compressor.flush(zlib.Z_FULL_FLUSH))
+        self.flush_point = (self.offset, self.size, self.crc)
+
+    def close(self):
+        self._add(self.compressor.flush())
+
+    def _add(self, data):
+        if data:
+            self.chunks.append(data)
+            self.offset += len(data)
+
+def _splice(sink, sheet_name, rows, chunks, inside=False):
+    rows = list(rows)
+    splicer = _ContentSplicer(sheet_name, rows_xml(rows), sink, inside, len(rows))
+    for chunk in chunks:
+        splicer.feed(chunk)
+    splicer.finish()
+    sink.close()
+    return sink
+
+def _read_raw(zin, info, start=0, end=None):
+    """Yield the compressed bytes [start, end) of a zip member."""
+    zin.fp.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(zin.fp.read(_LOCAL_HEADER.size))
+    zin.fp.seek(info.header_offset + _LOCAL_HEADER.size + header[9] + header[10] + start)
+    remaining = (info.compress_size if end is None else end) - start
+    while remaining > 0:
+        chunk = zin.fp.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"{info.filename} is truncated")
+        remaining -= len(chunk)
+        yield chunk
+
+def _read_member(zin, info):
+    with zin.open(info) as src:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+def _inflate_tail(zin, info, offset):
+    """Decompress a deflated member from a full flush point on."""
+    inflater = zlib.decompressobj(-15)
+    for chunk in _read_raw(zin, info, offset):
+        yield inflater.decompress(chunk)
+    yield inflater.flush()
+    if not inflater.eof:
+        raise zlib.error(f"{info.filename} ends inside the deflate stream")
+
+def _new_info(template, extra=b''):
+    info = zipfile.ZipInfo(template.filename, template.date_time)
+    info.compress_type = template.compress_type
+    info.external_attr = template.external_attr
+    info.comment = template.comment
+    # Sizes go in the local header, there is no data descriptor after the data
+    info.flag_bits = template.flag_bits & ~0x08
+    info.extra = extra
+    return info
+
+def _write_raw(zout, info, pieces):
+    """Write a member whose CRC, sizes and compressed bytes are already known."""
+    info.header_offset = zout.fp.tell()
+    zout.fp.write(info.FileHeader())
+    for piece in pieces:
+        zout.fp.write(piece)
+    # What ZipFile does itself when a member written through open('w') is closed
+    zout.filelist.append(info)
+    zout.NameToInfo[info.filename] = info
+    zout.start_dir = zout.fp.tell()
+    zout._didModify = True
+
+def _copy_raw(zin, zout, info):
+    new_info = _new_info(info, zipfile._strip_extra(info.extra, (1,)))  # drop zip64 sizes
+    new_info.CRC, new_info.compress_size, new_info.file_size = info.CRC, info.compress_size, info.file_size
+    _write_raw(zout, new_info, _read_raw(zin, info))
+
+def _read_hint(info, sheet_name):
+    """Return the flush point stored on content.xml if it is still valid for sheet_name."""
+    extra = info.extra
+    while len(extra) >= 4:
+        tag, size = struct.unpack('<HH', extra[:4])
+        if tag == _HINT_ID and size == _HINT.size:
+            crc, compress_size, sheet_crc, *flush_point = _HINT.unpack(extra[4:4 + size])
+            if (crc == info.CRC and compress_size == info.compress_size
+                    and info.compress_type == zipfile.ZIP_DEFLATED
+                    and sheet_crc == zlib.crc32(sheet_name.encode('utf-8'))):
+                return tuple(flush_point)
+            return None
+        extra = extra[4 + size:]
+    return None
+
+def _write_content(zout, template, sheet_name, sink, prefix=()):
+    payload = _HINT.pack(sink.crc, sink.offset, zlib.crc32(sheet_name.encode('utf-8')), *sink.flush_point)
+    info = _new_info(template, struct.pack('<HH', _HINT_ID, len(payload)) + payload)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.CRC, info.compress_size, info.file_size = sink.crc, sink.offset, sink.size
+    _write_raw(zout, info, itertools.chain(prefix, sink.chunks))
+
+def _append_content(zin, zout, info, sheet_name, rows):
+    flush_point = _read_hint(info, sheet_name)
+    if flush_point:
+        try:
+            sink = _splice(_DeflateSink(*flush_point), sheet_name, rows,
+                           _inflate_tail(zin, info, flush_point[0]), inside=True)
+            _write_content(zout, info, sheet_name, sink, _read_raw(zin, info, 0, flush_point[0]))
+            return
+        except (zlib.error, ValueError):
+            pass  # the hint does not fit the data after all, splice the whole file
+    sink = _splice(_DeflateSink(), sheet_name, rows, _read_member(zin, info))
+    _write_content(zout, info, sheet_name, sink)
+
+def _user_defined(name):
+    return re.compile(rb'<meta:user-defined meta:name=' + re.escape(quoteattr(name).encode('utf-8'))
+                      + rb'[^>]*?(?:/>|>(.*?)</meta:user-defined>)', re.S)
+
+def set_user_properties(meta, properties):
+    """Return meta.xml with the custom document properties (File > Properties > Custom) set."""
+    for name, value in properties.items():
+        element = (b'<meta:user-defined meta:name=' + quoteattr(name).encode('utf-8') + b'>'
+                   + escape(str(value)).encode('utf-8') + b'</meta:user-defined>')
+        meta, count = _user_defined(name).subn(lambda match: element, meta, count=1)
+        if not count:
+            meta = meta.replace(b'<office:meta/>', b'<office:meta></office:meta>', 1)
+            meta = meta.replace(b'</office:meta>', element + b'</office:meta>', 1)
+    return meta
+
+def read_user_property(path, name):
+    """Value of a custom document property of the ODS file at path, or None."""
+    try:
+        with zipfile.ZipFile(path) as z:
+            meta = z.read('meta.xml')
+    except (FileNotFoundError, KeyError):
+        return None
+    match = _user_defined(name).search(meta)
+    return unescape(match.group(1).decode('utf-8')) if match and match.group(1) is not None else None
+
+def _rewrite_member(zout, info, data):
+    new_info = _new_info(info)
+    new_info.compress_type = zipfile.ZIP_DEFLATED
+    zout.writestr(new_info, data)
+
+def append_rows(path, sheet_name, rows, properties=None):
+    """
+    Append rows (lists of cell values) to sheet_name in the ODS file at path,
+    creating the file if needed. properties are stored as custom document
+    properties in the same write. The file is replaced atomically.
+    """
+    if not os.path.exists(path):
+        create_ods(path, sheet_name, rows, properties)
+        return
+    tmp_path = path + '.tmp'
+    try:
+        with zipfile.ZipFile(path) as zin, zipfile.ZipFile(tmp_path, 'w') as zout:
+            add_meta = properties and 'meta.xml' not in zin.NameToInfo
+            for info in zin.infolist():
+                if info.filename == 'content.xml':
+                    _append_content(zin, zout, info, sheet_name, rows)
+                elif info.filename == 'meta.xml' and properties:
+                    _rewrite_member(zout, info, set_user_properties(zin.read(info), properties))
+                elif info.filename == 'META-INF/manifest.xml' and add_meta:
+                    manifest = zin.read(info).replace(b'</manifest:manifest>', _META_ENTRY + b'</manifest:manifest>', 1)
+                    _rewrite_member(zout, info, manifest)
+                else:
+                    _copy_raw(zin, zout, info)
+            if add_meta:
+                zout.writestr('meta.xml', set_user_properties(_META, properties), zipfile.ZIP_DEFLATED)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def remove_rows(path, sheet_name, predicate, limit=None):
+    """
+    Remove the rows of sheet_name whose values (as ods_reader reads them)
+    match predicate, at most limit of them, keeping everything else in the file.
+    Returns the removed rows; the file is only replaced if there were any.
+    """
+    tmp_path = path + '.tmp'
+    try:
+        with zipfile.ZipFile(path) as zin, zipfile.ZipFile(tmp_path, 'w') as zout:
+            for info in zin.infolist():
+                if info.filename != 'content.xml':
+                    _copy_raw(zin, zout, info)
+                    continue
+                sink = _DeflateSink()
+                row_filter = _RowFilter(sheet_name, predicate, sink, limit)
+                for chunk in _read_member(zin, info):
+                    row_filter.feed(chunk)
+                row_filter.finish()
+                sink.close()
+                _write_content(zout, info, sheet_name, sink)
+        if row_filter.removed:
+            os.replace(tmp_path, path)
+        return row_filter.removed
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+_MANIFEST = b'''<?xml version="1.0" encoding="UTF-8"?>
+<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2"><manifest:file-entry manifest:full-path="/" manifest:media-type="application/vnd.oasis.opendocument.spreadsheet"/><manifest:file-entry manifest:full-path="meta.xml" manifest:media-type="text/xml"/><manifest:file-entry manifest:full-path="styles.xml" manifest:media-type="text/xml"/><manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/></manifest:manifest>'''
+
+_META_ENTRY = b'<manifest:file-entry manifest:full-path="meta.xml" manifest:media-type="text/xml"/>'
+
+_META = b'''<?xml version="1.0" encoding="UTF-8"?>
+<office:document-meta xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:meta="urn:oasis:names:tc:opendocument:xmlns:meta:1.0" office:version="1.2"><office:meta><meta:generator>BrowserToCalc</meta:generator></office:meta></office:document-meta>'''
+
+_STYLES = b'''<?xml version="1.0" encoding="UTF-8"?>
+<office:document-styles xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" office:version="1.2"/>'''
+
+_CONTENT = b'''<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" office:version="1.2"><office:body><office:spreadsheet></office:spreadsheet></office:body></office:document-content>'''
+
+def create_ods(path, sheet_name, rows=(), properties=None):
+    """
+    Write a new minimal ODS file holding one sheet. rows may be any iterable,
+    it is consumed in batches without building the sheet in memory.
+    """
+    tmp_path = path + '.tmp'
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+            # mimetype must come first and be stored uncompressed
+            zout.writestr('mimetype', _ODS_MIMETYPE, compress_type=zipfile.ZIP_STORED)
+            zout.writestr('META-INF/manifest.xml', _MANIFEST)
+            zout.writestr('meta.xml', set_user_properties(_META, properties or {}))
+            zout.writestr('styles.xml', _STYLES)
+            # Written like an appended file so the next append takes the fast path
+            template = zipfile.ZipInfo('content.xml', time.localtime()[:6])
+            template.external_attr = 0o600 << 16
+            sink = _DeflateSink()
+            head, tail = _CONTENT.split(b'</office:spreadsheet>')
+            sink.write(head + b'<table:table table:name=' + quoteattr(sheet_name).encode('utf-8') + b'>')
+            rows = iter(rows)
+            while True:
+                batch = list(itertools.islice(rows, 1000))
+                if not batch:
+                    break
+                sink.write(rows_xml(batch))
+            sink.mark()
+            sink.write(b'</table:table></office:spreadsheet>' + tail)
+            sink.close()
+            _write_content(zout, template, sheet_name, sink)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
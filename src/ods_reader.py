@@ -0,0 +1,169 @@
+# ods_reader.py
+# Streaming reader for one sheet of an ODS spreadsheet.
+#
+# content.xml is decompressed and parsed incrementally (ElementTree.iterparse),
+# and every row element is removed from the tree once its values are read, so
+# memory stays flat however long the sheet is. Rows come out like
+# pyexcel_ods3.get_data() returns them: typed values (int/float, bool, date,
+# str), trailing empty cells dropped, empty rows kept only between rows with data.
+#
+# Also a command line exporter:
+#   python ods_reader.py [path] [--sheet Sheet1] [--format csv|jsonl] [--output file]
+
+import datetime
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+_TABLE = "urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+_OFFICE = "urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+_TEXT = "urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+
+TABLE_TAG = f"{{{_TABLE}}}table"
+ROW_TAG = f"{{{_TABLE}}}table-row"
+CELL_TAGS = (f"{{{_TABLE}}}table-cell", f"{{{_TABLE}}}covered-table-cell")
+NAME_ATTR = f"{{{_TABLE}}}name"
+ROWS_REPEATED = f"{{{_TABLE}}}number-rows-repeated"
+COLUMNS_REPEATED = f"{{{_TABLE}}}number-columns-repeated"
+VALUE_TYPE = f"{{{_OFFICE}}}value-type"
+
+# Calc pads sheets with huge repeat counts; expanding those would defeat streaming
+MAX_REPEAT = 1000
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+def _date(text):
+    if 'T' in text:
+        return datetime.datetime.fromisoformat(text)
+    return datetime.date.fromisoformat(text)
+
+_VALUE_ATTRS = {
+    "float": (f"{{{_OFFICE}}}value", _number),
+    "percentage": (f"{{{_OFFICE}}}value", _number),
+    "currency": (f"{{{_OFFICE}}}value", _number),
+    "boolean": (f"{{{_OFFICE}}}boolean-value", lambda text: text == "true"),
+    "date": (f"{{{_OFFICE}}}date-value", _date),
+    "time": (f"{{{_OFFICE}}}time-value", str),
+}
+
+def _paragraph_text(element):
+    """Text of a <text:p> with spaces, tabs and line breaks expanded."""
+    parts = [element.text or ""]
+    for child in element:
+        tag = child.tag
+        if tag == f"{{{_TEXT}}}s":
+            parts.append(" " * int(child.get(f"{{{_TEXT}}}c", "1")))
+        elif tag == f"{{{_TEXT}}}tab":
+            parts.append("\t")
+        elif tag == f"{{{_TEXT}}}line-break":
+            parts.append("\n")
+        else:
+            parts.append(_paragraph_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+def cell_value(cell):
+    """Typed value of a table cell ("" when empty)."""
+    value_type = cell.get(VALUE_TYPE)
+    if value_type in _VALUE_ATTRS:
+        attr, convert = _VALUE_ATTRS[value_type]
+        text = cell.get(attr)
+        if text is not None:
+            try:
+                return convert(text)
+            except ValueError:
+                pass
+    return "\n".join(_paragraph_text(p) for p in cell.iter(f"{{{_TEXT}}}p"))
+
+def row_values(row):
+    """Values of a <table:table-row> element, trailing empty cells dropped."""
+    values = []
+    empty = 0  # empty cells not yet known to be followed by data
+    for cell in row:
+        if cell.tag not in CELL_TAGS:
+            continue
+        value = cell_value(cell)
+        repeat = int(cell.get(COLUMNS_REPEATED, "1"))
+        if value == "":
+            empty += repeat
+            continue
+        values.extend([""] * empty)
+        empty = 0
+        values.extend([value] * min(repeat, MAX_REPEAT))
+    return values
+
+def iter_rows(path, sheet_name):
+    """Yield the rows of sheet_name in the ODS file at path, one list at a time."""
+    with zipfile.ZipFile(path) as z, z.open("content.xml") as content:
+        stack = []
+        inside = False
+        found = False
+        empty_rows = 0
+        for event, element in iterparse(content, events=("start", "end")):
+            if event == "start":
+                stack.append(element)
+                if element.tag == TABLE_TAG and element.get(NAME_ATTR) == sheet_name:
+                    inside = found = True
+                continue
+            stack.pop()
+            if element.tag == ROW_TAG:
+                if inside:
+                    values = row_values(element)
+                    repeat = int(element.get(ROWS_REPEATED, "1"))
+                    if values:
+                        yield from [[] for _ in range(empty_rows)]
+                        empty_rows = 0
+                        for _ in range(min(repeat, MAX_REPEAT)):
+                            yield list(values)
+                    else:
+                        empty_rows += repeat
+                # Done with the row: drop it so the tree never grows
+                if stack:
+                    stack[-1].remove(element)
+            elif element.tag == TABLE_TAG:
+                if inside:
+                    return
+                if stack:
+                    stack[-1].remove(element)
+        if not found:
+            raise KeyError(f"no sheet named {sheet_name!r}")
+
+def _jsonable(value):
+    return value.isoformat() if isinstance(value, (datetime.date, datetime.datetime)) else value
+
+def export(path, sheet_name, out, fmt="csv"):
+    """Write the rows of sheet_name to the text stream out as CSV or JSON lines; returns the row count."""
+    count = 0
+    if fmt == "csv":
+        import csv
+        writer = csv.writer(out)
+        for count, row in enumerate(iter_rows(path, sheet_name), 1):
+            writer.writerow(row)
+    elif fmt == "jsonl":
+        import json
+        for count, row in enumerate(iter_rows(path, sheet_name), 1):
+            out.write(json.dumps([_jsonable(value) for value in row], ensure_ascii=False) + "\n")
+    else:
+        raise ValueError(f"unknown format {fmt!r}")
+    return count
+
+def main(argv=None):
+    import argparse
+    import sys
+    from Functions import ODS_PATH, SHEET_NAME
+    parser = argparse.ArgumentParser(description="Export one sheet of an ODS file as CSV or JSON lines")
+    parser.add_argument("path", nargs="?", default=ODS_PATH)
+    parser.add_argument("--sheet", default=SHEET_NAME)
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("--output", help="file to write (default: stdout)")
+    args = parser.parse_args(argv)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            count = export(args.path, args.sheet, out, args.format)
+    else:
+        count = export(args.path, args.sheet, sys.stdout, args.format)
+    print(f"{count} rows", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# site_registry.py
+# Maps page URLs to the streaming-site handler that parses them.
+#
+# Sites are keyed by the host label that identifies them ("netflix" for
+# www.netflix.com, "fsmirror" for fsmirror7.to), so routing is one dict lookup per
+# host label. Each handler's parser module is imported the first time its site is
+# seen, so registering another site costs nothing at startup or for other sites.
+
+import importlib
+import re
+import urllib.parse
+
+class SiteHandler:
+    """
+    A registered site: the parser module/function and the dialog texts.
+    parse() returns (title, image_url); either may be None.
+    """
+    def __init__(self, key, module, function, prompt, label):
+        self.key = key
+        self.module = module
+        self.function = function
+        self.prompt = prompt
+        self.label = label
+        self._parser = None
+
+    def parse(self, url, **kwargs):
+        if self._parser is None:
+            self._parser = getattr(importlib.import_module(self.module), self.function)
+        result = self._parser(url, **kwargs)
+        # Parsers return either (title, image_url) or just the image URL
+        if isinstance(result, tuple):
+            return result
+        return None, result
+
+_SITES = {}
+
+def register_site(key, module, function, prompt, label):
+    """Register a site handler under the host label `key`."""
+    _SITES[key] = SiteHandler(key, module, function, prompt, label)
+    return _SITES[key]
+
+def get_site(key):
+    return _SITES.get(key)
+
+def host_keys(url):
+    """Host labels of url with trailing mirror numbers removed (fsmirror7 -> fsmirror)."""
+    host = urllib.parse.urlparse(url).hostname or ''
+    return [re.sub(r'\d+$', '', label) for label in host.split('.') if label]
+
+def find_site(url):
+    """Return the SiteHandler for url, or None for pages without a site parser."""
+    for key in host_keys(url):
+        site = _SITES.get(key)
+        if site:
+            return site
+    return None
+
+def route_message(msg):
+    """
+    Return the SiteHandler for a native message, or None for plain entries.
+    Messages name their site ({"site": "netflix"}); older extension builds send
+    a flag per site ({"netflix": true}). Without either the site is found from
+    the URL's host.
+    """
+    if not msg.get('url'):
+        return None
+    if 'site' in msg:
+        key = msg['site']
+    else:
+        key = next((k for k in _SITES if msg.get(k) is True), None)
+        if key is None:
+            return find_site(msg['url'])
+    return _SITES.get(key) if key else None
+
+register_site("netflix", "netflix_parse", "parse_netflix_url", "Folgen", "Netflix-Eintrag")
+register_site("fsmirror", "fsmirror", "parse_fsmirror_url", "FSMirror", "FSMirror-Eintrag")
@@ -0,0 +1,158 @@
+# storage.py
+# Where journaled rows end up (see journal.py).
+#
+# Every backend offers the same four calls:
+#   add_rows(rows, checkpoint)  store rows and the journal seq they came from,
+#                               atomically, so a replayed journal line is skipped
+#   checkpoint()                the last stored journal seq (0 if none)
+#   rows()                      iterate over all rows in insertion order
+#   stamp()                     a JSON value that changes whenever the rows change
+#
+# OdsStorage writes straight into the spreadsheet. SqliteStorage keeps the rows
+# in an indexed SQLite database (WAL mode) and export_ods() regenerates the
+# spreadsheet from it in one streaming pass.
+
+import datetime
+import os
+import sqlite3
+from ods_append import append_rows, create_ods, read_user_property
+from ods_reader import iter_rows
+
+CHECKPOINT_PROPERTY = "BrowserToCalc journal seq"
+COLUMNS = ("titel", "episode", "seen_on", "url", "more", "cover")
+
+class OdsStorage:
+    """Rows appended to sheet_name of the ODS file at ods_path."""
+    def __init__(self, ods_path, sheet_name):
+        self.ods_path = ods_path
+        self.sheet_name = sheet_name
+
+    def add_rows(self, rows, checkpoint=None):
+        properties = {CHECKPOINT_PROPERTY: checkpoint} if checkpoint is not None else None
+        append_rows(self.ods_path, self.sheet_name, rows, properties)
+
+    def checkpoint(self):
+        value = read_user_property(self.ods_path, CHECKPOINT_PROPERTY)
+        return int(value) if value else 0
+
+    def rows(self):
+        if not os.path.exists(self.ods_path):
+            return
+        try:
+            yield from iter_rows(self.ods_path, self.sheet_name)
+        except KeyError:
+            return  # no such sheet yet
+
+    def stamp(self):
+        try:
+            stat = os.stat(self.ods_path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def close(self):
+        pass
+
+def iso_date(seen_on):
+    """'24.12.2025' -> '2025-12-24' for the date index; None if it is not such a date."""
+    try:
+        return datetime.datetime.strptime(seen_on, '%d.%m.%Y').date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+class SqliteStorage:
+    """
+    Rows in the SQLite database at db_path, indexed by title and date. On
+    first use the rows already in import_from (an OdsStorage) are copied in.
+    """
+    def __init__(self, db_path, import_from=None):
+        self.db_path = db_path
+        self.import_from = import_from
+        self._db = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            with self._db:
+                self._db.executescript("""
+                    CREATE TABLE IF NOT EXISTS entries (
+                        id INTEGER PRIMARY KEY,
+                        titel TEXT NOT NULL, episode TEXT, seen_on TEXT, url TEXT, more TEXT, cover TEXT,
+                        seen_date TEXT);
+                    CREATE INDEX IF NOT EXISTS entries_titel ON entries (titel COLLATE NOCASE);
+                    CREATE INDEX IF NOT EXISTS entries_seen_date ON entries (seen_date);
+                    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                """)
+            if self.import_from is not None and self._meta("imported") is None:
+                self._import(self.import_from)
+        return self._db
+
+    def add_rows(self, rows, checkpoint=None):
+        with self.db:
+            self._insert(rows)
+            if checkpoint is not None:
+                self._set_meta("checkpoint", checkpoint)
+
+    def checkpoint(self):
+        value = self._meta("checkpoint")
+        return int(value) if value else 0
+
+    def rows(self):
+        for row in self.db.execute(f"SELECT {', '.join(COLUMNS)} FROM entries ORDER BY id"):
+            yield ["" if value is None else value for value in row]
+
+    def stamp(self):
+        (last_id,) = self.db.execute("SELECT max(id) FROM entries").fetchone()
+        return ["sqlite", self.checkpoint(), last_id]
+
+    def find_title(self, titel):
+        """Rows for titel (case-insensitive) in insertion order, via the title index."""
+        cursor = self.db.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM entries WHERE titel = ? COLLATE NOCASE ORDER BY id", (titel,))
+        return [list(row) for row in cursor]
+
+    def seen_between(self, first, last):
+        """Rows seen between two ISO dates (inclusive), via the date index."""
+        cursor = self.db.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM entries WHERE seen_date BETWEEN ? AND ? ORDER BY seen_date, id",
+            (first, last))
+        return [list(row) for row in cursor]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _insert(self, rows):
+        self._db.executemany(
+            f"INSERT INTO entries ({', '.join(COLUMNS)}, seen_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (_values(row) for row in rows))
+
+    def _import(self, source):
+        with self._db:
+            self._insert(row for row in source.rows() if row)
+            self._set_meta("checkpoint", max(self.checkpoint(), source.checkpoint()))
+            self._set_meta("imported", source.ods_path)
+
+    def _meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+def _values(row):
+    """A sheet row as the column values of entries, padded to all columns."""
+    values = [str(value) for value in list(row)[:len(COLUMNS)]]
+    values += [""] * (len(COLUMNS) - len(values))
+    return values + [iso_date(values[2])]
+
+def export_ods(storage, ods_path, sheet_name):
+    """
+    Regenerate the spreadsheet from storage in one streaming pass. The file is
+    replaced atomically and holds the storage checkpoint, so it can serve as an
+    OdsStorage again.
+    """
+    create_ods(ods_path, sheet_name, storage.rows(), {CHECKPOINT_PROPERTY: storage.checkpoint()})
@@ -0,0 +1,44 @@
+# thumb_cache.py
+# Poster thumbnails as the dialog shows them, cached on disk.
+#
+# The dialog scales every poster to THUMB_HEIGHT pixels. The scaled image is
+# stored as a PNG named after the SHA-256 of its URL, so showing the same cover
+# again is one small file read: no download, no decoding of the full image and
+# no scaling. Reading a thumbnail touches it; past THUMB_MAX_BYTES the least
+# recently used thumbnails are removed.
+
+import hashlib
+import os
+from disk_cache import cache_dir, evict_lru
+
+THUMB_DIR = cache_dir("thumbs")
+THUMB_HEIGHT = 160
+THUMB_MAX_BYTES = 16 * 1024 * 1024
+
+def thumb_path(url, directory=None):
+    name = hashlib.sha256(url.encode("utf-8")).hexdigest() + ".png"
+    return os.path.join(directory or THUMB_DIR, name)
+
+def cached_thumbnail(url, directory=None):
+    """Path of the stored thumbnail for url, or None."""
+    path = thumb_path(url, directory)
+    try:
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+def store_thumbnail(url, image, directory=None, max_bytes=None):
+    """
+    Save the scaled QImage for url (a QImage, not a QPixmap, so it can be
+    stored off the GUI thread); returns its path, or None if Qt could not write it.
+    """
+    directory = directory or THUMB_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = thumb_path(url, directory)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if not image.save(tmp_path, "PNG"):
+        return None
+    os.replace(tmp_path, path)
+    evict_lru(directory, ".png", max_bytes or THUMB_MAX_BYTES)
+    return path
@@ -0,0 +1,147 @@
+# uno_storage.py
+# Writes rows into the spreadsheet while it is open in LibreOffice Calc.
+#
+# Calc keeps an open document in memory and marks it with a lock file next to
+# it (.~lock.MeineAblage.ods#); rewriting the file then either fails or is lost
+# on Calc's next save. CalcStorage sees the lock file and appends the rows to the
+# open document instead, through a UNO connection to the running soffice, which
+# then stores the document itself. Calc has to listen for connections:
+#   soffice --accept="socket,host=localhost,port=2002;urp;"
+# The connection is kept for the life of the host. Without the lock file rows
+# go to the file as usual (ods_append.py). If the document is open but soffice
+# cannot be reached, add_rows() raises and the rows stay in the journal until
+# the next compaction.
+
+import os
+
+UNO_HOST = "localhost"
+UNO_PORT = 2002
+
+# com.sun.star.beans.PropertyAttribute.REMOVABLE
+_REMOVABLE = 128
+
+class DocumentOpen(RuntimeError):
+    """The spreadsheet is open in Calc, which cannot be reached over UNO."""
+
+def calc_lock_path(ods_path):
+    """The lock file Calc creates next to a document it has open."""
+    directory, name = os.path.split(os.path.abspath(ods_path))
+    return os.path.join(directory, f".~lock.{name}#")
+
+def open_in_calc(ods_path):
+    return os.path.exists(calc_lock_path(ods_path))
+
+def _cell_value(value):
+    if isinstance(value, bool):
+        return str(value)
+    return value if isinstance(value, (int, float)) else str(value)
+
+class CalcStorage:
+    """
+    OdsStorage (see storage.py) that goes through Calc while the file is open
+    there; reads always come from the file.
+    """
+    def __init__(self, storage, host=None, port=None):
+        self.storage = storage
+        self.ods_path = storage.ods_path
+        self.sheet_name = storage.sheet_name
+        self.host = host or UNO_HOST
+        self.port = port or UNO_PORT
+        self._desktop = None
+
+    def add_rows(self, rows, checkpoint=None):
+        if not open_in_calc(self.ods_path):
+            return self.storage.add_rows(rows, checkpoint)
+        self._live(lambda document: self._append(document, rows, checkpoint))
+
+    def checkpoint(self):
+        # Ahead of the file if storing the document failed after a write
+        if open_in_calc(self.ods_path):
+            try:
+                value = self._live(self._read_checkpoint)
+            except DocumentOpen:
+                value = None
+            if value:
+                return int(value)
+        return self.storage.checkpoint()
+
+    def rows(self):
+        return self.storage.rows()
+
+    def stamp(self):
+        return self.storage.stamp()
+
+    def close(self):
+        self._desktop = None
+        self.storage.close()
+
+    def _live(self, action):
+        """action(document) on the open document; reconnects once if the connection dropped."""
+        try:
+            document = self._document()
+        except Exception:
+            self._desktop = None  # soffice restarted since, or never connected
+            try:
+                document = self._document()
+            except Exception as e:
+                raise DocumentOpen(f"{self.ods_path} is open in Calc, which is not reachable: {e}") from e
+        if document is None:
+            raise DocumentOpen(f"{self.ods_path} is open in another Calc (or the lock file is stale); "
+                               f"start soffice with --accept or close the document")
+        try:
+            return action(document)
+        except Exception:
+            self._desktop = None
+            raise
+
+    def _connect(self):
+        import uno
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+        context = resolver.resolve(f"uno:socket,host={self.host},port={self.port};urp;StarOffice.ComponentContext")
+        return context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    def _document(self):
+        """The open document for ods_path, or None if this soffice does not have it."""
+        import uno
+        if self._desktop is None:
+            self._desktop = self._connect()
+        url = uno.systemPathToFileUrl(os.path.abspath(self.ods_path))
+        components = self._desktop.getComponents().createEnumeration()
+        while components.hasMoreElements():
+            document = components.nextElement()
+            if hasattr(document, "getURL") and document.getURL() == url:
+                return document
+        return None
+
+    def _append(self, document, rows, checkpoint):
+        sheets = document.getSheets()
+        if not sheets.hasByName(self.sheet_name):
+            sheets.insertNewByName(self.sheet_name, sheets.getCount())
+        sheet = sheets.getByName(self.sheet_name)
+        cursor = sheet.createCursor()
+        cursor.gotoEndOfUsedArea(False)
+        start = cursor.getRangeAddress().EndRow + 1
+        if start == 1 and not any(sheet.getCellRangeByPosition(0, 0, 63, 0).getDataArray()[0]):
+            start = 0  # empty sheet
+        if rows:
+            width = max(len(row) for row in rows)
+            data = tuple(tuple(_cell_value(value) for value in row) + ("",) * (width - len(row)) for row in rows)
+            sheet.getCellRangeByPosition(0, start, width - 1, start + len(rows) - 1).setDataArray(data)
+        if checkpoint is not None:
+            from storage import CHECKPOINT_PROPERTY
+            properties = document.getDocumentProperties().getUserDefinedProperties()
+            if properties.getPropertySetInfo().hasPropertyByName(CHECKPOINT_PROPERTY):
+                properties.setPropertyValue(CHECKPOINT_PROPERTY, str(checkpoint))
+            else:
+                properties.addProperty(CHECKPOINT_PROPERTY, _REMOVABLE, str(checkpoint))
+        # Calc writes the file, with the user's own edits
+        document.store()
+
+    @staticmethod
+    def _read_checkpoint(document):
+        from storage import CHECKPOINT_PROPERTY
+        properties = document.getDocumentProperties().getUserDefinedProperties()
+        if not properties.getPropertySetInfo().hasPropertyByName(CHECKPOINT_PROPERTY):
+            return None
+        return properties.getPropertyValue(CHECKPOINT_PROPERTY)
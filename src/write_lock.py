@@ -0,0 +1,83 @@
+# write_lock.py
+# Exclusive lock shared by all host processes, on a lock file next to the data.
+#
+# Chrome starts a host per click (or per connectNative port), so two processes
+# can write the journal or the spreadsheet at the same time. FileLock uses
+# msvcrt.locking on Windows and fcntl.flock elsewhere; the OS drops the lock when
+# a process dies, so a crashed host never leaves the files locked.
+
+import os
+import time
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+LOCK_SUFFIX = ".lock"
+POLL_SECONDS = 0.01
+
+class LockTimeout(TimeoutError):
+    """The lock was not acquired within the timeout."""
+
+class FileLock:
+    """
+    Cross-process lock on the file at path. Not reentrant. Usable as a context
+    manager (blocking), or through acquire(blocking=False) to try once.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def acquire(self, blocking=True, timeout=None):
+        """Returns True once locked, False if not blocking and the lock is taken."""
+        if self._fd is not None:
+            raise RuntimeError(f"{self.path} is already locked by this FileLock")
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_lock(fd):
+            if not blocking:
+                os.close(fd)
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                raise LockTimeout(f"could not lock {self.path} within {timeout} s")
+            time.sleep(POLL_SECONDS)
+        self._fd = fd
+        return True
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            if msvcrt:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def locked(self):
+        return self._fd is not None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    @staticmethod
+    def _try_lock(fd):
+        try:
+            if msvcrt:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
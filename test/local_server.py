@@ -0,0 +1,27 @@
+# local_server.py
+"""
+A threaded HTTP server on a free localhost port, for the tests that fetch
+through http_client and http_cache without going online.
+"""
+import contextlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class QuietHandler(BaseHTTPRequestHandler):
+    """Keep-alive request handler that does not log every request to stderr."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+@contextlib.contextmanager
+def serve(handler):
+    """Run handler (a BaseHTTPRequestHandler class) and yield the server's base URL."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_port}"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
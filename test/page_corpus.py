@@ -0,0 +1,50 @@
+# page_corpus.py
+"""
+Recorded pages of the supported sites (test/fixtures/pages) and an offline
+session that serves them, for the parser tests and benchmarks.
+
+Every page is stored gzipped; expected.json lists per page the site, the URL it
+is served under, what the site's parser must return and how much memory one
+parse may allocate at its peak. To add a capture, save the page as
+<site>_<what>.html.gz and add its entry. Variants of a capture (the same page
+with a block removed) are made from it on load, see DERIVED.
+"""
+import gzip
+import json
+import os
+import re
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'automation')))
+from fsmirror import parse_fsmirror_url
+from netflix_parse import parse_netflix_url
+from replay_captures import replay_session
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'pages')
+
+PARSERS = {"netflix": parse_netflix_url, "fsmirror": parse_fsmirror_url}
+
+_LD_JSON = re.compile(rb'<script[^>]*type="application/ld\+json"[^>]*>.*?</script>', re.S)
+
+# name -> (captured page, transform); listed in expected.json like the captures
+DERIVED = {
+    # A title page without its ld+json block, so the parser has to fall back to the state
+    "netflix_state_only.html.gz": ("netflix_title.html.gz", lambda page: _LD_JSON.sub(b'', page)),
+}
+
+def expected():
+    """name -> {"site", "url", "titel", "image_url", "peak_kb"}"""
+    with open(os.path.join(PAGES_DIR, 'expected.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+def load_page(name):
+    if name in DERIVED:
+        source, transform = DERIVED[name]
+        return transform(load_page(source))
+    with gzip.open(os.path.join(PAGES_DIR, name), 'rb') as f:
+        return f.read()
+
+def offline_session(names=None):
+    """An http_client.Session serving the corpus pages (all, or names) under their URLs."""
+    cases = expected()
+    return replay_session({cases[name]["url"]: load_page(name) for name in (names or cases)})
@@ -0,0 +1,101 @@
+# test_archive.py
+"""
+Tests for moving old rows to per-year archive files in archive.py
+"""
+import sys
+import os
+import zipfile
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import archive
+import ods_append
+from Functions import get_data, make_row, save_data
+from history_index import INDEX_SUFFIX, HistoryIndex
+from storage import OdsStorage
+from write_lock import FileLock
+
+
+def _sheet(tmp_path):
+    ods = str(tmp_path / "Ablage.ods")
+    save_data(ods, {"Sheet1": [
+        make_row("Dark", "S1E1", "30.12.2023", "https://a"),
+        make_row("Dark", "S1E2", "02.01.2024", "https://b"),
+        make_row("Note", "", "no date", ""),
+        make_row("Dark", "S1E3", "05.01.2025", "https://c"),
+    ], "Other": [["keep"]]})
+    return ods, FileLock(ods + ".lock")
+
+
+def test_rows_of_earlier_years_move_to_per_year_files(tmp_path):
+    ods, lock = _sheet(tmp_path)
+    assert archive.archive_old_rows(ods, "Sheet1", lock, cutoff_year=2025) == 2
+    data = get_data(ods)
+    assert [row[1] for row in data["Sheet1"]] == ["", "S1E3"]
+    assert data["Other"] == [["keep"]]
+    assert [row[1] for row in get_data(archive.archive_path(ods, 2023))["Sheet1"]] == ["S1E1"]
+    assert [row[1] for row in get_data(archive.archive_path(ods, 2024))["Sheet1"]] == ["S1E2"]
+    assert archive.archive_old_rows(ods, "Sheet1", lock, cutoff_year=2025) == 0
+    assert archive.last_checked(ods) is not None
+
+
+def test_rerun_after_crash_does_not_archive_twice(tmp_path, monkeypatch):
+    ods, lock = _sheet(tmp_path)
+
+    def crash(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(archive, "remove_rows", crash)
+    with pytest.raises(KeyboardInterrupt):
+        archive.archive_old_rows(ods, "Sheet1", lock, cutoff_year=2025)
+    monkeypatch.setattr(archive, "remove_rows", ods_append.remove_rows)
+    assert archive.archive_old_rows(ods, "Sheet1", lock, cutoff_year=2025) == 2
+    assert len(get_data(archive.archive_path(ods, 2023))["Sheet1"]) == 1
+    assert len(get_data(archive.archive_path(ods, 2024))["Sheet1"]) == 1
+
+
+def test_history_still_sees_archived_rows(tmp_path):
+    ods, lock = _sheet(tmp_path)
+    archive.archive_old_rows(ods, "Sheet1", lock, cutoff_year=2026, max_batches=1)
+    index = HistoryIndex(ods + INDEX_SUFFIX, OdsStorage(ods, "Sheet1"), base=lambda: archive.read_summary(ods))
+    assert index.seen_on(make_row("Dark", "S1E1", "", "https://a")) == "30.12.2023"
+    assert index.last_episode("dark") == "S1E3"
+
+
+def test_repeated_rows_leave_the_sheet_once(tmp_path):
+    ods = str(tmp_path / "Ablage.ods")
+    twice = make_row("Dark", "S1E1", "30.12.2020", "https://a")
+    ods_append.create_ods(ods, "Sheet1", [twice, make_row("Dark", "S1E2", "31.12.2020", "https://b"),
+                                          make_row("Dark", "S1E3", "02.01.2026", "https://c")])
+    # Two identical rows, saved by Calc as one row repeated twice
+    with zipfile.ZipFile(ods) as zin:
+        parts = {name: zin.read(name) for name in zin.namelist()}
+    parts["content.xml"] = parts["content.xml"].replace(
+        b"<table:table-row>", b'<table:table-row table:number-rows-repeated="2">', 1)
+    with zipfile.ZipFile(ods, "w") as zout:
+        for name, data in parts.items():
+            zout.writestr(name, data)
+    assert len(get_data(ods)["Sheet1"]) == 4
+    assert archive.archive_batch(ods, "Sheet1", cutoff_year=2026, batch_rows=3) == 3
+    assert [row[1] for row in get_data(ods)["Sheet1"]] == ["S1E3"]
+    assert archive.archive_batch(ods, "Sheet1", cutoff_year=2026, batch_rows=3) == 0
+    assert [row[1] for row in get_data(archive.archive_path(ods, 2020))["Sheet1"]] == ["S1E1", "S1E1", "S1E2"]
+    assert archive.last_checked(ods) is not None
+
+
+def test_rows_the_sheet_keeps_end_the_run_for_today(tmp_path, monkeypatch):
+    ods, lock = _sheet(tmp_path)
+    monkeypatch.setattr(archive, "remove_rows", lambda path, sheet, predicate, limit=None: [])
+    assert archive.archive_old_rows(ods, "Sheet1", lock, cutoff_year=2025) == 0
+    assert archive.last_checked(ods) is not None
+
+
+def test_archiving_restamps_the_index_without_a_rescan(tmp_path, monkeypatch):
+    ods, lock = _sheet(tmp_path)
+    storage = OdsStorage(ods, "Sheet1")
+    index = HistoryIndex(ods + INDEX_SUFFIX, storage, base=lambda: archive.read_summary(ods))
+    assert index.ready() is False and index.seen_on(make_row("Dark", "S1E1", "", "https://a"))
+    monkeypatch.setattr(storage, "rows", lambda: (_ for _ in ()).throw(AssertionError("sheet scanned")))
+    assert archive.archive_old_rows(ods, "Sheet1", lock, cutoff_year=2025, index=index) == 2
+    assert index.ready()
+    assert index.seen_on(make_row("Dark", "S1E2", "", "https://b")) == "02.01.2024"
+    assert index.last_episode("Dark") == "S1E3"
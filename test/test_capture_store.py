@@ -0,0 +1,87 @@
+# test_capture_store.py
+"""
+Tests for the sampled page captures in capture_store.py
+"""
+import sys
+import os
+import threading
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import capture_store
+import http_cache
+from capture_store import CaptureStore, load_capture
+from page_corpus import offline_session
+
+PAGE = b"<html><title>Dark</title>" + b"<p>x</p>" * 1000 + b"</html>"
+
+
+def test_capturing_is_off_by_default(monkeypatch):
+    monkeypatch.setattr(capture_store, "_store", None)
+    assert capture_store.CAPTURE_SAMPLE_RATE == 0
+    assert capture_store.capture("netflix", "https://www.netflix.com/title/1", PAGE) is False
+    assert capture_store._store is None  # no store, no writer thread
+
+
+def test_sampled_pages_are_written_compressed_once(tmp_path):
+    store = CaptureStore(str(tmp_path), sample_rate=1.0)
+    assert store.offer("netflix", "https://www.netflix.com/title/1", PAGE, complete=False)
+    assert store.offer("netflix", "https://www.netflix.com/title/1?trackId=2", PAGE)
+    store.flush()
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0].endswith(".capture.gz")
+    assert os.path.getsize(tmp_path / files[0]) < len(PAGE) // 10
+    meta, body = load_capture(str(tmp_path / files[0]))
+    assert body == PAGE
+    assert (meta["site"], meta["url"], meta["complete"]) == ("netflix", "https://www.netflix.com/title/1", False)
+    assert store.stats["stored"] == 1 and store.stats["duplicates"] == 1
+
+
+def test_unsampled_pages_are_not_queued(tmp_path):
+    store = CaptureStore(str(tmp_path), sample_rate=0.0)
+    assert not store.offer("netflix", "https://www.netflix.com/title/1", PAGE)
+    assert (store.stats["offered"], store.stats["queued"]) == (1, 0)
+    assert os.listdir(tmp_path) == []
+
+
+def test_oldest_captures_go_past_the_size_cap(tmp_path):
+    store = CaptureStore(str(tmp_path), sample_rate=1.0)
+    first = store.store({"site": "netflix", "url": "a"}, b"page one")
+    os.utime(first, (0, 0))
+    second = store.store({"site": "netflix", "url": "b"}, b"page two")
+    os.utime(second, (1, 1))
+    store.max_bytes = 2 * os.path.getsize(second) + 8
+    third = store.store({"site": "netflix", "url": "c"}, b"page six")
+    assert [path for path, _, _ in store.captures()] == [second, third]
+    assert store.stats["evictions"] == 1
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    monkeypatch.setattr(capture_store, "CAPTURE_QUEUE_SIZE", 1)
+    store = CaptureStore(str(tmp_path), sample_rate=1.0)
+    release = threading.Event()
+    write = store.store
+    monkeypatch.setattr(store, "store", lambda meta, body: release.wait(5) and write(meta, body))
+    results = [store.offer("netflix", f"https://www.netflix.com/title/{n}", PAGE + bytes([n])) for n in range(4)]
+    release.set()
+    store.flush()
+    assert results[0] and not results[-1]
+    assert store.stats["dropped"] >= 1
+    assert len(os.listdir(tmp_path)) == store.stats["stored"]
+
+
+@pytest.mark.parametrize("site, name", [("netflix", "netflix_title.html.gz"), ("fsmirror", "fsmirror_dvd.html.gz")])
+def test_parsers_offer_the_page_as_read(site, name, tmp_path, monkeypatch):
+    from page_corpus import PARSERS, expected
+    from replay_captures import replay_session
+    case = expected()[name]
+    store = CaptureStore(str(tmp_path / "captures"), sample_rate=1.0)
+    monkeypatch.setattr(capture_store, "_store", store)
+    monkeypatch.setattr(http_cache, "_cache", http_cache.HttpCache(str(tmp_path / "cache")))
+    PARSERS[site](case["url"], session=offline_session([name]))
+    store.flush()
+    [(path, meta, body)] = list(store.captures())
+    assert (meta["site"], meta["url"]) == (site, case["url"])
+    # Replaying the capture gives the same result
+    session = replay_session({meta["url"]: body})
+    http_cache.get_cache().clear()
+    assert PARSERS[site](case["url"], session=session) == (case["titel"], case["image_url"])
@@ -0,0 +1,115 @@
+# test_deadline.py
+"""
+Tests for the per-entry time budget in deadline.py and how the fetchers honour it
+"""
+import sys
+import os
+import time
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import http_cache
+import http_client
+import netflix_parse
+from deadline import Deadline, DeadlineExceeded
+from local_server import QuietHandler, serve
+
+
+class _Handler(QuietHandler):
+    def do_GET(self):
+        if self.path == "/hang":
+            time.sleep(3)  # a mirror that accepts the connection and never answers
+            return
+        # /trickle: answers at once, then sends a few bytes now and then
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(10 ** 6))
+        self.end_headers()
+        try:
+            for _ in range(30):
+                self.wfile.write(b"<p>" * 100)
+                self.wfile.flush()
+                time.sleep(0.1)
+        except OSError:
+            pass
+
+
+@pytest.fixture
+def server():
+    with serve(_Handler) as url:
+        yield url
+
+
+def test_unlimited_deadline_never_runs_out():
+    deadline = Deadline()
+    with deadline.stage("extract"):
+        assert deadline.check() is not None  # the stage budget still applies
+    assert Deadline(budgets={}).check() is None
+
+
+def test_stage_budget_runs_out_and_names_the_stage():
+    deadline = Deadline(10, budgets={"page": 0.05})
+    with deadline.stage("page"):
+        time.sleep(0.06)
+        with pytest.raises(DeadlineExceeded) as error:
+            deadline.check()
+    assert error.value.stage == "page" and deadline.exceeded == "page"
+    # Other stages still have time, and the spent time is kept
+    with deadline.stage("poster"):
+        assert deadline.check() > 0
+    assert deadline.spent["page"] >= 0.05
+    assert "budget used up in page" in deadline.report()
+
+
+def test_stage_budget_adds_up_over_repeated_entries():
+    deadline = Deadline(budgets={"page": 0.05})
+    for _ in range(2):
+        with deadline.stage("page"):
+            time.sleep(0.03)
+    with deadline.stage("page"):
+        with pytest.raises(DeadlineExceeded):
+            deadline.check()
+
+
+def test_request_budget_caps_every_stage():
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+    with deadline.stage("poster"):
+        with pytest.raises(DeadlineExceeded):
+            deadline.check()
+
+
+def test_hung_page_costs_at_most_the_budget(server, tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path))
+    deadline = Deadline(0.5)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        cache.scan(server + "/hang", http_client.Session(), netflix_parse.EXTRACTOR.scan(), deadline=deadline)
+    assert time.monotonic() - started < 1.5
+    assert deadline.exceeded == "page"
+
+
+def test_slow_body_stops_at_the_budget(server, tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path))
+    deadline = Deadline(0.5)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        cache.scan(server + "/trickle", http_client.Session(), netflix_parse.EXTRACTOR.scan(), deadline=deadline)
+    assert time.monotonic() - started < 1.5
+
+
+def test_parser_falls_back_when_out_of_time(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "_cache", http_cache.HttpCache(str(tmp_path)))
+    deadline = Deadline(0.5)
+    assert netflix_parse.parse_netflix_url(server + "/hang", session=http_client.Session(),
+                                           deadline=deadline) == (None, None)
+    assert deadline.exceeded == "page"
+
+
+def test_poster_download_honours_the_deadline(server):
+    deadline = Deadline(0.5)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        with deadline.stage("poster"):
+            http_client.fetch_bytes(server + "/trickle", session=http_client.Session(), deadline=deadline)
+    assert time.monotonic() - started < 1.5
+    assert deadline.exceeded == "poster"
@@ -0,0 +1,24 @@
+# test_disk_cache.py
+"""
+Tests for the shared cache directory and eviction helpers in disk_cache.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import disk_cache
+from disk_cache import cache_dir, evict_lru
+
+
+def test_caches_share_one_base_directory():
+    assert cache_dir("http") == os.path.join(disk_cache.BASE_DIR, "http")
+    assert os.path.basename(disk_cache.BASE_DIR) == "BrowserToCalc"
+
+
+def test_evict_lru_removes_least_recently_used_files_of_its_suffix(tmp_path):
+    for n, name in enumerate(["old.page", "used.page", "new.page", "other.png"]):
+        (tmp_path / name).write_bytes(b"x" * 100)
+        os.utime(tmp_path / name, (1000 + n, 1000 + n))
+    os.utime(tmp_path / "used.page")  # read since
+    assert evict_lru(str(tmp_path), ".page", 200) == 1
+    assert sorted(os.listdir(tmp_path)) == ["new.page", "other.png", "used.page"]
+    assert evict_lru(str(tmp_path / "missing"), ".page", 0) == 0
@@ -0,0 +1,52 @@
+# test_extract_engine.py
+"""
+Tests for the extraction rules in extract_engine.py and the site parsers' rule sets
+"""
+import sys
+import os
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import fsmirror
+import netflix_parse
+from extract_engine import Extractor
+from page_corpus import load_page
+
+
+def test_first_match_of_each_rule_across_chunks():
+    extractor = Extractor({"title": rb"<title>(?P<value>[^<]{0,100})</title>",
+                           "image": rb'<img src="(?P<value>[^"]{1,100})"'})
+    page = b'<img src="first.jpg"> <title>Dark</title> <img src="second.jpg"> <title>Other</title>'
+    scan = extractor.scan()
+    done = [scan.feed(page[offset:offset + 5]) for offset in range(0, len(page), 5)]
+    assert scan.value("title") == "Dark" and scan.value("image") == "first.jpg"
+    assert done.index(True) == len("<img src=\"first.jpg\"> <title>Dark</title>") // 5
+    assert extractor.extract(b"<title>x</title>") == {"title": "x"}
+
+
+def test_values_are_decoded_with_the_scan_encoding():
+    extractor = Extractor({"title": rb"<title>(?P<value>[^<]{0,100})</title>"})
+    page = "<title>Tür</title>".encode("iso-8859-1")
+    assert extractor.extract(page, "iso-8859-1") == {"title": "Tür"}
+    assert extractor.extract(page, "no-such-charset") == extractor.extract(page) == {"title": "T\ufffdr"}
+
+
+def test_rules_need_one_value_group():
+    with pytest.raises(ValueError):
+        Extractor({"title": rb"<title>(.*)</title>"})
+
+
+def test_fsmirror_rules():
+    page = (b'<html><head><TITLE>Dune | FSMirror</TITLE></head><body>'
+            b'<div class="dvd-container" onclick="showDvdPoster()"><p>DVD</p><img class="dvd" src="/dune.jpg"></div>')
+    assert fsmirror.EXTRACTOR.extract(page) == {"title": "Dune | FSMirror", "poster": "/dune.jpg"}
+    # No <img> within reach of any container: the background image is used
+    page = (b'<div class="dvd-container" onclick="showDvdPoster()"><p>x</p>' * 2000
+            + b'<div style="background-image: url(\'/bg.jpg\')">')
+    assert fsmirror.EXTRACTOR.extract(page) == {"background": "/bg.jpg"}
+
+
+@pytest.mark.parametrize("page", ["netflix_title.html.gz", "netflix_lxml_dump.html.gz"])
+def test_netflix_rules_on_captured_pages(page):
+    found = netflix_parse.EXTRACTOR.extract(load_page(page))
+    assert found["title"] == "A Widow's Game"
+    assert found["image"].startswith("https://occ-0-430-1490.1.nflxso.net/dnm/api/v6/")
@@ -6,6 +6,7 @@ import sys
 import os
 import pytest
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
@@ -34,3 +35,83 @@ def test_inputbox_popup(qtbot):
     assert isinstance(result[0], str)
     assert isinstance(result[1], bool)
     assert isinstance(result[2], str)
+
+
+def _accept_when_shown(dialog, edit=None):
+    """Accept the modal dialog from inside its event loop."""
+    def accept():
+        if edit:
+            edit(dialog)
+        dialog.accept()
+    QTimer.singleShot(0, accept)
+
+
+@pytest.mark.qt
+def test_entry_dialog_is_reused_and_reset(qtbot):
+    from form_widget import get_entry_dialog
+    dialog = get_entry_dialog()
+
+    def fill(d):
+        d.episode_edit.setText("7")
+        d.more_toggle.toggle()
+    _accept_when_shown(dialog, fill)
+    first = inputbox("Folgen", "", default_long_text="Dark")
+    assert first == ("Dark", "7", True)
+    assert dialog.show_ms is not None and dialog.show_ms >= 0
+
+    _accept_when_shown(dialog)
+    second = inputbox("Folgen", "", default_long_text="Lupin")
+    assert get_entry_dialog() is dialog
+    assert second == ("Lupin", "", False)
+    assert not dialog.image_label.isVisible()
+
+    _accept_when_shown(dialog)
+    assert inputbox("Folgen", "", default_long_text="Dark", default_episode="8") == ("Dark", "8", False)
+
+
+@pytest.mark.qt
+def test_dialog_shows_before_slow_load_and_takes_its_results(qtbot):
+    import threading
+    from form_widget import get_entry_dialog
+    dialog = get_entry_dialog()
+    release = threading.Event()
+
+    def load():
+        release.wait(5)
+        return {"titel": "Dark", "episode": "2", "image_url": os.path.join(os.path.dirname(__file__), '..', 'icon.png')}
+
+    def check():
+        assert dialog.isVisible() and dialog.titel_edit.text() == ""
+        release.set()
+        qtbot.waitUntil(lambda: dialog.titel_edit.text() == "Dark")
+        dialog.accept()
+    QTimer.singleShot(0, check)
+    assert inputbox("Netflix", "", default_long_text="", load=load) == ("Dark", "2", False)
+    assert not dialog.image_label.isHidden()
+
+    def edit_then_load(d):
+        d.titel_edit.setText("Lupin")
+        release.set()
+        qtbot.waitUntil(lambda: d.episode_edit.text() == "2")
+    release.clear()
+    _accept_when_shown(dialog, edit_then_load)
+    assert inputbox("Netflix", "", default_long_text="", load=load) == ("Lupin", "2", False)
+
+
+@pytest.mark.qt
+def test_episode_for_a_loaded_title_is_suggested_on_the_gui_thread(qtbot):
+    import threading
+    from form_widget import get_entry_dialog
+    dialog = get_entry_dialog()
+    threads = []
+
+    def suggest(titel):
+        threads.append(threading.current_thread())
+        return "S2E3" if titel == "Dark" else None
+
+    def check(d):
+        qtbot.waitUntil(lambda: d.episode_edit.text() == "S2E3")
+    _accept_when_shown(dialog, check)
+    assert inputbox("Netflix", "", default_long_text="", load=lambda: {"titel": "Dark"},
+                    suggest=suggest) == ("Dark", "S2E3", False)
+    assert threads == [threading.main_thread()]
@@ -0,0 +1,43 @@
+# test_functions.py
+"""
+Tests for the ODS helpers in Functions.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import Functions
+
+
+def test_append_keeps_rows_and_other_sheets(tmp_path, monkeypatch):
+    ods = tmp_path / "Ablage.ods"
+    monkeypatch.setattr(Functions, "ODS_PATH", str(ods))
+    Functions.save_data(str(ods), {Functions.SHEET_NAME: [["Dark", "1"]], "Notizen": [["keep me"]]})
+
+    Functions.append_row_to_ods("Dark", "2", "02.01.2025", "https://b", True, "cover.jpg")
+
+    data = Functions.get_data(str(ods))
+    assert data[Functions.SHEET_NAME] == [["Dark", "1"], ["Dark", "2", "02.01.2025", "https://b", "1", "cover.jpg"]]
+    assert data["Notizen"] == [["keep me"]]
+
+
+def test_append_rows_creates_missing_file(tmp_path, monkeypatch):
+    ods = tmp_path / "Ablage.ods"
+    monkeypatch.setattr(Functions, "ODS_PATH", str(ods))
+    rows = [Functions.make_row("Dark", str(n), "01.01.2025", "", False, "") for n in range(10)]
+    Functions.append_rows_to_ods(rows)
+    sheet = Functions.get_data(str(ods))[Functions.SHEET_NAME]
+    assert [row[1] for row in sheet] == [str(n) for n in range(10)]
+
+
+def test_claimed_stdout_carries_only_frames(monkeypatch):
+    import io
+    from native_codec import encode_message
+    channel, errors = io.BytesIO(), io.StringIO()
+    stdout = io.TextIOWrapper(channel, write_through=True)
+    monkeypatch.setattr(sys, "stdout", stdout)
+    monkeypatch.setattr(sys, "stderr", errors)
+    frames = Functions.claim_stdout()
+    print("Assets directory: somewhere")
+    Functions.send_native_message({"result": "OK"}, frames)
+    assert channel.getvalue() == encode_message({"result": "OK"})
+    assert "Assets directory" in errors.getvalue()
@@ -0,0 +1,147 @@
+# test_history_index.py
+"""
+Tests for the duplicate index in history_index.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import history_index
+from Functions import make_row, save_data
+from journal import Journal
+from storage import OdsStorage
+
+
+def _index(tmp_path):
+    ods = str(tmp_path / "Ablage.ods")
+    storage = OdsStorage(ods, "Sheet1")
+    journal = Journal(ods + ".journal.jsonl", storage)
+    return history_index.HistoryIndex(ods + history_index.INDEX_SUFFIX, storage, journal), ods
+
+
+def test_normalize_url_drops_tracking_parameters():
+    assert history_index.normalize_url("https://WWW.Netflix.com/watch/81786479/?trackId=1&tctx=2%2C3#x") == \
+        "https://www.netflix.com/watch/81786479"
+    assert history_index.normalize_url("https://www.netflix.com/browse?jbv=81786479&utm_source=x") == \
+        "https://www.netflix.com/browse?jbv=81786479"
+
+
+def test_index_finds_stored_and_journaled_rows(tmp_path):
+    index, ods = _index(tmp_path)
+    save_data(ods, {"Sheet1": [["Dark", "1", "01.01.2025", "https://www.netflix.com/watch/1?trackId=5"]]})
+    assert index.seen_on(make_row(" dark", "1", "", "https://www.netflix.com/watch/1?trackId=9")) == "01.01.2025"
+    assert index.seen_on(make_row("Dark", "2", "", "https://www.netflix.com/watch/1")) is None
+
+    index.journal.append([make_row("Dark", "2", "02.01.2025", "https://b")])
+    reloaded, _ = _index(tmp_path)
+    assert reloaded.seen_on(make_row("Dark", "2", "", "https://b")) == "02.01.2025"
+
+
+def test_sidecar_is_used_until_the_sheet_changes(tmp_path, monkeypatch):
+    index, ods = _index(tmp_path)
+    save_data(ods, {"Sheet1": [["Dark", "1", "01.01.2025", ""]]})
+    index.seen_on(make_row("Dark", "1", "", ""))
+    assert os.path.exists(index.path)
+
+    reloaded, _ = _index(tmp_path)
+    monkeypatch.setattr(reloaded.storage, "rows", lambda: (_ for _ in ()).throw(AssertionError("sheet scanned")))
+    assert reloaded.seen_on(make_row("Dark", "1", "", "")) == "01.01.2025"
+    monkeypatch.undo()
+
+    # Edited in Calc: the stamp no longer matches and the index is rebuilt
+    save_data(ods, {"Sheet1": [["Lupin", "1", "03.01.2025", ""]]})
+    rebuilt, _ = _index(tmp_path)
+    assert rebuilt.seen_on(make_row("Dark", "1", "", "")) is None
+    assert rebuilt.seen_on(make_row("Lupin", "1", "", "")) == "03.01.2025"
+
+
+def test_next_episode_counts_up_the_last_number():
+    assert history_index.next_episode("7") == "8"
+    assert history_index.next_episode("S1E09") == "S1E10"
+    assert history_index.next_episode(12) == "13"
+    assert history_index.next_episode("Finale") == ""
+    assert history_index.next_episode(None) == ""
+
+
+def test_last_episode_per_title_survives_reload(tmp_path):
+    index, ods = _index(tmp_path)
+    save_data(ods, {"Sheet1": [["Dark", "3", "01.01.2025"], ["Lupin", "1", "01.01.2025"], ["Dark", "4", "02.01.2025"]]})
+    assert index.last_episode("dark ") == "4"
+    index.add([make_row("Lupin", "2", "03.01.2025", "")])
+    assert index.last_episode("Lupin") == "2"
+    assert index.last_episode("Unknown") is None
+
+    reloaded, _ = _index(tmp_path)
+    assert reloaded.last_episode("Dark") == "4"
+
+
+def test_resident_index_follows_changes_of_other_hosts(tmp_path):
+    index, ods = _index(tmp_path)
+    save_data(ods, {"Sheet1": [["Dark", "1", "01.01.2025", ""]]})
+    assert index.seen_on(make_row("Lupin", "1", "", "")) is None
+
+    # Another host (or Calc) changes the sheet after this one loaded its index
+    other, _ = _index(tmp_path)
+    other.storage.add_rows([make_row("Lupin", "1", "02.01.2025", "")])
+    assert index.seen_on(make_row("Lupin", "1", "", "")) == "02.01.2025"
+
+    # A stale save can not hide rows from the next host
+    stale, _ = _index(tmp_path)
+    stale.seen_on(make_row("Dark", "1", "", ""))
+    other.storage.add_rows([make_row("Lost", "1", "03.01.2025", "")])
+    stale.save()
+    fresh, _ = _index(tmp_path)
+    assert fresh.seen_on(make_row("Lost", "1", "", "")) == "03.01.2025"
+    assert fresh.seen_on(make_row("Dark", "1", "", "")) == "01.01.2025"
+
+
+def test_two_hosts_compacting_one_journal_keep_the_index_whole(tmp_path):
+    def host():
+        index, ods = _index(tmp_path)
+        return index, lambda row: (index.journal.append([row]), index.add([row]))
+
+    a, record_a = host()
+    b, record_b = host()
+    assert a.seen_on(make_row("Dark", "1", "", "")) is None  # loaded before B wrote
+    record_b(make_row("Dark", "1", "01.01.2025", ""))
+    assert b.journal.compact(on_written=b.compacted) == 1
+    record_a(make_row("Lupin", "1", "02.01.2025", ""))
+    assert a.journal.compact(on_written=a.compacted) == 1
+
+    for index in (a, b, _index(tmp_path)[0]):
+        assert index.seen_on(make_row("Dark", "1", "", "")) == "01.01.2025"
+        assert index.seen_on(make_row("Lupin", "1", "", "")) == "02.01.2025"
+
+
+def test_own_compaction_merges_without_rescanning(tmp_path, monkeypatch):
+    index, ods = _index(tmp_path)
+    index.seen_on(make_row("Dark", "1", "", ""))
+    row = make_row("Dark", "1", "01.01.2025", "")
+    index.journal.append([row])
+    index.add([row])
+    monkeypatch.setattr(index.storage, "rows", lambda: (_ for _ in ()).throw(AssertionError("sheet scanned")))
+    index.journal.compact(on_written=index.compacted)
+    monkeypatch.undo()
+    fresh, _ = _index(tmp_path)
+    monkeypatch.setattr(fresh.storage, "rows", lambda: (_ for _ in ()).throw(AssertionError("sheet scanned")))
+    assert fresh.seen_on(make_row("Dark", "1", "", "")) == "01.01.2025"
+
+
+def test_last_episode_follows_edits_while_resident(tmp_path):
+    index, ods = _index(tmp_path)
+    save_data(ods, {"Sheet1": [["Dark", "3", "01.01.2025"]]})
+    assert history_index.next_episode(index.last_episode("Dark")) == "4"
+    # Logged by another host, or typed into the sheet in Calc
+    save_data(ods, {"Sheet1": [["Dark", "3", "01.01.2025"], ["Dark", "7", "05.01.2025"]]})
+    assert history_index.next_episode(index.last_episode("Dark")) == "8"
+
+
+def test_ready_only_when_no_rescan_is_due(tmp_path):
+    index, ods = _index(tmp_path)
+    save_data(ods, {"Sheet1": [["Dark", "3", "01.01.2025"]]})
+    assert not index.ready()
+    index.refresh()
+    assert index.ready()
+    # A new host starts from the sidecar
+    assert _index(tmp_path)[0].ready()
+    save_data(ods, {"Sheet1": [["Dark", "4", "02.01.2025"]]})
+    assert not index.ready()
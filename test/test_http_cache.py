@@ -0,0 +1,109 @@
+# test_http_cache.py
+"""
+Tests for the revalidating page cache in http_cache.py
+"""
+import sys
+import os
+import time
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import http_cache
+from http_client import Session
+from extract_engine import Extractor
+from local_server import QuietHandler, serve
+
+
+class _Handler(QuietHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        charset = "iso-8859-1" if self.path.startswith("/latin") else "utf-8"
+        body = f"<title>{self.path}</title> Ä".encode(charset)
+        self.send_response(200)
+        self.send_header("Content-Type", f"text/html; charset={charset}")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        if self.path.startswith("/private"):
+            self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    _Handler.requests = []
+    with serve(_Handler) as url:
+        yield url
+
+
+def test_repeat_clicks_are_hits_then_revalidations(server, tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path), ttl=60)
+    session = Session()
+    first = cache.get(server + "/title/1?trackId=5", session)
+    again = cache.get(server + "/title/1?trackId=9#x", session)
+    assert again.text == first.text == "<title>/title/1?trackId=5</title> Ä"
+    assert len(_Handler.requests) == 1
+
+    stale = http_cache.HttpCache(str(tmp_path), ttl=0)
+    assert stale.get(server + "/title/1", session).text == first.text
+    assert _Handler.requests[-1] == ("/title/1", '"v1"')
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+    assert stale.stats["revalidated"] == 1
+
+
+def test_no_store_responses_are_not_kept(server, tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path))
+    session = Session()
+    cache.get(server + "/private", session)
+    cache.get(server + "/private", session)
+    assert len(_Handler.requests) == 2 and cache.stats["stores"] == 0
+
+
+def test_least_recently_used_pages_are_evicted(server, tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path), max_bytes=600)
+    session = Session()
+    for n in range(3):
+        cache.get(f"{server}/page/{n}", session)
+        time.sleep(0.01)
+    cache.get(f"{server}/page/0", session)  # hit, now the most recent
+    for n in range(3, 6):
+        time.sleep(0.01)
+        cache.get(f"{server}/page/{n}", session)
+    assert cache.stats["evictions"] > 0
+    assert sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path)) <= 600
+    requests_before = len(_Handler.requests)
+    cache.get(f"{server}/page/5", session)
+    assert len(_Handler.requests) == requests_before
+
+
+def test_scan_stops_reading_once_found_and_caches_the_prefix(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "SCAN_CHUNK_SIZE", 4)
+    cache = http_cache.HttpCache(str(tmp_path))
+    session = Session()
+    scanner = Extractor({"title": rb"<title>(?P<value>[^<]*)</title>"}).scan()
+    response = cache.scan(server + "/long", session, scanner)
+    assert scanner.value("title") == "/long"
+    assert response.content == b"<title>/long</title>"
+    assert cache.stats["stopped_early"] == 1
+
+    # Enough for the same scan, but get() needs the whole page
+    cache.scan(server + "/long", session, scanner)
+    assert cache.stats["hits"] == 1 and len(_Handler.requests) == 1
+    assert cache.get(server + "/long", session).text.endswith(" Ä")
+    assert len(_Handler.requests) == 2
+
+
+def test_scanned_values_are_decoded_with_the_page_charset(server, tmp_path):
+    cache = http_cache.HttpCache(str(tmp_path))
+    extractor = Extractor({"rest": rb"</title> (?P<value>.+)"})
+    for hits in (0, 1):
+        scanner = extractor.scan()
+        cache.scan(server + "/latin", Session(), scanner)
+        assert scanner.value("rest") == "Ä"
+        assert cache.stats["hits"] == hits
@@ -0,0 +1,54 @@
+# test_http_client.py
+"""
+Tests for the shared HTTP session in http_client.py
+"""
+import sys
+import os
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import http_client
+from local_server import QuietHandler, serve
+
+
+class _Handler(QuietHandler):
+    clients = []
+
+    def do_GET(self):
+        self.clients.append(self.client_address)
+        body = b"poster" if self.path == "/ok" else b"missing"
+        self.send_response(200 if self.path == "/ok" else 404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    _Handler.clients = []
+    with serve(_Handler) as url:
+        yield url
+
+
+def test_requests_reuse_one_connection(server, monkeypatch):
+    monkeypatch.setattr(http_client, "_session", None)
+    assert http_client.get_session() is http_client.get_session()
+    assert http_client.fetch_bytes(server + "/ok") == b"poster"
+    assert http_client.fetch_bytes(server + "/ok") == b"poster"
+    assert len(_Handler.clients) == 2 and _Handler.clients[0] == _Handler.clients[1]
+    with pytest.raises(http_client.requests.HTTPError):
+        http_client.fetch_bytes(server + "/gone")
+
+
+def test_requests_get_the_default_timeout(monkeypatch):
+    timeouts = []
+
+    def send(request, **kwargs):
+        timeouts.append(kwargs["timeout"])
+        raise http_client.requests.ConnectionError("offline")
+
+    session = http_client.Session()
+    monkeypatch.setattr(session.get_adapter("https://x"), "send", send)
+    for timeout in (None, 1):
+        with pytest.raises(http_client.requests.ConnectionError):
+            session.get("https://www.netflix.com/title/1", timeout=timeout)
+    assert timeouts == [http_client.TIMEOUT, 1]
@@ -0,0 +1,93 @@
+# test_journal.py
+"""
+Tests for the write-ahead journal in journal.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import multiprocessing
+import pytest
+import journal
+from Functions import get_data
+from storage import OdsStorage
+
+
+def _journal(tmp_path):
+    ods = str(tmp_path / "Ablage.ods")
+    return journal.Journal(ods + journal.JOURNAL_SUFFIX, OdsStorage(ods, "Sheet1")), ods
+
+
+def test_compact_writes_journaled_rows_and_empties_journal(tmp_path):
+    j, ods = _journal(tmp_path)
+    first = j.append([["Dark", "1"]])
+    second = j.append([["Dark", "2"], ["Lupin", "1"]])
+    assert second > first
+    assert not os.path.exists(ods)
+    assert j.pending() == 3
+    assert j.compact() == 3
+    assert get_data(ods)["Sheet1"] == [["Dark", "1"], ["Dark", "2"], ["Lupin", "1"]]
+    assert j.pending() == 0
+    assert j.storage.checkpoint() == second
+    assert j.compact() == 0
+
+
+def test_replay_after_crash_before_truncate_is_idempotent(tmp_path, monkeypatch):
+    j, ods = _journal(tmp_path)
+    j.append([["Dark", "1"]])
+    # Die right after the ODS file is replaced, before the journal is emptied
+    monkeypatch.setattr(j, "_drop_prefix", lambda size, last_seq: (_ for _ in ()).throw(KeyboardInterrupt()))
+    with pytest.raises(KeyboardInterrupt):
+        j.compact()
+    monkeypatch.undo()
+    j.close()
+
+    restarted, _ = _journal(tmp_path)
+    assert restarted.pending() == 0
+    restarted.append([["Dark", "2"]])
+    assert restarted.compact() == 1
+    assert get_data(ods)["Sheet1"] == [["Dark", "1"], ["Dark", "2"]]
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    j, ods = _journal(tmp_path)
+    j.append([["Dark", "1"]])
+    j.close()
+    with open(j.path, "ab") as f:
+        f.write(b'{"seq": 99, "rows": [["half')
+    restarted, _ = _journal(tmp_path)
+    restarted.append([["Dark", "2"]])
+    assert restarted.pending() == 2
+    restarted.compact()
+    assert get_data(ods)["Sheet1"] == [["Dark", "1"], ["Dark", "2"]]
+
+
+def _click(ods, n):
+    """One host process: journal a row, then compact unless another host is writing."""
+    j = journal.Journal(ods + journal.JOURNAL_SUFFIX, OdsStorage(ods, "Sheet1"))
+    j.append([["Dark", str(n)]])
+    j.compact(blocking=False)
+
+
+def test_concurrent_hosts_lose_no_rows(tmp_path):
+    ods = str(tmp_path / "Ablage.ods")
+    ctx = multiprocessing.get_context("spawn")
+    hosts = [ctx.Process(target=_click, args=(ods, n)) for n in range(8)]
+    for host in hosts:
+        host.start()
+    for host in hosts:
+        host.join(30)
+        assert host.exitcode == 0
+    j, _ = _journal(tmp_path)
+    j.compact()
+    assert sorted(int(row[1]) for row in get_data(ods)["Sheet1"]) == list(range(8))
+
+
+def test_busy_write_lock_leaves_rows_for_the_holder(tmp_path):
+    j, ods = _journal(tmp_path)
+    j.append([["Dark", "1"]])
+    other = journal.Journal(j.path, j.storage)
+    with other.write_lock:
+        assert j.compact(blocking=False) is None
+        j.append([["Dark", "2"]])
+    assert other.compact() == 2
+    assert get_data(ods)["Sheet1"] == [["Dark", "1"], ["Dark", "2"]]
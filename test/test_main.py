@@ -0,0 +1,196 @@
+# test_main.py
+"""
+Tests for the resident native messaging loop in main.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import main
+from native_codec import InvalidFrame
+
+
+def _feed(monkeypatch, messages):
+    """Return a next_message() serving messages, then None like a closed stdin."""
+    queue = list(messages)
+    sent = []
+    monkeypatch.setattr(main, "send_native_message", lambda response, out=None: sent.append(response))
+    monkeypatch.setattr(main, "ENABLE_DEBUG_LOG", False)
+    return (lambda: queue.pop(0) if queue else None), sent
+
+
+def test_run_host_handles_messages_until_stdin_closes(monkeypatch):
+    next_message, sent = _feed(monkeypatch, [{"text": "B", "id": 2}, {"text": "C"}])
+    handled = []
+    monkeypatch.setattr(main, "handle_message", lambda msg: handled.append(msg["text"]) or {"result": "OK"})
+    main.run_host({"text": "A", "id": 1}, next_message)
+    assert handled == ["A", "B", "C"]
+    assert sent == [{"result": "OK", "id": 1}, {"result": "OK", "id": 2}, {"result": "OK"}]
+
+
+def test_run_host_keeps_running_after_handler_error(monkeypatch):
+    next_message, sent = _feed(monkeypatch, [{"text": "ok", "id": 2}])
+
+    def handler(msg):
+        if msg["text"] == "boom":
+            raise RuntimeError("disk full")
+        return {"result": "OK"}
+
+    monkeypatch.setattr(main, "handle_message", handler)
+    main.run_host({"text": "boom", "id": 1}, next_message)
+    assert sent == [{"result": "ERROR", "error": "disk full", "id": 1}, {"result": "OK", "id": 2}]
+
+
+def test_run_host_answers_invalid_frame_with_its_id(monkeypatch):
+    next_message, sent = _feed(monkeypatch, [InvalidFrame("invalid message: x", 3), {"text": "ok", "id": 4}])
+    monkeypatch.setattr(main, "handle_message", lambda msg: {"result": "OK"})
+    main.run_host({"text": "ok", "id": 2}, next_message)
+    assert sent == [{"result": "OK", "id": 2}, {"result": "ERROR", "error": "invalid message: x", "id": 3},
+                    {"result": "OK", "id": 4}]
+
+
+def test_run_host_sends_a_summary_when_the_response_is_too_large(monkeypatch):
+    import io
+    import json
+    import struct
+    from native_codec import MAX_RESPONSE_SIZE
+    monkeypatch.setattr(main, "ENABLE_DEBUG_LOG", False)
+    rows = [{"index": n, "result": "OK"} for n in range(MAX_RESPONSE_SIZE // 20)]
+    monkeypatch.setattr(main, "handle_message", lambda msg: {"result": "OK", "saved": len(rows), "rows": rows})
+    out = io.BytesIO()
+    main.run_host({"batch": [], "id": 7}, lambda: None, out)
+    frame = out.getvalue()
+    assert struct.unpack('=I', frame[:4])[0] == len(frame) - 4
+    response = json.loads(frame[4:])
+    assert response["result"] == "OK" and response["saved"] == len(rows) and response["id"] == 7
+    assert "rows" not in response and response["error"].startswith("response too large")
+
+
+def test_no_episode_suggestion_while_the_index_needs_a_rebuild(monkeypatch):
+    monkeypatch.setattr(main, "ENABLE_DEBUG_LOG", False)
+    monkeypatch.setattr(main, "suggest_episode", lambda titel: "5")
+    monkeypatch.setattr(main, "history_ready", lambda: False)
+    assert main.episode_suggestion("Dark") is None
+    monkeypatch.setattr(main, "history_ready", lambda: True)
+    assert main.episode_suggestion("Dark") == "5"
+
+
+def test_http_session_is_reused(monkeypatch):
+    monkeypatch.setattr(main, "_http_session", None)
+    assert main.get_http_session() is main.get_http_session()
+
+
+def test_batch_is_saved_in_one_call_with_per_row_status(monkeypatch):
+    saves = []
+    monkeypatch.setattr(main, "record_rows", saves.append)
+    monkeypatch.setattr(main, "seen_before", lambda row: None)
+    monkeypatch.setattr(main, "ENABLE_DEBUG_LOG", False)
+    response = main.handle_message({"batch": [
+        {"title": "Dark", "episode": 1, "url": "https://a", "seen_on": "01.01.2025"},
+        {"episode": "2"},
+        {"title": " Dark ", "episode": "3", "more": True, "cover": "c.jpg", "seen_on": "01.01.2025"},
+    ]})
+    assert len(saves) == 1
+    assert saves[0] == [
+        ["Dark", "1", "01.01.2025", "https://a", "0", ""],
+        ["Dark", "3", "01.01.2025", "", "1", "c.jpg"],
+    ]
+    assert response["result"] == "PARTIAL"
+    assert response["saved"] == 2
+    assert [row["result"] for row in response["rows"]] == ["OK", "ERROR", "OK"]
+
+
+def test_batch_save_failure_marks_every_row(monkeypatch):
+    def fail(rows):
+        raise OSError("file locked")
+    monkeypatch.setattr(main, "record_rows", fail)
+    monkeypatch.setattr(main, "seen_before", lambda row: None)
+    monkeypatch.setattr(main, "ENABLE_DEBUG_LOG", False)
+    response = main.handle_message({"batch": [{"title": "Dark"}, {"title": "Lupin"}]})
+    assert response["result"] == "ERROR"
+    assert {row["error"] for row in response["rows"]} == {"file locked"}
+
+
+def test_compact_message_writes_journal_to_ods(monkeypatch):
+    monkeypatch.setattr(main, "compact_journal", lambda **kwargs: 3)
+    assert main.handle_message({"compact": True}) == {"result": "OK", "compacted": 3}
+
+
+def test_idle_host_compacts_journal_then_keeps_waiting(monkeypatch):
+    compactions = []
+    monkeypatch.setattr(main, "ENABLE_DEBUG_LOG", False)
+    monkeypatch.setattr(main, "compact_journal", lambda **kwargs: compactions.append(kwargs) or 1)
+    monkeypatch.setattr(main, "archive_due", lambda: True)
+    monkeypatch.setattr(main, "archive_old_rows", lambda max_batches=None: compactions.append(max_batches) or 0)
+    monkeypatch.setattr(main, "refresh_history", lambda: compactions.append("refresh"))
+
+    class FakeJournal:
+        def due(self):
+            return False
+
+        def pending(self):
+            return 1
+
+    monkeypatch.setattr(main, "get_journal", FakeJournal)
+    calls = []
+
+    def get(timeout=None):
+        calls.append(timeout)
+        if timeout is not None:
+            raise main.queue.Empty
+        return {"text": "next"}
+
+    assert main.next_message_or_compact(get, idle_seconds=0.01) == {"text": "next"}
+    assert calls == [0.01, None]
+    assert compactions == [{"blocking": False}, 1, "refresh"]
+
+
+def test_duplicates_are_reported_not_saved(monkeypatch):
+    saves = []
+    monkeypatch.setattr(main, "record_rows", saves.append)
+    monkeypatch.setattr(main, "seen_before", lambda row: "01.01.2025" if row[1] == "1" else None)
+    monkeypatch.setattr(main, "ENABLE_DEBUG_LOG", False)
+    assert main.save_entry(main.make_row("Dark", "1", "02.01.2025", "https://a")) == \
+        {"result": "DUPLICATE", "seen_on": "01.01.2025"}
+    assert saves == []
+    response = main.handle_message({"batch": [
+        {"title": "Dark", "episode": "1"},
+        {"title": "Dark", "episode": "2", "seen_on": "02.01.2025"},
+        {"title": "dark ", "episode": "2"},
+    ]})
+    assert response["result"] == "OK"
+    assert [row["result"] for row in response["rows"]] == ["DUPLICATE", "OK", "DUPLICATE"]
+    assert response["rows"][2]["seen_on"] == "02.01.2025"
+    assert len(saves) == 1 and len(saves[0]) == 1
+
+
+def test_site_page_is_parsed_while_the_dialog_is_open(monkeypatch):
+    saves = []
+    monkeypatch.setattr(main, "record_rows", saves.extend)
+    monkeypatch.setattr(main, "seen_before", lambda row: None)
+    monkeypatch.setattr(main, "suggest_episode", lambda titel: "5")
+    monkeypatch.setattr(main, "history_ready", lambda: True)
+    monkeypatch.setattr(main, "ENABLE_DEBUG_LOG", False)
+    monkeypatch.setattr(main, "get_http_session", lambda: None)
+    loads = []
+    deadlines = []
+
+    def show_inputbox(prompt, title, default_long_text="", image_url=None, load=None, deadline=None):
+        # The dialog is up before the page is parsed
+        assert default_long_text == "" and loads == []
+        loads.append(load())
+        # Parse and poster share the entry's time budget
+        assert deadlines == [deadline]
+        return "", "5", False
+
+    class Site:
+        key, prompt, label = "netflix", "Netflix", ""
+
+        def parse(self, url, session=None, deadline=None):
+            deadlines.append(deadline)
+            return "Dark", "https://img/dark.jpg"
+
+    monkeypatch.setattr(main, "show_inputbox", show_inputbox)
+    assert main.handle_site({"url": "https://www.netflix.com/watch/1"}, Site()) == {"result": "OK"}
+    # The episode is suggested by the dialog on the GUI thread, not in load()
+    assert loads == [{"image_url": "https://img/dark.jpg", "titel": "Dark"}]
+    assert saves[0][0] == "Dark" and saves[0][5] == "https://img/dark.jpg"
@@ -0,0 +1,97 @@
+# test_native_codec.py
+"""
+Tests for the native messaging framing in native_codec.py
+"""
+import asyncio
+import io
+import struct
+import sys
+import os
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from native_codec import (
+    FrameDecoder, FrameTooLarge, IncompleteFrame, InvalidFrame, StdinReader, encode_message, read_messages
+)
+
+
+def _frame(payload):
+    return struct.pack('=I', len(payload)) + payload
+
+
+def _stream_reader(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+def test_decoder_handles_frames_split_across_chunks():
+    messages = [{"text": "Dark", "id": 1}, {"text": "Ü" * 1000, "id": 2}, {}]
+    stream = b"".join(encode_message(m) for m in messages)
+    decoder = FrameDecoder()
+    decoded = []
+    for i in range(0, len(stream), 7):
+        decoded.extend(decoder.feed(stream[i:i + 7]))
+    assert decoded == messages
+    assert decoder.pending() == 0
+
+
+def test_decoder_rejects_oversized_frame_from_header():
+    decoder = FrameDecoder(max_size=16)
+    with pytest.raises(FrameTooLarge):
+        decoder.feed(struct.pack('=I', 17))
+
+
+def test_decoder_decodes_whole_chunks_without_buffering():
+    decoder = FrameDecoder()
+    stream = encode_message({"a": 1}) + encode_message({"b": 2})
+    assert decoder.feed(stream + stream[:3]) == [{"a": 1}, {"b": 2}]
+    assert decoder.pending() == 3
+    assert decoder.feed(stream[3:]) == [{"a": 1}, {"b": 2}]
+    assert decoder.pending() == 0
+
+
+def test_decoder_passes_on_invalid_frame_and_keeps_decoding():
+    decoder = FrameDecoder()
+    stream = encode_message({"a": 1}) + _frame(b'{"id": 7, "text": Dark}') + encode_message({"b": 2})
+    first, bad, last = decoder.feed(stream)
+    assert (first, last) == ({"a": 1}, {"b": 2})
+    assert isinstance(bad, InvalidFrame) and bad.request_id == 7
+    assert isinstance(decoder.feed(_frame(b'\xff"id": "x"'))[0], InvalidFrame)
+    assert decoder.pending() == 0
+
+
+def test_encode_rejects_oversized_response():
+    with pytest.raises(FrameTooLarge):
+        encode_message({"text": "x" * 100}, max_size=50)
+
+
+def test_read_messages_until_eof():
+    async def collect(data):
+        return [m async for m in read_messages(_stream_reader(data), chunk_size=5)]
+    data = encode_message({"a": 1}) + encode_message({"b": 2})
+    assert asyncio.run(collect(data)) == [{"a": 1}, {"b": 2}]
+    with pytest.raises(IncompleteFrame):
+        asyncio.run(collect(data[:-1]))
+
+
+@pytest.mark.filterwarnings("error")
+def test_stdin_reader_queues_messages_then_none():
+    stream = io.BytesIO(encode_message({"text": "A"}) + _frame(b"{") + encode_message({"text": "B"}))
+    reader = StdinReader(stream).start()
+    assert reader.get(timeout=5) == {"text": "A"}
+    assert isinstance(reader.get(timeout=5), InvalidFrame)
+    assert reader.get(timeout=5) == {"text": "B"}
+    assert reader.get(timeout=5) is None
+    assert reader.error is None
+    reader._thread.join(5)
+    stream.close()
+
+
+@pytest.mark.filterwarnings("error")
+def test_stdin_reader_stops_on_bad_frame():
+    stream = io.BytesIO(encode_message({"text": "A"}) + struct.pack('=I', 99))
+    reader = StdinReader(stream, max_size=50).start()
+    assert reader.get(timeout=5) == {"text": "A"}
+    assert reader.get(timeout=5) is None
+    assert isinstance(reader.error, FrameTooLarge)
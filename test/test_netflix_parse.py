@@ -4,9 +4,16 @@ Test for the parse_netflix_url function in netflix_parse.py
 """
 import sys
 import os
+import pytest
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import http_cache
+from http_client import Session
 from netflix_parse import parse_netflix_url
+from local_server import QuietHandler, serve
+from page_corpus import load_page
 
+@pytest.mark.skipif(not os.environ.get("BROWSERTOCALC_LIVE_TESTS"),
+                    reason="needs netflix.com; set BROWSERTOCALC_LIVE_TESTS=1 (offline: test_parser_corpus.py)")
 def test_parse_netflix_url():
     # Example Netflix title URL (public, non-authenticated page)
     url = "https://www.netflix.com/watch/81630670?trackId=14170035"  # Example: Stranger Things
@@ -16,6 +23,33 @@ def test_parse_netflix_url():
     assert titel is not None and len(titel) > 0, "Title should not be empty"
     assert image_url is not None and image_url.startswith("http"), "Image URL should be valid"
 
+def test_captured_page_is_parsed_from_its_first_chunk(tmp_path, monkeypatch):
+    # Title page captured from netflix.com (about 3 MB)
+    page = load_page("netflix_title.html.gz")
+
+    class Handler(QuietHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(page)))
+            self.end_headers()
+            try:
+                self.wfile.write(page)
+            except OSError:
+                pass  # the client stopped reading
+
+    cache = http_cache.HttpCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(http_cache, "_cache", cache)
+    with serve(Handler) as server:
+        url = server + "/title/81786479?trackId=1"
+        titel, image_url = parse_netflix_url(url, session=Session())
+        assert titel == "A Widow's Game"
+        assert image_url.startswith("https://occ-0-430-1490.1.nflxso.net/") and image_url.endswith(".jpg?r=100")
+        assert cache.stats["stopped_early"] == 1
+        # Repeat clicks scan the cached prefix
+        assert parse_netflix_url(url, session=Session()) == (titel, image_url)
+        assert cache.stats["hits"] == 1
+
 if __name__ == "__main__":
     test_parse_netflix_url()
     print("Test completed.")
@@ -0,0 +1,52 @@
+# test_netflix_state.py
+"""
+Tests for the embedded-state extraction in netflix_state.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from netflix_state import find_model, title_info, value_end
+from page_corpus import load_page
+
+
+def _page(state):
+    return (b"<html><script>window.netflix = window.netflix || {};\n"
+            b"        netflix.reactContext = " + state + b";</script></html>")
+
+
+def test_value_end_skips_brackets_in_strings():
+    data = b'x{"a":"}{\\"]","b":[1,{"c":"\\\\"}]}tail'
+    assert data[value_end(data, 1):] == b"tail"
+
+
+def test_value_end_of_a_cut_off_object_is_none():
+    assert value_end(b'{"a":{"b":"}"', 0) is None
+
+
+def test_only_the_model_slice_is_decoded():
+    # The rest of the state is not even valid JSON
+    page = _page(b'{"models":{"broken":{"x":undefined},'
+                 b'"nmTitleUI":{"data":{"videoId":1,"path":".\\x2Fui\\x2Ftitle","raw":"\\\\x41"}},'
+                 b'"after":function(){}}}')
+    assert find_model(page) == {"data": {"videoId": 1, "path": "./ui/title", "raw": "\\x41"}}
+
+
+def test_key_quoted_inside_a_string_is_not_the_model():
+    page = _page(b'{"models":{"note":"{\\"nmTitleUI\\":{}}","nmTitleUI":{"data":{"videoId":2}}}}')
+    assert find_model(page) == {"data": {"videoId": 2}}
+
+
+def test_pages_without_state_or_model():
+    assert find_model(b"<html>nmTitleUI</html>") is None
+    assert find_model(_page(b'{"models":{}}')) is None
+    assert title_info(_page(b'{"models":{"nmTitleUI":{"data":{"videoId":3')) is None
+
+
+def test_title_info_of_recorded_page():
+    info = title_info(load_page("netflix_title.html.gz"))
+    assert info["video_id"] == 81786479
+    assert info["title"] == "A Widow's Game"
+    assert (info["type"], info["year"], info["genre"], info["maturity"]) == ("movie", 2025, "Drama", "13+")
+    assert info["synopsis"].startswith("When a man is found dead")
+    assert info["image_url"].startswith("https://occ-0-430-1490.1.nflxso.net/") and ".jpg" in info["image_url"]
+    assert info["logo_url"].endswith(".png?r=bbf")
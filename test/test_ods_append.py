@@ -0,0 +1,145 @@
+# test_ods_append.py
+"""
+Tests for the streaming row splicer in ods_append.py
+"""
+import sys
+import os
+import zipfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import ods_append
+from Functions import get_data, save_data
+
+
+def _content(path):
+    with zipfile.ZipFile(path) as z:
+        return z.read("content.xml")
+
+
+def test_append_splices_rows_and_copies_other_parts(tmp_path):
+    ods = str(tmp_path / "a.ods")
+    save_data(ods, {"Sheet1": [["a", "x & <y>"]], "Other": [["q"]]})
+    with zipfile.ZipFile(ods) as z:
+        before = {name: z.read(name) for name in z.namelist() if name != "content.xml"}
+    ods_append.append_rows(ods, "Sheet1", [["b", "2"], ["c & d", 3.5]])
+    data = get_data(ods)
+    assert data["Sheet1"] == [["a", "x & <y>"], ["b", "2"], ["c & d", 3.5]]
+    assert data["Other"] == [["q"]]
+    with zipfile.ZipFile(ods) as z:
+        assert z.namelist()[0] == "mimetype"
+        assert z.getinfo("mimetype").compress_type == zipfile.ZIP_STORED
+        assert {name: z.read(name) for name in z.namelist() if name != "content.xml"} == before
+
+
+def test_append_works_across_small_chunks(tmp_path, monkeypatch):
+    ods = str(tmp_path / "a.ods")
+    save_data(ods, {"Before": [["0"]], "Sheet1": [[str(n)] for n in range(50)], "After": [["z"]]})
+    monkeypatch.setattr(ods_append, "CHUNK_SIZE", 7)
+    ods_append.append_rows(ods, "Sheet1", [["new"]])
+    data = get_data(ods)
+    assert data["Sheet1"][-2:] == [["49"], ["new"]]
+    assert data["Before"] == [["0"]] and data["After"] == [["z"]]
+
+
+def test_new_rows_go_before_trailing_empty_rows(tmp_path):
+    ods = str(tmp_path / "a.ods")
+    ods_append.create_ods(ods, "Sheet1", [["a"]])
+    # Calc keeps formatted empty rows after the data
+    content = _content(ods).replace(
+        b"</table:table>",
+        b'<table:table-row table:number-rows-repeated="1000"><table:table-cell/></table:table-row></table:table>')
+    with zipfile.ZipFile(ods) as zin:
+        parts = {name: zin.read(name) for name in zin.namelist()}
+    parts["content.xml"] = content
+    with zipfile.ZipFile(ods, "w") as zout:
+        for name, data in parts.items():
+            zout.writestr(name, data)
+    ods_append.append_rows(ods, "Sheet1", [["b"]])
+    assert _content(ods).count(b"<text:p>b</text:p></table:table-cell></table:table-row><table:table-row table:number-rows-repeated") == 1
+    assert [row for row in get_data(ods)["Sheet1"] if row] == [["a"], ["b"]]
+    # The padding gives way to the new rows, the sheet keeps its length
+    assert b'number-rows-repeated="999"' in _content(ods)
+    ods_append.append_rows(ods, "Sheet1", [["c"], ["d"]])
+    assert b'number-rows-repeated="997"' in _content(ods)
+    assert [row for row in get_data(ods)["Sheet1"] if row] == [["a"], ["b"], ["c"], ["d"]]
+
+
+def test_missing_sheet_is_added(tmp_path):
+    ods = str(tmp_path / "a.ods")
+    save_data(ods, {"Other": [["q"]]})
+    ods_append.append_rows(ods, "Sheet1", [["a"]])
+    assert get_data(ods) == {"Other": [["q"]], "Sheet1": [["a"]]}
+
+
+def test_repeated_appends_only_recompress_the_tail(tmp_path, monkeypatch):
+    ods = str(tmp_path / "a.ods")
+    ods_append.create_ods(ods, "Sheet1", [[f"row {n}", n] for n in range(2000)])
+    ods_append.append_rows(ods, "Sheet1", [["first"]])
+
+    def full_splice(*args):
+        raise AssertionError("content.xml was decompressed from the start")
+    monkeypatch.setattr(ods_append, "_read_member", full_splice)
+    ods_append.append_rows(ods, "Sheet1", [["second"]])
+    # The hint belongs to Sheet1, another sheet needs the full splice
+    monkeypatch.undo()
+    ods_append.append_rows(ods, "Other", [["new sheet"]])
+    data = get_data(ods)
+    assert data["Sheet1"][-3:] == [["row 1999", 1999], ["first"], ["second"]]
+    assert data["Other"] == [["new sheet"]]
+    with zipfile.ZipFile(ods) as z:
+        assert z.testzip() is None
+
+
+def test_file_saved_by_another_program_takes_the_full_path(tmp_path):
+    ods = str(tmp_path / "a.ods")
+    ods_append.create_ods(ods, "Sheet1", [["a"]])
+    # A rewrite without the hint, like Calc saving the file
+    save_data(ods, {"Sheet1": get_data(ods)["Sheet1"] + [["edited"]]})
+    ods_append.append_rows(ods, "Sheet1", [["b"]])
+    ods_append.append_rows(ods, "Sheet1", [["c"]])
+    assert get_data(ods)["Sheet1"] == [["a"], ["edited"], ["b"], ["c"]]
+
+
+def test_custom_properties_are_written_with_the_rows(tmp_path):
+    ods = str(tmp_path / "a.ods")
+    save_data(ods, {"Sheet1": [["a"]]})
+    ods_append.append_rows(ods, "Sheet1", [["b"]], {"seq": 5})
+    ods_append.append_rows(ods, "Sheet1", [["c"]], {"seq": "6 & more"})
+    assert ods_append.read_user_property(ods, "seq") == "6 & more"
+    assert _content(ods).count(b"<text:p>") == 3
+    with zipfile.ZipFile(ods) as z:
+        assert z.read("meta.xml").count(b'meta:name="seq"') == 1
+
+
+def test_remove_rows_keeps_other_rows_and_sheets(tmp_path, monkeypatch):
+    ods = str(tmp_path / "a.ods")
+    save_data(ods, {"Sheet1": [["a", 1], ["b", 2], ["a", 3], ["c", 4]], "Other": [["a"]]})
+    ods_append.append_rows(ods, "Sheet1", [["a", 5]])
+    monkeypatch.setattr(ods_append, "CHUNK_SIZE", 11)
+    removed = ods_append.remove_rows(ods, "Sheet1", lambda row: row[0] == "a", limit=2)
+    assert removed == [["a", 1], ["a", 3]]
+    data = get_data(ods)
+    assert data["Sheet1"] == [["b", 2], ["c", 4], ["a", 5]]
+    assert data["Other"] == [["a"]]
+    ods_append.append_rows(ods, "Sheet1", [["d", 6]])
+    assert get_data(ods)["Sheet1"][-1] == ["d", 6]
+
+
+def test_remove_rows_splits_repeated_rows(tmp_path):
+    ods = str(tmp_path / "a.ods")
+    ods_append.create_ods(ods, "Sheet1", [["a"], ["x"]])
+    # Calc saves identical consecutive rows as one repeated row
+    content = _content(ods).replace(b"<table:table-row><table:table-cell office:value-type=\"string\"><text:p>a",
+                                    b"<table:table-row table:number-rows-repeated=\"3\"><table:table-cell "
+                                    b"office:value-type=\"string\"><text:p>a")
+    with zipfile.ZipFile(ods) as zin:
+        parts = {name: zin.read(name) for name in zin.namelist()}
+    parts["content.xml"] = content
+    with zipfile.ZipFile(ods, "w") as zout:
+        for name, data in parts.items():
+            zout.writestr(name, data)
+    assert get_data(ods)["Sheet1"] == [["a"], ["a"], ["a"], ["x"]]
+    assert ods_append.remove_rows(ods, "Sheet1", lambda row: row == ["a"], limit=2) == [["a"], ["a"]]
+    assert get_data(ods)["Sheet1"] == [["a"], ["x"]]
+    assert b"number-rows-repeated" not in _content(ods)
+    assert ods_append.remove_rows(ods, "Sheet1", lambda row: row == ["a"]) == [["a"]]
+    assert get_data(ods)["Sheet1"] == [["x"]]
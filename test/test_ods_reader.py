@@ -0,0 +1,53 @@
+# test_ods_reader.py
+"""
+Tests for the streaming sheet reader in ods_reader.py
+"""
+import sys
+import os
+import datetime
+import io
+import json
+import zipfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import pytest
+import ods_append
+import ods_reader
+from Functions import get_data, save_data
+
+
+def test_rows_match_pyexcel(tmp_path):
+    ods = str(tmp_path / "a.ods")
+    save_data(ods, {"Other": [["x"]], "Sheet1": [
+        ["Dark", 1, 2.5, True, "", "cover.jpg"], [], ["two\nlines  and spaces"], [datetime.date(2025, 1, 2)]]})
+    assert list(ods_reader.iter_rows(ods, "Sheet1")) == get_data(ods)["Sheet1"]
+    assert list(ods_reader.iter_rows(ods, "Other")) == [["x"]]
+    with pytest.raises(KeyError):
+        list(ods_reader.iter_rows(ods, "Missing"))
+
+
+def test_repeats_are_expanded_and_padding_dropped(tmp_path):
+    ods = str(tmp_path / "a.ods")
+    ods_append.create_ods(ods, "Sheet1", [["a"]])
+    with zipfile.ZipFile(ods) as z:
+        parts = {name: z.read(name) for name in z.namelist()}
+    # Calc style: repeated cells and rows, and a padding row repeated a million times
+    parts["content.xml"] = parts["content.xml"].replace(b"</table:table>", (
+        b'<table:table-row table:number-rows-repeated="2"><table:table-cell table:number-columns-repeated="2"/>'
+        b'<table:table-cell office:value-type="float" office:value="7" table:number-columns-repeated="2"/>'
+        b'<table:table-cell table:number-columns-repeated="1020"/></table:table-row>'
+        b'<table:table-row table:number-rows-repeated="1048570"><table:table-cell/></table:table-row></table:table>'))
+    with zipfile.ZipFile(ods, "w") as z:
+        for name, data in parts.items():
+            z.writestr(name, data)
+    assert list(ods_reader.iter_rows(ods, "Sheet1")) == [["a"], ["", "", 7, 7], ["", "", 7, 7]]
+
+
+def test_export_writes_csv_and_jsonl(tmp_path):
+    ods = str(tmp_path / "a.ods")
+    save_data(ods, {"Sheet1": [["Dark", "1", "01.01.2025"], ["Lupin, Teil 2", 3, datetime.date(2025, 1, 2)]]})
+    out = io.StringIO()
+    assert ods_reader.export(ods, "Sheet1", out, "csv") == 2
+    assert out.getvalue().splitlines() == ["Dark,1,01.01.2025", '"Lupin, Teil 2",3,2025-01-02']
+    out = io.StringIO()
+    ods_reader.export(ods, "Sheet1", out, "jsonl")
+    assert [json.loads(line) for line in out.getvalue().splitlines()][1] == ["Lupin, Teil 2", 3, "2025-01-02"]
@@ -0,0 +1,58 @@
+# test_parser_benchmarks.py
+"""
+Benchmarks of the site parsers on the recorded pages (see page_corpus.py), offline.
+Run with: python -m pytest test/test_parser_benchmarks.py --benchmark-only
+Compare against a saved run with --benchmark-autosave / --benchmark-compare.
+"""
+import sys
+import os
+import tracemalloc
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+pytest.importorskip("pytest_benchmark")
+import fsmirror
+import http_cache
+import netflix_parse
+from http_cache import SCAN_CHUNK_SIZE
+from page_corpus import PARSERS, expected, load_page, offline_session
+
+CASES = expected()
+EXTRACTORS = {"netflix": netflix_parse.EXTRACTOR, "fsmirror": fsmirror.EXTRACTOR}
+
+def _peak_kb(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_parse_page(benchmark, name, tmp_path, monkeypatch):
+    """Whole parser call on a cache miss: fetch, scan while reading, store."""
+    case = CASES[name]
+    cache = http_cache.HttpCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(http_cache, "_cache", cache)
+    session = offline_session([name])
+    parse = PARSERS[case["site"]]
+    benchmark.extra_info["peak_kb"] = _peak_kb(lambda: parse(case["url"], session=session))
+    result = benchmark.pedantic(parse, args=(case["url"],), kwargs={"session": session},
+                                setup=cache.clear, rounds=30, warmup_rounds=2)
+    assert result == (case["titel"], case["image_url"])
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_extract_page(benchmark, name):
+    """The site's extraction rules alone, fed in chunks as HttpCache.scan does."""
+    case = CASES[name]
+    data = load_page(name)
+    extractor = EXTRACTORS[case["site"]]
+
+    def scan():
+        scan = extractor.scan()
+        for offset in range(0, len(data), SCAN_CHUNK_SIZE):
+            if scan.feed(data[offset:offset + SCAN_CHUNK_SIZE]):
+                break
+        return scan
+
+    benchmark.extra_info["peak_kb"] = _peak_kb(scan)
+    assert benchmark(scan).found
@@ -0,0 +1,44 @@
+# test_parser_corpus.py
+"""
+The site parsers against the recorded pages in test/fixtures/pages, offline
+"""
+import sys
+import os
+import tracemalloc
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import http_cache
+from page_corpus import PARSERS, expected, offline_session
+
+CASES = expected()
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = http_cache.HttpCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(http_cache, "_cache", cache)
+    return cache
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_recorded_page_parses_to_expected(name, cache):
+    case = CASES[name]
+    parse = PARSERS[case["site"]]
+    assert parse(case["url"], session=offline_session([name])) == (case["titel"], case["image_url"])
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_parse_allocates_within_budget(name, cache):
+    case = CASES[name]
+    session = offline_session([name])
+    # Lazy imports are not the parse's own cost
+    PARSERS[case["site"]](case["url"], session=session)
+    cache.clear()
+    tracemalloc.start()
+    try:
+        PARSERS[case["site"]](case["url"], session=session)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak <= case["peak_kb"] * 1024, f"{name}: peak {peak // 1024} KB"
+
+def test_unknown_page_is_a_clean_miss(cache):
+    assert PARSERS["fsmirror"]("https://fsmirror.example/missing", session=offline_session()) == ("", None)
+    assert PARSERS["netflix"]("https://www.netflix.com/title/0", session=offline_session()) == (None, None)
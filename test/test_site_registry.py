@@ -0,0 +1,39 @@
+# test_site_registry.py
+"""
+Tests for URL routing and lazy parser loading in site_registry.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import site_registry
+from site_registry import find_site, route_message
+
+
+def test_find_site_by_host_label():
+    assert find_site("https://www.netflix.com/watch/81786479?trackId=1").key == "netflix"
+    assert find_site("https://fsmirror42.to/film/dark").key == "fsmirror"
+    assert find_site("https://example.com/netflix-news") is None
+    assert find_site("not a url") is None
+
+
+def test_route_message_by_site_legacy_flag_or_host():
+    assert route_message({"site": "fsmirror", "url": "https://fsmirror.to/x"}).key == "fsmirror"
+    assert route_message({"netflix": True, "url": "https://www.netflix.com/watch/1"}).key == "netflix"
+    assert route_message({"text": "Dark", "url": "https://example.com"}) is None
+    assert route_message({"text": "Dark", "url": "https://www.netflix.com/title/1"}).key == "netflix"
+    assert route_message({"site": None, "url": "https://www.netflix.com/title/1"}) is None
+    assert route_message({"site": "netflix", "url": ""}) is None
+
+
+def test_parser_module_is_imported_on_first_use(tmp_path, monkeypatch):
+    (tmp_path / "demo_site_parser.py").write_text(
+        "def parse(url, session=None):\n    return 'https://img/' + url.rsplit('/', 1)[-1]\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setitem(site_registry._SITES, "demo", None)
+    site = site_registry.register_site("demo", "demo_site_parser", "parse", "Demo", "Demo-Eintrag")
+    assert "demo_site_parser" not in sys.modules
+    assert find_site("https://demo3.example/watch/42") is site
+    assert "demo_site_parser" not in sys.modules
+    assert site.parse("https://demo.example/watch/42") == (None, "https://img/42")
+    assert "demo_site_parser" in sys.modules
+    monkeypatch.delitem(sys.modules, "demo_site_parser")
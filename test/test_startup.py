@@ -0,0 +1,19 @@
+# test_startup.py
+"""
+Cold-start budget for the native host (see automation/startup_budget.py)
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'automation')))
+from startup_budget import IMPORT_BUDGET_MS, deferred_imports, measure_imports
+
+
+def test_main_defers_heavy_imports():
+    _, imports = measure_imports("main")
+    assert deferred_imports(imports) == []
+
+
+def test_main_import_time_within_budget():
+    # Best of three to keep scheduler noise out of the measurement
+    total_ms = min(measure_imports("main")[0] for _ in range(3))
+    assert total_ms <= IMPORT_BUDGET_MS, f"import main took {total_ms:.1f} ms"
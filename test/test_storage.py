@@ -0,0 +1,41 @@
+# test_storage.py
+"""
+Tests for the storage backends and the ODS export in storage.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import storage
+from Functions import get_data, make_row, save_data
+from journal import Journal
+
+
+def test_sqlite_storage_indexes_rows_by_title_and_date(tmp_path):
+    db = storage.SqliteStorage(str(tmp_path / "a.sqlite3"))
+    db.add_rows([make_row("Dark", "1", "24.12.2024", "https://a"),
+                 make_row("Lupin", "1", "02.01.2025", "https://b"),
+                 make_row("dark", "2", "03.01.2025", "https://c", True)], checkpoint=7)
+    assert db.checkpoint() == 7
+    assert [row[1] for row in db.find_title("DARK")] == ["1", "2"]
+    assert [row[0] for row in db.seen_between("2025-01-01", "2025-01-31")] == ["Lupin", "dark"]
+    assert db.db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = " ".join(str(step) for step in db.db.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM entries WHERE titel = ? COLLATE NOCASE", ("x",)))
+    assert "entries_titel" in plan
+
+
+def test_sqlite_imports_existing_sheet_once_and_exports_it_back(tmp_path):
+    ods = str(tmp_path / "Ablage.ods")
+    save_data(ods, {"Sheet1": [["Dark", "1", "01.01.2025", "https://a", "0", ""]]})
+    db = storage.SqliteStorage(str(tmp_path / "a.sqlite3"), import_from=storage.OdsStorage(ods, "Sheet1"))
+    journal = Journal(ods + ".journal.jsonl", db)
+    journal.append([make_row("Dark", "2", "02.01.2025", "https://b")])
+    assert journal.compact() == 1
+    storage.export_ods(db, ods, "Sheet1")
+    db.close()
+
+    reopened = storage.SqliteStorage(str(tmp_path / "a.sqlite3"), import_from=storage.OdsStorage(ods, "Sheet1"))
+    assert len(list(reopened.rows())) == 2
+    assert get_data(ods)["Sheet1"] == [["Dark", "1", "01.01.2025", "https://a", "0"],
+                                       ["Dark", "2", "02.01.2025", "https://b", "0"]]
+    assert storage.OdsStorage(ods, "Sheet1").checkpoint() == reopened.checkpoint()
@@ -0,0 +1,82 @@
+# test_thumb_cache.py
+"""
+Tests for the poster thumbnail cache in thumb_cache.py and its use by the dialog
+"""
+import sys
+import os
+import threading
+import time
+import pytest
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice
+from PyQt6.QtGui import QColor, QPixmap
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import http_client
+import thumb_cache
+from disk_cache import evict_lru
+
+POSTER_URL = "https://image.tmdb.org/t/p/w300/poster.jpg"
+
+
+def _png(width, height):
+    pixmap = QPixmap(width, height)
+    pixmap.fill(QColor("red"))
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    pixmap.save(buffer, "PNG")
+    return bytes(data)
+
+
+@pytest.mark.qt
+def test_warm_cache_shows_poster_without_download(qtbot, tmp_path, monkeypatch):
+    from form_widget import EntryDialog
+    monkeypatch.setattr(thumb_cache, "THUMB_DIR", str(tmp_path))
+    downloads = []
+    monkeypatch.setattr(http_client, "fetch_bytes", lambda url, deadline=None: downloads.append(url) or _png(300, 450))
+    dialog = EntryDialog()
+    qtbot.addWidget(dialog)
+
+    dialog.set_image(POSTER_URL)
+    assert downloads == [POSTER_URL]
+    assert QPixmap(thumb_cache.cached_thumbnail(POSTER_URL)).height() == thumb_cache.THUMB_HEIGHT
+
+    dialog.set_image(POSTER_URL)
+    assert downloads == [POSTER_URL]
+    assert dialog.image_label.pixmap().height() == thumb_cache.THUMB_HEIGHT
+
+
+@pytest.mark.qt
+def test_reset_never_downloads_on_the_gui_thread(qtbot, tmp_path, monkeypatch):
+    import form_widget
+    monkeypatch.setattr(thumb_cache, "THUMB_DIR", str(tmp_path))
+    threads = []
+    monkeypatch.setattr(http_client, "fetch_bytes",
+                        lambda url, deadline=None: threads.append(threading.current_thread()) or _png(300, 450))
+    dialog = form_widget.EntryDialog()
+    qtbot.addWidget(dialog)
+    form_widget.fetch_thumbnail(POSTER_URL)
+    # Warm: shown from the cache as reset() read it, even if evicted right after
+    dialog.reset("Titel", image_url=POSTER_URL)
+    assert len(threads) == 1 and dialog.image_label.pixmap().height() == thumb_cache.THUMB_HEIGHT
+    # Evicted between the cache check and reading the file: loaded in the worker
+    path = thumb_cache.cached_thumbnail(POSTER_URL)
+    os.remove(path)
+    answers = iter([path])
+    monkeypatch.setattr(form_widget, "cached_thumbnail", lambda url, directory=None: next(answers, None))
+    dialog.reset("Titel", image_url=POSTER_URL)
+    dialog.loading.join(5)
+    assert len(threads) == 2 and threads[1] is not threading.main_thread()
+
+
+@pytest.mark.qt
+def test_least_recently_shown_thumbnails_are_evicted(qtbot, tmp_path):
+    pixmap = QPixmap(100, 160)
+    pixmap.fill(QColor("blue"))
+    for n in range(3):
+        thumb_cache.store_thumbnail(f"https://img/{n}.jpg", pixmap, str(tmp_path))
+        time.sleep(0.01)
+    size = os.path.getsize(thumb_cache.thumb_path("https://img/0.jpg", str(tmp_path)))
+    assert thumb_cache.cached_thumbnail("https://img/0.jpg", str(tmp_path))
+    assert evict_lru(str(tmp_path), ".png", 2 * size) == 1
+    assert thumb_cache.cached_thumbnail("https://img/1.jpg", str(tmp_path)) is None
+    assert thumb_cache.cached_thumbnail("https://img/0.jpg", str(tmp_path))
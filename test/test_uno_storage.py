@@ -0,0 +1,84 @@
+# test_uno_storage.py
+"""
+Tests for writing through LibreOffice Calc in uno_storage.py.
+The live tests need soffice and its Python bridge (uno) and are skipped otherwise.
+"""
+import sys
+import os
+import shutil
+import subprocess
+import time
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import uno_storage
+from Functions import get_data, save_data
+from ods_reader import iter_rows
+from storage import OdsStorage
+
+# Nothing listens here
+UNUSED_PORT = 1
+
+
+def test_rows_go_to_the_file_when_calc_has_it_closed(tmp_path):
+    ods = str(tmp_path / "Ablage.ods")
+    save_data(ods, {"Sheet1": [["a"]]})
+    storage = uno_storage.CalcStorage(OdsStorage(ods, "Sheet1"), port=UNUSED_PORT)
+    storage.add_rows([["b"]], 7)
+    assert get_data(ods)["Sheet1"] == [["a"], ["b"]]
+    assert storage.checkpoint() == 7
+
+
+def test_open_document_without_reachable_calc_is_left_alone(tmp_path):
+    ods = str(tmp_path / "Ablage.ods")
+    save_data(ods, {"Sheet1": [["a"]]})
+    with open(uno_storage.calc_lock_path(ods), "w") as f:
+        f.write("user,host,,17.10.2026 10:00,")
+    storage = uno_storage.CalcStorage(OdsStorage(ods, "Sheet1"), port=UNUSED_PORT)
+    before = os.stat(ods).st_mtime_ns
+    with pytest.raises(uno_storage.DocumentOpen):
+        storage.add_rows([["b"]], 7)
+    assert os.stat(ods).st_mtime_ns == before
+    assert storage.checkpoint() == 0
+
+
+@pytest.fixture
+def calc(tmp_path):
+    """A headless soffice accepting UNO connections on a free port."""
+    soffice = shutil.which("soffice") or shutil.which("libreoffice")
+    if soffice is None:
+        pytest.skip("soffice not installed")
+    uno = pytest.importorskip("uno")
+    port = 20000 + os.getpid() % 10000
+    process = subprocess.Popen([soffice, "--headless", "--invisible", "--norestore",
+                                f"-env:UserInstallation=file://{tmp_path}/profile",
+                                f"--accept=socket,host=localhost,port={port};urp;"])
+    storage = None
+    try:
+        for _ in range(100):
+            try:
+                storage = uno_storage.CalcStorage(OdsStorage(str(tmp_path / "Ablage.ods"), "Sheet1"), port=port)
+                storage._connect()
+                break
+            except Exception:
+                time.sleep(0.2)
+        else:
+            pytest.skip("soffice did not accept connections")
+        yield storage, uno
+    finally:
+        process.terminate()
+        process.wait(30)
+
+
+def test_rows_go_through_calc_while_it_has_the_file_open(calc):
+    storage, uno = calc
+    save_data(storage.ods_path, {"Sheet1": [["a", "1"]], "Other": [["q"]]})
+    desktop = storage._connect()
+    document = desktop.loadComponentFromURL(uno.systemPathToFileUrl(storage.ods_path), "_blank", 0, ())
+    try:
+        assert uno_storage.open_in_calc(storage.ods_path)
+        storage.add_rows([["b", "2"], ["c", 3]], 42)
+        storage.add_rows([["d", "4"]], 43)
+        assert storage.checkpoint() == 43
+        assert list(iter_rows(storage.ods_path, "Sheet1")) == [["a", "1"], ["b", "2"], ["c", 3], ["d", "4"]]
+    finally:
+        document.close(True)
@@ -0,0 +1,20 @@
+# test_write_lock.py
+"""
+Tests for the cross-process FileLock in write_lock.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import pytest
+from write_lock import FileLock, LockTimeout
+
+
+def test_lock_excludes_other_holders_until_released(tmp_path):
+    path = str(tmp_path / "a.lock")
+    first, second = FileLock(path), FileLock(path)
+    with first:
+        assert not second.acquire(blocking=False)
+        with pytest.raises(LockTimeout):
+            second.acquire(timeout=0.05)
+    assert second.acquire(blocking=False)
+    second.release()